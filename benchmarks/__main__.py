@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+
+import benchmarks.suite as suite
+
+
+def positive_float(arg_value):
+    try:
+        value = float(arg_value)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        raise argparse.ArgumentTypeError("must be a positive number")
+    return value
+
+
+def parse_cli_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time bump-anything against synthetic workloads",
+    )
+    parser.add_argument(
+        "benchmark_names",
+        nargs="*",
+        metavar="benchmark",
+        help="the benchmarks to run (defaults to all of them)",
+    )
+    parser.add_argument(
+        "--scale",
+        type=positive_float,
+        default=1.0,
+        help="the fraction of the full workload sizes to use",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=suite.DEFAULT_REPEAT_COUNT, dest="repeat_count"
+    )
+    parser.add_argument("--save", metavar="BASELINE", dest="save_path")
+    parser.add_argument("--compare", metavar="BASELINE", dest="compare_path")
+    parser.add_argument(
+        "--tolerance",
+        type=positive_float,
+        default=suite.DEFAULT_TOLERANCE,
+        help="the fraction by which a metric may exceed its baseline",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_cli_args()
+    benchmark_names = [benchmark.name for benchmark in suite.BENCHMARKS]
+    for benchmark_name in args.benchmark_names:
+        if benchmark_name not in benchmark_names:
+            sys.exit("Unknown benchmark: {}".format(benchmark_name))
+    baseline_metrics = {}
+    if args.compare_path:
+        baseline_metrics, baseline_scale = suite.load_baseline(args.compare_path)
+        if baseline_scale != args.scale:
+            sys.exit(
+                "Aborting because the baseline was recorded at scale {}".format(
+                    baseline_scale
+                )
+            )
+
+    def print_result(benchmark_name, metric_value):
+        if benchmark_name in baseline_metrics:
+            baseline_value = baseline_metrics[benchmark_name]
+            print(
+                "{}: {:.4f}s (baseline {:.4f}s, {:+.1%})".format(
+                    benchmark_name,
+                    metric_value,
+                    baseline_value,
+                    metric_value / baseline_value - 1,
+                )
+            )
+        else:
+            print("{}: {:.4f}s".format(benchmark_name, metric_value))
+
+    metrics = suite.run_benchmarks(
+        benchmark_names=args.benchmark_names,
+        scale=args.scale,
+        repeat_count=args.repeat_count,
+        on_result=print_result,
+    )
+    if args.save_path:
+        suite.save_baseline(args.save_path, metrics, args.scale)
+        print("Saved baseline to {}".format(args.save_path))
+    regressed_metric_names = suite.get_regressed_metric_names(
+        metrics, baseline_metrics, tolerance=args.tolerance
+    )
+    if regressed_metric_names:
+        sys.exit(
+            "Regressed by more than {:.0%}: {}".format(
+                args.tolerance, ", ".join(regressed_metric_names)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+
+# A single benchmark; the workload is created once (within the current
+# directory) for the given scale, after which the run function is timed
+# repeatedly with whatever the workload function returned; if there is a
+# prepare function, it is called (untimed) before each run, and its return
+# value is passed to the run instead
+@dataclass
+class Benchmark(object):
+    name: str
+    create_workload: Callable[[float], Any]
+    run: Callable[[Any], Any]
+    prepare: Optional[Callable[[Any], Any]] = None
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from unittest.mock import patch
+
+import benchmarks.workloads as workloads
+import bumpanything.__main__ as bump
+from benchmarks.benchmark import Benchmark
+
+# The version of the format used for saved baselines
+BASELINE_FORMAT_VERSION = 1
+
+# The default number of times each benchmark is run; only the fastest run is
+# recorded, since slower runs mostly measure noise from other processes
+DEFAULT_REPEAT_COUNT = 3
+
+# The default fraction by which a metric may exceed its baseline before it is
+# considered a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+# Silence the output of the bump command (which would otherwise print a line
+# for every one of thousands of files)
+@contextmanager
+def suppress_output():
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        yield
+
+
+def create_minified_json(scale):
+    return workloads.get_minified_json_contents(
+        int(workloads.MINIFIED_JSON_SIZE * scale)
+    )
+
+
+# Return a function which creates the adversarial input of the given kind
+# (see workloads.ADVERSARIAL_INPUTS)
+def get_adversarial_contents_creator(kind):
+    def create_adversarial_contents(scale):
+        return workloads.get_adversarial_contents(
+            kind, int(workloads.ADVERSARIAL_SIZE * scale)
+        )
+
+    return create_adversarial_contents
+
+
+def create_workspace(scale):
+    return workloads.create_workspace(
+        os.curdir,
+        workloads.get_scaled_count(workloads.WORKSPACE_MANIFEST_COUNT, scale),
+    )
+
+
+def create_lockfile(scale):
+    workloads.create_lockfile("package-lock.json", int(workloads.LOCKFILE_SIZE * scale))
+    return ["package-lock.json"]
+
+
+def create_git_repository(scale):
+    workloads.create_git_repository(
+        os.curdir, workloads.get_scaled_count(workloads.GIT_INDEX_FILE_COUNT, scale)
+    )
+
+
+# Bump the version in the repository's package.json (untimed), returning the
+# results for the Git operations to commit
+def bump_git_repository_package(_):
+    with suppress_output():
+        return list(bump.bump_version_for_files(["package.json"], "patch"))
+
+
+# Return a function which commits and tags the given file results using the
+# Git backend with the given name
+def get_git_operations_runner(git_backend_name):
+    def run_git_operations(file_results):
+        bump.handle_git_operations(
+            file_results,
+            commit_message="Bump version to {}".format(file_results[0].new_version),
+            tag_name="v{}".format(file_results[0].new_version),
+            should_tag=True,
+            git_backend=bump.get_git_backend(git_backend_name),
+        )
+
+    return run_git_operations
+
+
+# Return a function which runs the bump command with the given CLI arguments
+def get_main_runner(*cli_args):
+    def run_main(_):
+        with patch.object(sys, "argv", ["bump", *cli_args]):
+            bump.main()
+
+    return run_main
+
+
+BENCHMARKS = (
+    Benchmark(
+        name="replace_version_in_file_contents.minified_json",
+        create_workload=create_minified_json,
+        run=lambda file_contents: bump.replace_version_in_file_contents(
+            file_contents, "patch"
+        ),
+    ),
+    *(
+        Benchmark(
+            name="search_version.{}".format(kind),
+            create_workload=get_adversarial_contents_creator(kind),
+            run=lambda contents: bump.get_version_searcher(bytes).search(contents),
+        )
+        for kind in workloads.ADVERSARIAL_INPUTS
+    ),
+    Benchmark(
+        name="bump_version_for_files.workspace",
+        create_workload=create_workspace,
+        run=lambda file_paths: list(bump.bump_version_for_files(file_paths, "patch")),
+    ),
+    Benchmark(
+        name="bump_version_for_files.lockfile",
+        create_workload=create_lockfile,
+        run=lambda file_paths: list(bump.bump_version_for_files(file_paths, "patch")),
+    ),
+    *(
+        Benchmark(
+            name="handle_git_operations.{}".format(git_backend_name),
+            create_workload=create_git_repository,
+            prepare=bump_git_repository_package,
+            run=get_git_operations_runner(git_backend_name),
+        )
+        for git_backend_name in bump.GIT_BACKENDS
+    ),
+    Benchmark(
+        name="main.workspace",
+        create_workload=create_workspace,
+        run=get_main_runner("patch", "--workspace", "--no-commit", "--no-cache"),
+    ),
+    Benchmark(
+        name="main.git_repository",
+        create_workload=create_git_repository,
+        run=get_main_runner("patch", "package.json"),
+    ),
+)
+
+
+# Run the given benchmark in a fresh directory within the given one,
+# returning the fastest of the given number of runs (in seconds)
+def run_benchmark(benchmark, work_dir_path, scale, repeat_count):
+    benchmark_dir_path = os.path.join(work_dir_path, benchmark.name)
+    os.makedirs(benchmark_dir_path)
+    original_dir_path = os.getcwd()
+    os.chdir(benchmark_dir_path)
+    try:
+        workload = benchmark.create_workload(scale)
+        run_times = []
+        for _ in range(repeat_count):
+            run_arg = benchmark.prepare(workload) if benchmark.prepare else workload
+            with suppress_output():
+                start_time = time.perf_counter()
+                benchmark.run(run_arg)
+                run_times.append(time.perf_counter() - start_time)
+        return min(run_times)
+    finally:
+        os.chdir(original_dir_path)
+        shutil.rmtree(benchmark_dir_path, ignore_errors=True)
+
+
+# Run the benchmarks with the given names (or all of them), returning a
+# dictionary of the time taken by each (in seconds)
+def run_benchmarks(
+    benchmark_names=None, scale=1.0, repeat_count=DEFAULT_REPEAT_COUNT, on_result=None
+):
+    metrics = {}
+    work_dir_path = tempfile.mkdtemp(prefix="bump-benchmark-")
+    try:
+        for benchmark in BENCHMARKS:
+            if benchmark_names and benchmark.name not in benchmark_names:
+                continue
+            metrics[benchmark.name] = run_benchmark(
+                benchmark, work_dir_path, scale, repeat_count
+            )
+            if on_result:
+                on_result(benchmark.name, metrics[benchmark.name])
+    finally:
+        shutil.rmtree(work_dir_path, ignore_errors=True)
+    return metrics
+
+
+# Write the given metrics to the baseline file at the given path
+def save_baseline(baseline_path, metrics, scale):
+    with open(baseline_path, "w") as baseline_file:
+        json.dump(
+            {
+                "format": BASELINE_FORMAT_VERSION,
+                "scale": scale,
+                "python": sys.version.split()[0],
+                "metrics": metrics,
+            },
+            baseline_file,
+            indent=2,
+            sort_keys=True,
+        )
+        baseline_file.write("\n")
+
+
+# Read the baseline file at the given path, returning a tuple of (metrics,
+# scale)
+def load_baseline(baseline_path):
+    with open(baseline_path, "r") as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("format") != BASELINE_FORMAT_VERSION:
+        raise ValueError("unsupported baseline format")
+    return (baseline["metrics"], baseline["scale"])
+
+
+# Return the names of the metrics which are slower than their baseline by
+# more than the given tolerance (a fraction of the baseline); metrics missing
+# from either side are not compared
+def get_regressed_metric_names(metrics, baseline_metrics, tolerance=DEFAULT_TOLERANCE):
+    return [
+        metric_name
+        for metric_name, metric_value in metrics.items()
+        if metric_name in baseline_metrics
+        and metric_value > baseline_metrics[metric_name] * (1 + tolerance)
+    ]
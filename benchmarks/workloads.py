@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import os.path
+import subprocess
+
+# The version written to every generated manifest
+WORKLOAD_VERSION = "1.2.3"
+
+# The full-scale size of each workload; every workload is multiplied by the
+# scale given to the suite, so that small runs (e.g. in tests) stay quick
+WORKSPACE_MANIFEST_COUNT = 10000
+LOCKFILE_SIZE = 200 * 1024 * 1024
+MINIFIED_JSON_SIZE = 20 * 1024 * 1024
+GIT_INDEX_FILE_COUNT = 20000
+ADVERSARIAL_SIZE = 4 * 1024 * 1024
+
+# Inputs crafted to make searching for a version slow, as a prefix followed by
+# a unit repeated to fill the rest of the input; none of them contains a
+# version, so each must be searched in full (a backtracking search takes time
+# quadratic to the length of an unclosed version, for instance)
+ADVERSARIAL_INPUTS = {
+    "unclosed_version": (b'version="1.2.', b"3"),
+    "whitespace_run": (b"version", b" \t\n"),
+    "repeated_key": (b"", b"version"),
+    "repeated_separator": (b"", b'"Version": "1.'),
+}
+
+# The number of packages per directory in generated workspaces and
+# repositories, so that no single directory becomes unrealistically large
+PACKAGES_PER_DIR = 100
+
+
+def get_scaled_count(count, scale):
+    return max(1, int(count * scale))
+
+
+# Return the relative path of the directory for the package with the given
+# index, grouping packages into nested directories
+def get_package_dir_path(package_index):
+    return os.path.join(
+        "packages",
+        "group-{}".format(package_index // PACKAGES_PER_DIR),
+        "package-{}".format(package_index),
+    )
+
+
+def write_file(file_path, file_contents):
+    os.makedirs(os.path.dirname(file_path) or os.curdir, exist_ok=True)
+    with open(file_path, "w") as file:
+        file.write(file_contents)
+
+
+def get_package_json_contents(package_name):
+    return json.dumps(
+        {
+            "name": package_name,
+            "version": WORKLOAD_VERSION,
+            "description": "A synthetic package for benchmarking",
+            "dependencies": {"left-pad": "^1.3.0"},
+        },
+        indent=2,
+    )
+
+
+# Create a monorepo in the given directory with the given number of manifests
+# (alternating between package.json and Cargo.toml files); returns the paths
+# of the manifests
+def create_workspace(dir_path, manifest_count):
+    manifest_paths = []
+    for package_index in range(manifest_count):
+        package_dir_path = os.path.join(dir_path, get_package_dir_path(package_index))
+        if package_index % 2:
+            manifest_path = os.path.join(package_dir_path, "Cargo.toml")
+            manifest_contents = (
+                '[package]\nname = "package-{}"\nversion = "{}"\n'.format(
+                    package_index, WORKLOAD_VERSION
+                )
+            )
+        else:
+            manifest_path = os.path.join(package_dir_path, "package.json")
+            manifest_contents = get_package_json_contents(
+                "package-{}".format(package_index)
+            )
+        write_file(manifest_path, manifest_contents)
+        manifest_paths.append(manifest_path)
+    return manifest_paths
+
+
+# Create a package-lock.json of (roughly) the given size at the given path,
+# with the version at the top and a long tail of dependencies after it
+def create_lockfile(file_path, file_size):
+    with open(file_path, "w") as file:
+        file.write(
+            '{{\n  "name": "foo",\n  "version": "{}",\n  "lockfileVersion": 3,\n'
+            '  "packages": {{\n'.format(WORKLOAD_VERSION)
+        )
+        dependency_index = 0
+        while file.tell() < file_size:
+            file.write(
+                '    "node_modules/dependency-{0}": {{\n'
+                '      "version": "{1}.{0}.0",\n'
+                '      "resolved": "https://registry.npmjs.org/dependency-{0}/-/'
+                'dependency-{0}-{1}.{0}.0.tgz",\n'
+                '      "integrity": "sha512-{2}"\n'
+                "    }},\n".format(dependency_index, dependency_index % 10, "A" * 86)
+            )
+            dependency_index += 1
+        file.write('    "": {}\n  }\n}\n')
+
+
+# Return the contents of a single-line (minified) JSON document of (roughly)
+# the given size, whose version comes after the bulk of the contents
+def get_minified_json_contents(contents_size):
+    entry = '"dependency-{}":"^1.0.0",'
+    entries = []
+    entries_size = 0
+    while entries_size < contents_size:
+        entries.append(entry.format(len(entries)))
+        entries_size += len(entries[-1])
+    return '{{"name":"foo","dependencies":{{{}"":""}},"version":"{}"}}'.format(
+        "".join(entries), WORKLOAD_VERSION
+    )
+
+
+# Return the adversarial input of the given kind (see ADVERSARIAL_INPUTS), of
+# (roughly) the given size
+def get_adversarial_contents(kind, contents_size):
+    prefix, unit = ADVERSARIAL_INPUTS[kind]
+    return prefix + unit * max(1, (contents_size - len(prefix)) // len(unit))
+
+
+# Create a Git repository in the given directory whose index tracks the given
+# number of files (in addition to a package.json which can be bumped)
+def create_git_repository(dir_path, file_count):
+    for file_index in range(file_count):
+        write_file(
+            os.path.join(dir_path, get_package_dir_path(file_index), "index.js"),
+            "module.exports = {{ id: {} }};\n".format(file_index),
+        )
+    write_file(os.path.join(dir_path, "package.json"), get_package_json_contents("foo"))
+    for git_args in (
+        ("init", "--quiet"),
+        ("config", "commit.gpgsign", "false"),
+        ("config", "tag.gpgsign", "false"),
+        ("config", "user.name", "Benchmark User"),
+        ("config", "user.email", "benchmark@example.com"),
+        ("add", "-A"),
+        ("commit", "--quiet", "-m", "Initial commit"),
+    ):
+        subprocess.check_call(["git", *git_args], cwd=dir_path)
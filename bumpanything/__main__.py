@@ -1,23 +1,27 @@
 #!/usr/bin/env python3
 
-import argparse
 import os
 import os.path
-import re
 import sys
-from functools import partial
 
-import semver
-
-import bumpanything.git as git
-from bumpanything.file_result import FileResult
+# To keep the startup time of the `bump` command low, only the standard
+# library modules which are loaded by every interpreter anyway are imported
+# above; everything else is imported within the functions that need it
 
 # The regular expression pattern used to match the version to be incremented
-# within any given file of any type
-VERSION_PATT = r"({key}\s*[=:]\s*([\"\']?)){value}(\3\s*)".format(
-    key=r'(["\']?)version\2',
+# within any given file of any type; its groups are referenced by name (rather
+# than by number) so that it can be combined with other configured patterns
+VERSION_PATT = r"({key}\s*[=:]\s*{quote}){value}((?P=value_quote)\s*)".format(
+    key=r'(?P<key_quote>["\']?)version(?P=key_quote)',
+    quote=r"(?P<value_quote>[\"\']?)",
     value=r"(?P<version>\d+\.\d+\.\d+[a-z0-9\-\+\.]*)",
 )
+# The compiled forms of the above pattern, keyed by the type of contents
+# (str or bytes) they scan (see get_version_regex())
+version_regexes = {}
+# The linear-time searchers for the above pattern, keyed by the type of
+# contents they scan and their byte budget (see get_version_searcher())
+version_searchers = {}
 
 # The valid types of increments you could make to a semantic version, and the
 # functions they map to
@@ -29,6 +33,34 @@ INCREMENT_TYPES = (
 )
 
 
+# Return the compiled form of VERSION_PATT for scanning contents of the given
+# type (str, or bytes for raw file contents); the same compiled pattern is used
+# both to find the current version and to determine where the new version
+# should be written
+def get_version_regex(contents_type=str):
+    if contents_type not in version_regexes:
+        import re
+
+        version_patt = VERSION_PATT if contents_type is str else VERSION_PATT.encode()
+        version_regexes[contents_type] = re.compile(version_patt, flags=re.IGNORECASE)
+    return version_regexes[contents_type]
+
+
+# Return a searcher which finds the first match of VERSION_PATT within contents
+# of the given type exactly as its compiled form would, but in linear time no
+# matter what the contents are (see version_search.py); if a byte budget is
+# given, no more than that many bytes of any file are searched
+def get_version_searcher(contents_type=str, byte_budget=None):
+    searcher_key = (contents_type, byte_budget)
+    if searcher_key not in version_searchers:
+        from bumpanything.version_search import VersionSearcher
+
+        version_searchers[searcher_key] = VersionSearcher(
+            contents_type, byte_budget=byte_budget
+        )
+    return version_searchers[searcher_key]
+
+
 def get_auto_detectable_file_names():
     # Get the name of the project directory
     project_name = os.path.basename(os.getcwd())
@@ -52,63 +84,170 @@ def get_auto_detectable_file_names():
 # Increment the major, minor, or patch part of the given version string and
 # return the incremented version
 def bump_version(version, version_specifier):
+    return bump_versions([version], version_specifier)[0]
+
+
+# Return the new version for each of the given version strings; repeated
+# versions are only parsed and bumped once
+def bump_versions(versions, version_specifier):
     if version_specifier in INCREMENT_TYPES:
-        return str(
-            getattr(semver.Version.parse(version), f"bump_{version_specifier}")()
-        )
+        import bumpanything.versioning as versioning
+
+        return versioning.bump_versions(versions, version_specifier)
     else:
         # If we are not incrementing the version using one of the above
         # commands, we can assume the version specified is the explicit new
         # version to use
-        return version_specifier
-
-
-# The callback function for the substitution call that locates and increments
-# the version in-place
-def replace_version(version_specifier, version_match):
-    return "".join((version_match[1], version_specifier, version_match[5]))
+        return [version_specifier] * len(versions)
 
 
 # Replace the version in the given file contents with the version matching the
 # given version specifier
 def replace_version_in_file_contents(file_contents, version_specifier):
-    version_matches = re.search(VERSION_PATT, file_contents)
-    if not version_matches:
+    version_match = get_version_searcher(str).search(file_contents)
+    if not version_match:
         return (None, None, None)
-    current_version = version_matches.group("version")
+    current_version = version_match.group("version")
     new_version = bump_version(current_version, version_specifier)
-    new_file_contents = re.sub(
-        VERSION_PATT,
-        partial(replace_version, new_version),
-        file_contents,
-        flags=re.IGNORECASE,
-        count=1,
+    # Splice the new version into the span located above, rather than scanning
+    # the contents a second time to substitute it
+    version_start, version_end = version_match.span("version")
+    new_file_contents = "".join(
+        (file_contents[:version_start], new_version, file_contents[version_end:])
     )
     return (current_version, new_version, new_file_contents)
 
 
-# Locate the version number in the specified file and increment it
-def bump_version_for_file(version_specifier, file_path):
+# Locate the version number in the specified file, returning a tuple of
+# (does_file_exist, version_location, file_signature); if a cache entry is
+# given and it still describes the file, only the cached span is verified
+# rather than the whole file being scanned; if a scanner is given (see
+# get_file_scanners()), the file is searched with it instead; if a byte budget
+# is given, no more than that many bytes of the file are searched for
+# VERSION_PATT; this is safe to run in any thread or process
+def locate_version_in_file(file_path, cache_entry=None, scanner=None, byte_budget=None):
+    import bumpanything.cache as cache
+    import bumpanything.instrumentation as instrumentation
+
     try:
-        with open(file_path, "r+", newline="") as file:
-            file_contents = file.read()
-            (
-                current_version,
-                new_version,
-                new_file_contents,
-            ) = replace_version_in_file_contents(file_contents, version_specifier)
-            if not current_version:
-                return (False, None, None)
-            if new_file_contents == file_contents:
-                return (False, None, None)
-            file.truncate(0)
-            file.seek(0)
-            file.write(new_file_contents)
-            print("{}: {} -> {}".format(file_path, current_version, new_version))
-            return (True, current_version, new_version)
+        with instrumentation.measure("plan", file_path), open(file_path, "rb") as file:
+            file_signature = cache.get_file_signature(os.fstat(file.fileno()))
+            version_location = None
+            if cache_entry:
+                version_location = cache.verify_cached_location(
+                    file, file_signature, cache_entry
+                )
+                file.seek(0)
+            if scanner:
+                version_location = scanner.find_version(file)
+            elif not version_location:
+                version_location = find_version_in_open_file(
+                    file_path, file, byte_budget=byte_budget
+                )
+            return (True, version_location, file_signature)
     except FileNotFoundError:
+        return (False, None, None)
+
+
+# Find the version within the given (open, binary) file; if there is a locator
+# for the type of file, only the region it finds is searched (such as the
+# top-level members of a JSON document), otherwise (or if the locator finds
+# nothing) the whole file is (up to the given byte budget, if any)
+def find_version_in_open_file(file_path, file, byte_budget=None):
+    import bumpanything.file_io as file_io
+    import bumpanything.locators as locators
+
+    version_searcher = get_version_searcher(bytes, byte_budget)
+    locate_region = locators.get_locator(file_path)
+    if locate_region:
+        version_location = file_io.find_version_in_region(
+            file, locate_region, version_searcher
+        )
+        if version_location:
+            return version_location
+        file.seek(0)
+    return file_io.find_version_in_file(file, version_searcher)
+
+
+# Find the version within the given contents (as bytes) of the specified file,
+# exactly as find_version_in_open_file() (or the given scanner) would find it
+# within the file itself
+def find_version_in_contents(file_path, file_contents, scanner=None):
+    import bumpanything.file_io as file_io
+    import bumpanything.locators as locators
+
+    if scanner:
+        return scanner.find_version_in_data(file_contents)
+    version_searcher = get_version_searcher(bytes)
+    locate_region = locators.get_locator(file_path)
+    region = locate_region(file_contents) if locate_region else None
+    if region:
+        version_location = file_io.get_version_location(
+            version_searcher.search(file_contents, *region)
+        )
+        if version_location:
+            return version_location
+    return file_io.get_version_location(version_searcher.search(file_contents))
+
+
+# Determine how the version in the specified file should change, given its
+# location (as returned by locate_version_in_file()); returns a VersionChange,
+# or None if the version would not change
+def plan_version_change(
+    version_specifier, file_path, located_version, new_version=None
+):
+    does_file_exist, version_location, _ = located_version
+    if not does_file_exist:
         print("{}: file not found".format(file_path), file=sys.stderr)
+        return None
+    if not version_location:
+        return None
+    version_start, version_end, current_version, *other_version_starts = (
+        version_location
+    )
+    if new_version is None:
+        new_version = bump_version(current_version, version_specifier)
+    if new_version == current_version:
+        return None
+    # Imported only once there is a change to plan, since dataclasses are
+    # relatively slow to import
+    from bumpanything.version_change import VersionChange
+
+    return VersionChange(
+        file_path=file_path,
+        version_start=version_start,
+        version_end=version_end,
+        current_version=current_version,
+        new_version=new_version,
+        other_version_starts=other_version_starts[0] if other_version_starts else [],
+    )
+
+
+# Locate the version number in the specified file and increment it; if a
+# transaction is given, the change is staged in it rather than written
+# immediately
+def bump_version_for_file(version_specifier, file_path, bump_transaction=None):
+    version_change = plan_version_change(
+        version_specifier,
+        file_path,
+        locate_version_in_file(file_path, scanner=get_file_scanners([file_path])[0]),
+    )
+    if not version_change:
         return (False, None, None)
+    if bump_transaction:
+        stage_version_change(bump_transaction, version_change)
+    else:
+        import bumpanything.file_io as file_io
+
+        file_io.write_version_to_file(
+            file_path,
+            version_change.version_start,
+            version_change.version_end,
+            version_change.new_version,
+            other_version_starts=version_change.other_version_starts,
+        )
+    print_version_change(version_change)
+    return (True, version_change.current_version, version_change.new_version)
 
 
 # Find files in the current project (according to the project type) that
@@ -121,56 +260,601 @@ def get_default_file_paths():
     ]
 
 
-def abort_if_version_mismatch(file_results):
-    if len(set(result.new_version for result in file_results)) > 1:
-        print(
-            "Aborting commit because not all bumped versions are equal", file=sys.stderr
+# Find every manifest in the workspaces rooted at the given directories
+# (defaulting to the current directory), recursing into subdirectories (e.g.
+# for monorepos)
+def get_workspace_file_paths(root_dir_paths=(os.curdir,)):
+    import bumpanything.workspace as workspace
+
+    file_names = [
+        file_name
+        for file_name in get_auto_detectable_file_names()
+        # The <dirname>.php rule is applied per-directory by the workspace
+        # search itself
+        if not file_name.endswith(".php")
+    ]
+    file_paths = []
+    for root_dir_path in root_dir_paths:
+        manifest_paths = workspace.find_manifest_paths_cached(root_dir_path, file_names)
+        if os.path.normpath(root_dir_path) != os.curdir:
+            manifest_paths = [
+                os.path.join(root_dir_path, manifest_path)
+                for manifest_path in manifest_paths
+            ]
+        file_paths.extend(manifest_paths)
+    return file_paths
+
+
+# Return the manifests (among those a workspace search rooted at the given
+# directories would find) which own any of the given changed paths (see
+# workspace.find_owning_manifest_paths()); only the directories containing
+# the changed paths (and their ancestors) are looked in, so the work done is
+# proportional to the size of the change rather than of the workspace
+def get_changed_workspace_file_paths(changed_paths, root_dir_paths=(os.curdir,)):
+    import bumpanything.workspace as workspace
+
+    file_names = [
+        file_name
+        for file_name in get_auto_detectable_file_names()
+        if not file_name.endswith(".php")
+    ]
+    root_rel_dir_paths = [
+        workspace.get_rel_path(root_dir_path) for root_dir_path in root_dir_paths
+    ]
+    manifest_paths = workspace.find_owning_manifest_paths(
+        (
+            changed_path
+            for changed_path in changed_paths
+            if any(
+                workspace.is_path_within(changed_path, root_rel_dir_path)
+                for root_rel_dir_path in root_rel_dir_paths
+            )
+        ),
+        lambda rel_dir_path: workspace.list_dir_manifest_paths(
+            rel_dir_path, file_names
+        ),
+    )
+    # The owner of a changed path may lie above every root
+    return [
+        manifest_path
+        for manifest_path in manifest_paths
+        if any(
+            workspace.is_path_within(
+                workspace.get_rel_path(manifest_path), root_rel_dir_path
+            )
+            for root_rel_dir_path in root_rel_dir_paths
         )
-        sys.exit()
+    ]
 
 
-def bump_version_for_files(file_paths, version_specifier):
-    file_results = []
+# Return only those of the given manifests which own any of the given changed
+# paths (see workspace.find_owning_manifest_paths()), in the same order
+def filter_changed_file_paths(file_paths, changed_paths):
+    import bumpanything.workspace as workspace
+
+    # Index the manifests by the directory containing them
+    manifest_dir_index = {}
     for file_path in file_paths:
-        did_version_change, current_version, new_version = bump_version_for_file(
-            file_path=file_path, version_specifier=version_specifier
-        )
-        if did_version_change:
-            file_results.append(
-                FileResult(
-                    file_path=file_path,
-                    current_version=current_version,
-                    new_version=new_version,
+        rel_dir_path = workspace.get_rel_path(file_path).rpartition("/")[0]
+        manifest_dir_index.setdefault(rel_dir_path, []).append(file_path)
+    changed_file_paths = set(
+        workspace.find_owning_manifest_paths(
+            changed_paths,
+            lambda rel_dir_path: manifest_dir_index.get(rel_dir_path, []),
+        )
+    )
+    return [file_path for file_path in file_paths if file_path in changed_file_paths]
+
+
+# Determine how the manifests in the workspace (rooted at the given
+# directories, with --workspace, or otherwise at the current directory) should
+# change to depend on the new versions of any packages among the given version
+# changes (see dependencies.plan_dependency_changes())
+def plan_dependency_changes(args, version_changes):
+    import bumpanything.dependencies as dependencies
+
+    if args.workspace:
+        manifest_paths = get_workspace_file_paths(args.file_paths or (os.curdir,))
+    else:
+        manifest_paths = get_workspace_file_paths()
+    return dependencies.plan_dependency_changes(manifest_paths, version_changes)
+
+
+# Return the glob pattern matching every tag name the given template (as
+# passed to --tag-name) can produce
+def get_tag_pattern(tag_name_template):
+    import re
+
+    return (
+        re.sub(r"([*?\[])", r"[\1]", tag_name_template)
+        .replace("{new_version}", "*")
+        .replace("{{", "{")
+        .replace("}}", "}")
+    )
+
+
+# Return the release notes for the given new version (see changelog.py), built
+# from the commits within the current directory since the latest release tag
+# (or from every commit, if there is no such tag), aborting if they cannot be
+# read; the metadata of each commit is cached in the given version cache
+def plan_release_notes(args, new_version, version_cache=None):
+    import datetime
+    import subprocess
+
+    import bumpanything.changelog as changelog
+    import bumpanything.git as git
+
+    if not git.is_in_git_repository():
+        sys.exit(
+            "Aborting because a changelog can only be built within a Git repository"
+        )
+    if not git.get_head():
+        release_commits = []
+    else:
+        previous_tag = git.get_latest_tag(get_tag_pattern(args.tag_name))
+        revision_range = (
+            "refs/tags/{}..HEAD".format(previous_tag) if previous_tag else "HEAD"
+        )
+        try:
+            release_commits = list(
+                changelog.iterate_release_commits(revision_range, version_cache)
+            )
+        except subprocess.CalledProcessError:
+            sys.exit(
+                "Aborting because the commits in {} could not be read".format(
+                    revision_range
                 )
             )
-    return file_results
+    return changelog.format_release_notes(
+        new_version, release_commits, datetime.date.today().isoformat()
+    )
 
 
-def handle_git_operations(
-    file_results, commit_message, tag_name=None, should_tag=False
+# Return the paths (relative to the current directory) of the files which have
+# changed since the ref given by --changed-since (or since the latest release
+# tag, for --changed-since-last-tag), aborting if they cannot be determined
+def get_changed_paths(args):
+    import bumpanything.git as git
+
+    if not git.is_in_git_repository():
+        sys.exit("Aborting because only changes within a Git repository can be found")
+    ref = args.changed_since
+    if args.changed_since_last_tag:
+        ref = git.get_latest_tag(get_tag_pattern(args.tag_name))
+        if not ref:
+            sys.exit(
+                "Aborting because no tag matching {} was found".format(
+                    get_tag_pattern(args.tag_name)
+                )
+            )
+    changed_paths = git.get_changed_file_paths(ref)
+    if changed_paths is None:
+        sys.exit("Aborting because the changes since {} could not be found".format(ref))
+    return changed_paths
+
+
+# Return the version scanner which the project's config (the [tool.bump-anything]
+# table of its pyproject.toml) assigns to each of the given files, or None for
+# each file which is only searched for VERSION_PATT
+def get_file_scanners(file_paths):
+    import bumpanything.patterns as patterns
+
+    try:
+        scanner_rules = patterns.load_scanner_rules(
+            patterns.CONFIG_FILE_NAME, "(?i:{})".format(VERSION_PATT)
+        )
+    except ValueError as error:
+        sys.exit(
+            "Aborting because the bump-anything config is invalid: {}".format(error)
+        )
+    return [
+        patterns.get_file_scanner(scanner_rules, file_path) for file_path in file_paths
+    ]
+
+
+# Yield each of the given results (or planned changes), aborting as soon as
+# one does not share the new version of those before it; when they are being
+# planned lazily (see iterate_version_changes()), no file after the first
+# mismatch is ever read
+def check_version_mismatch(file_results):
+    new_version = None
+    for file_result in file_results:
+        if new_version is None:
+            new_version = file_result.new_version
+        elif file_result.new_version != new_version:
+            print(
+                "Aborting commit because not all bumped versions are equal",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        yield file_result
+
+
+# Abort if the given results (or planned changes) do not all share the same
+# new version
+def abort_if_version_mismatch(file_results):
+    for _ in check_version_mismatch(file_results):
+        pass
+
+
+# Determine how the version in each of the given files should change, without
+# modifying any of them, yielding a VersionChange for each file whose version
+# would change (in the same order as the given paths) as soon as it has been
+# scanned; the files are scanned by the given number of parallel jobs, each
+# only up to the given byte budget (if any)
+def iterate_version_changes(
+    file_paths,
+    version_specifier,
+    jobs=1,
+    executor_type="thread",
+    version_cache=None,
+    byte_budget=None,
+):
+    import bumpanything.executor as executor
+
+    file_paths = list(file_paths)
+    scanners = get_file_scanners(file_paths)
+    # Versions found by configured patterns are not cached, since the cache
+    # would not notice if the patterns were changed
+    if version_cache:
+        cache_entries = [
+            None if scanner else version_cache.get(file_path)
+            for file_path, scanner in zip(file_paths, scanners)
+        ]
+    else:
+        cache_entries = [None] * len(file_paths)
+    located_versions = executor.iterate_in_order(
+        locate_version_in_file,
+        file_paths,
+        cache_entries,
+        scanners,
+        [byte_budget] * len(file_paths),
+        jobs=jobs,
+        executor_type=executor_type,
+    )
+    # Bumped versions are memoized, so versions shared by many files are only
+    # bumped once
+    for file_path, scanner, located_version in zip(
+        file_paths, scanners, located_versions
+    ):
+        _, version_location, file_signature = located_version
+        if version_cache and version_location and not scanner:
+            version_cache.set(file_path, file_signature, version_location)
+        version_change = plan_version_change(
+            version_specifier, file_path, located_version
+        )
+        if version_change:
+            yield version_change
+
+
+def stage_version_change(bump_transaction, version_change):
+    import bumpanything.instrumentation as instrumentation
+
+    with instrumentation.measure("apply", version_change.file_path):
+        bump_transaction.write_version(
+            version_change.file_path,
+            version_change.version_start,
+            version_change.version_end,
+            version_change.current_version,
+            version_change.new_version,
+            other_version_starts=version_change.other_version_starts,
+        )
+
+
+# Group the splices (see Transaction.write_splices()) of the given version and
+# dependency changes by file, returning a list of (file_path, splices) tuples
+# in the order each file is first changed; a dependency whose version is the
+# very one found as the file's own version (as in a Cargo workspace member
+# whose version is inherited) is already replaced, so is not replaced twice
+def get_file_splices(version_changes, dependency_changes=()):
+    import bumpanything.file_io as file_io
+
+    file_splices = {}
+    for version_change in version_changes:
+        file_splices.setdefault(
+            os.path.normpath(version_change.file_path), (version_change.file_path, [])
+        )[1].extend(
+            (splice_start, splice_end, version_change.current_version, new_version)
+            for splice_start, splice_end, new_version in file_io.get_version_splices(
+                version_change.version_start,
+                version_change.version_end,
+                version_change.new_version,
+                version_change.other_version_starts,
+            )
+        )
+    for dependency_change in dependency_changes:
+        _, splices = file_splices.setdefault(
+            os.path.normpath(dependency_change.file_path),
+            (dependency_change.file_path, []),
+        )
+        dependency_span = (
+            dependency_change.version_start,
+            dependency_change.version_end,
+        )
+        if any(splice[:2] == dependency_span for splice in splices):
+            continue
+        splices.append(
+            (
+                dependency_change.version_start,
+                dependency_change.version_end,
+                dependency_change.current_version,
+                dependency_change.new_version,
+            )
+        )
+    return list(file_splices.values())
+
+
+def print_version_change(version_change):
+    print(
+        "{}: {} -> {}".format(
+            version_change.file_path,
+            version_change.current_version,
+            version_change.new_version,
+        )
+    )
+
+
+# Write the given planned version (and dependency) changes to their
+# respective files, along with any given release notes to the changelog (see
+# changelog.py), then return an iterator of the FileResult for each version
+# change; if a cache is given, it is updated with the new location of each
+# version
+def apply_version_changes(
+    version_changes, version_cache=None, dependency_changes=(), release_notes=None
+):
+    import bumpanything.cache as cache
+    import bumpanything.instrumentation as instrumentation
+    import bumpanything.transaction as transaction
+
+    version_changes = list(version_changes)
+    # Write all files together so that a failure (or crash) never leaves only
+    # some of them bumped; each file is written once with all of its changes
+    bump_transaction = transaction.Transaction(get_journal_path())
+    for file_path, splices in get_file_splices(version_changes, dependency_changes):
+        with instrumentation.measure("apply", file_path):
+            bump_transaction.write_splices(file_path, splices)
+    if release_notes:
+        import bumpanything.changelog as changelog
+
+        with instrumentation.measure("apply", changelog.CHANGELOG_FILE_NAME):
+            changelog.stage_release_notes(
+                bump_transaction, changelog.CHANGELOG_FILE_NAME, release_notes
+            )
+    bump_transaction.commit()
+    if version_cache:
+        scanners = get_file_scanners(
+            version_change.file_path for version_change in version_changes
+        )
+        # Rewriting a dependency range may move the version within the file
+        dependent_file_paths = set(
+            os.path.normpath(dependency_change.file_path)
+            for dependency_change in dependency_changes
+        )
+        for version_change, scanner in zip(version_changes, scanners):
+            if scanner or (
+                os.path.normpath(version_change.file_path) in dependent_file_paths
+            ):
+                continue
+            version_cache.set(
+                version_change.file_path,
+                cache.get_file_signature(os.stat(version_change.file_path)),
+                (
+                    version_change.version_start,
+                    version_change.version_start
+                    + len(version_change.new_version.encode()),
+                    version_change.new_version,
+                ),
+            )
+    return iterate_file_results(version_changes)
+
+
+# Yield a FileResult for each of the given (applied) version changes
+def iterate_file_results(version_changes):
+    from bumpanything.file_result import FileResult
+
+    for version_change in version_changes:
+        yield FileResult(
+            file_path=version_change.file_path,
+            current_version=version_change.current_version,
+            new_version=version_change.new_version,
+        )
+
+
+# Bump the version in each of the given files, returning an iterator of the
+# FileResult for each file that changed (in the same order as the given paths)
+def bump_version_for_files(
+    file_paths, version_specifier, jobs=1, executor_type="thread", version_cache=None
 ):
+    return apply_version_changes(
+        iterate_version_changes(
+            file_paths,
+            version_specifier,
+            jobs=jobs,
+            executor_type=executor_type,
+            version_cache=version_cache,
+        ),
+        version_cache=version_cache,
+    )
+
+
+# Report each of the given results (or planned changes), followed by each of
+# the given dependency changes, via the given ResultWriter, returning a list
+# of the results (for the Git operations which follow)
+def write_changes(result_writer, file_results, dependency_changes=()):
+    written_results = []
+    for file_result in file_results:
+        result_writer.write_file_result(file_result)
+        written_results.append(file_result)
+    for dependency_change in dependency_changes:
+        result_writer.write_dependency_change(dependency_change)
+    return written_results
+
+
+# Ensure that the Git operations which will follow the given version changes
+# can succeed, aborting before any file is touched if they cannot
+def preflight_git_operations(version_changes, tag_name=None, should_tag=False):
+    import bumpanything.git as git
+
     if not git.is_in_git_repository():
         return
+    abort_if_version_mismatch(version_changes)
+    if should_tag:
+        abort_if_tag_exists(tag_name)
+
+
+# Abort if a tag with the given name already exists (which is found from the
+# refs directly, so is cheap enough to check before anything is done)
+def abort_if_tag_exists(tag_name):
+    import bumpanything.git as git
+
+    if git.tag_exists(tag_name):
+        print(
+            "Aborting because tag {} already exists".format(tag_name),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+# Check that every one of the given files which is in the index has the same
+# version staged (as for a pre-commit hook), reading them all through a single
+# Git process; each file whose staged version differs from the most common one
+# is reported, and the check fails with a non-zero exit status
+def check_staged_versions(file_paths, result_writer):
+    import bumpanything.git as git
+
+    if not git.is_in_git_repository():
+        sys.exit(
+            "Aborting because staged versions can only be checked within a Git "
+            "repository"
+        )
+    file_paths = list(file_paths)
+    staged_versions = []
+    for (file_path, file_contents), scanner in zip(
+        git.iterate_staged_file_contents(file_paths), get_file_scanners(file_paths)
+    ):
+        if file_contents is None:
+            continue
+        version_location = find_version_in_contents(file_path, file_contents, scanner)
+        if version_location:
+            staged_versions.append((file_path, version_location[2]))
+    if not staged_versions:
+        result_writer.write_message("No staged versions found")
+        return
+    version_counts = {}
+    for _, version in staged_versions:
+        version_counts[version] = version_counts.get(version, 0) + 1
+    expected_version = max(version_counts, key=version_counts.get)
+    if len(version_counts) > 1:
+        for file_path, version in staged_versions:
+            if version != expected_version:
+                print(
+                    "{}: {} (expected {})".format(file_path, version, expected_version),
+                    file=sys.stderr,
+                )
+        sys.exit("Aborting because not all staged versions are equal")
+    result_writer.write_message(
+        "All staged versions are equal ({})".format(expected_version)
+    )
+
+
+# Abort if any of the files in the given (loaded) plan have changed since the
+# plan was made
+def abort_if_plan_stale(version_changes):
+    import bumpanything.plan as plan
+
+    stale_changes = [
+        version_change
+        for version_change in version_changes
+        if not plan.is_version_change_current(version_change)
+    ]
+    for version_change in stale_changes:
+        print(
+            "{}: file has changed since the plan was made".format(
+                version_change.file_path
+            ),
+            file=sys.stderr,
+        )
+    if stale_changes:
+        sys.exit(1)
+
+
+# The Git backends which can be used to commit and tag releases
+GIT_BACKENDS = ("porcelain", "plumbing", "native")
+
+# The formats in which --timings can print its summary
+TIMINGS_FORMATS = ("table", "json")
+
+
+# Return the Git backend (an object with add(), commit() and tag() functions)
+# with the given name
+def get_git_backend(git_backend_name="porcelain"):
+    if git_backend_name == "plumbing":
+        import bumpanything.git_plumbing as git_plumbing
+
+        return git_plumbing.GitPlumbingSession()
+    if git_backend_name == "native":
+        import bumpanything.git_native as git_native
+
+        return git_native.GitNativeSession()
+    import bumpanything.git as git
+
+    return git
+
+
+# Commit (and tag) the given results, along with any other changed files
+# (such as those whose dependencies were propagated), returning False if the
+# commit or tag failed
+def handle_git_operations(
+    file_results,
+    commit_message,
+    tag_name=None,
+    should_tag=False,
+    git_backend=None,
+    other_file_paths=(),
+):
+    import bumpanything.git as git
+
+    if not git.is_in_git_repository():
+        return True
+    if git_backend is None:
+        git_backend = git
     abort_if_version_mismatch(file_results)
+    # Fail before committing, rather than leaving an untagged release commit
+    if should_tag:
+        abort_if_tag_exists(tag_name)
     changed_result_paths = [result.file_path for result in file_results]
-    git.add(changed_result_paths)
+    changed_result_paths.extend(
+        file_path
+        for file_path in dict.fromkeys(other_file_paths)
+        if file_path not in changed_result_paths
+    )
+    git_backend.add(changed_result_paths)
     print(f"Staging {', '.join(changed_result_paths)}")
-    did_commit = git.commit(commit_message)
+    did_commit = git_backend.commit(commit_message)
     if not did_commit:
         print("Commit failed; aborting")
-        return
+        return False
     if not should_tag:
-        return
-    did_tag = git.tag(tag_name)
+        return True
+    did_tag = git_backend.tag(tag_name)
     if not did_tag:
-        return
+        print(f"Tagging commit as {tag_name} failed")
+        return False
     print(f"Tagging commit as {tag_name}")
+    return True
 
 
 def version_specifier(arg_value):
+    import argparse
+
     # Strip out 'v' prefix if included in the version specifier
-    arg_value = re.sub(r"^v", "", arg_value)
-    if arg_value in INCREMENT_TYPES or semver.Version.is_valid(arg_value):
+    if arg_value.startswith("v"):
+        arg_value = arg_value[1:]
+    if arg_value in INCREMENT_TYPES:
+        return arg_value
+    import bumpanything.versioning as versioning
+
+    if versioning.is_valid_version(arg_value):
         return arg_value
     else:
         raise argparse.ArgumentTypeError(
@@ -178,39 +862,426 @@ def version_specifier(arg_value):
         )
 
 
+def positive_int(arg_value):
+    import argparse
+
+    try:
+        value = int(arg_value)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    return value
+
+
 def parse_cli_args():
+    import argparse
+
+    import bumpanything.executor as executor
+    import bumpanything.output as output
+
     parser = argparse.ArgumentParser()
-    parser.add_argument("version_specifier", type=version_specifier)
+    # The version specifier is validated once the arguments are parsed, since
+    # with --check, it is the first file instead
+    parser.add_argument("version_specifier", nargs="?")
     parser.add_argument(
         "file_paths",
         metavar="file",
         nargs="*",
         type=os.path.expanduser,
-        default=get_default_file_paths(),
     )
+    parser.add_argument("--workspace", "-w", action="store_true")
+    parser.add_argument("--files-from", metavar="FILE")
+    repos_group = parser.add_mutually_exclusive_group()
+    repos_group.add_argument("--repos", action="store_true")
+    repos_group.add_argument("--submodules", action="store_true")
+    changed_since_group = parser.add_mutually_exclusive_group()
+    changed_since_group.add_argument("--changed-since", metavar="REF")
+    changed_since_group.add_argument("--changed-since-last-tag", action="store_true")
+    parser.add_argument("--jobs", "-j", type=positive_int, default=1)
+    parser.add_argument("--executor", choices=executor.EXECUTOR_TYPES, default="thread")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--max-scan-bytes", type=positive_int, metavar="BYTES")
+    parser.add_argument("--propagate", action="store_true")
+    parser.add_argument("--changelog", action="store_true")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--output", choices=output.OUTPUT_FORMATS, default="text")
+    parser.add_argument("--quiet", "-q", action="store_true")
+    parser.add_argument("--save-plan", metavar="PLAN_FILE")
+    parser.add_argument("--apply-plan", metavar="PLAN_FILE")
     parser.add_argument("--no-commit", "-n", action="store_true")
     parser.add_argument("--no-tag", action="store_true")
     parser.add_argument(
         "--commit-message", "-m", default="Prepare v{new_version} release"
     )
     parser.add_argument("--tag-name", "-t", default="v{new_version}")
-    return parser.parse_args()
+    parser.add_argument("--git-backend", choices=GIT_BACKENDS, default="porcelain")
+    parser.add_argument(
+        "--timings", nargs="?", choices=TIMINGS_FORMATS, const="table", default=None
+    )
+    parser.add_argument("--profile", metavar="PROFILE_FILE")
+    parser.add_argument("--serve", nargs="?", const="", metavar="SOCKET_PATH")
+    args = parser.parse_args()
+    # Plans refer to the files of a single repository
+    if (args.repos or args.submodules) and (args.save_plan or args.apply_plan):
+        parser.error(
+            "--repos and --submodules cannot be used with --save-plan or --apply-plan"
+        )
+    # Workspace paths are the directories to search, rather than files
+    if args.files_from and args.workspace and not args.repos:
+        parser.error("--files-from cannot be used with --workspace")
+    if args.check:
+        if args.version_specifier:
+            args.file_paths.insert(0, os.path.expanduser(args.version_specifier))
+            args.version_specifier = None
+        # Only the index is read, so there is nothing to plan or apply
+        if args.save_plan or args.apply_plan:
+            parser.error("--check cannot be used with --save-plan or --apply-plan")
+    elif args.version_specifier:
+        try:
+            args.version_specifier = version_specifier(args.version_specifier)
+        except argparse.ArgumentTypeError as error:
+            parser.error("argument version_specifier: {}".format(error))
+    # The version specifier is only optional when applying a saved plan or
+    # checking staged versions (or when serving requests, each of which has its
+    # own)
+    if (
+        not args.version_specifier
+        and not args.apply_plan
+        and not args.check
+        and args.serve is None
+    ):
+        parser.error("the following arguments are required: version_specifier")
+    # Saved plans only record the changes to versions themselves
+    if args.propagate and (args.save_plan or args.apply_plan):
+        parser.error("--propagate cannot be used with --save-plan or --apply-plan")
+    if args.changelog and (args.save_plan or args.apply_plan):
+        parser.error("--changelog cannot be used with --save-plan or --apply-plan")
+    return args
+
+
+# Return the path to the version location cache for the current project, and
+# the root directory of the project (to which the cached paths are relative);
+# the cache is kept in the Git directory of the repository, if any, or else in
+# the user's cache directory
+def get_cache_location():
+    import bumpanything.cache as cache
+    import bumpanything.git as git
+
+    repository = git.get_repository()
+    if repository and repository.work_tree_path:
+        return (repository.get_path(cache.CACHE_FILE_NAME), repository.work_tree_path)
+    return (cache.get_user_cache_path(os.getcwd()), os.getcwd())
+
+
+# Return the path to the journal of any in-progress transaction (see
+# transaction.py) for the current project; like the cache, it is kept in the
+# Git directory of the repository, if any, or else in the user's cache
+# directory, so that an interrupted run is recovered from anywhere within the
+# project; the repository is found without importing the git module, as this
+# is needed by every run
+def get_journal_path():
+    import bumpanything.git_repository as git_repository
+    import bumpanything.transaction as transaction
+
+    repository = git_repository.Repository.discover()
+    if repository and repository.work_tree_path:
+        return repository.get_path(transaction.JOURNAL_FILE_NAME)
+    import bumpanything.cache as cache
+
+    return cache.get_user_cache_path(os.getcwd()) + transaction.USER_JOURNAL_SUFFIX
+
+
+# Return True if the given CLI arguments can be run by the daemon, which can
+# neither serve itself nor read this process's stdin
+def can_forward_to_daemon(cli_args):
+    for i, arg in enumerate(cli_args):
+        if arg.startswith("--serve") or arg == "--files-from=-":
+            return False
+        if arg == "--files-from" and cli_args[i + 1 : i + 2] == ["-"]:
+            return False
+    return True
 
 
 def main():
+    # If a daemon is available, let it do the work with everything already
+    # loaded; this is checked before parsing the arguments to avoid paying for
+    # anything the daemon would otherwise do
+    socket_path = os.environ.get("BUMP_ANYTHING_SOCKET")
+    if socket_path and can_forward_to_daemon(sys.argv[1:]):
+        import bumpanything.daemon as daemon
+
+        exit_status = daemon.forward(socket_path, sys.argv[1:])
+        if exit_status is not None:
+            sys.exit(exit_status)
     args = parse_cli_args()
-    file_results = bump_version_for_files(args.file_paths, args.version_specifier)
-    if not file_results:
-        print("No files updated")
+    if args.serve is not None:
+        import bumpanything.daemon as daemon
+
+        daemon.serve(args.serve or daemon.get_default_socket_path())
         return
+    import bumpanything.instrumentation as instrumentation
+
+    timing_events = []
+    if args.timings:
+        instrumentation.add_hook(timing_events.append)
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        if args.repos or args.submodules:
+            run_repositories(args)
+        else:
+            run_with_cache(args)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if args.timings:
+            instrumentation.remove_hook(timing_events.append)
+            print(
+                instrumentation.format_timing_events(timing_events, args.timings),
+                file=sys.stderr,
+            )
+
+
+# Bump (and commit and tag) every repository given by the CLI arguments (see
+# repositories.release_repositories()), printing the output of each as a
+# group, followed by a summary; exits with a non-zero status if any failed
+def run_repositories(args):
+    import bumpanything.repositories as repositories
+
+    if args.submodules:
+        repo_paths = repositories.get_submodule_paths()
+        if repo_paths is None:
+            sys.exit(
+                "Aborting because submodules can only be found within a Git repository"
+            )
+    else:
+        repo_paths = get_explicit_file_paths(args.file_paths, args.files_from)
+    repository_results = []
+    for repository_result in repositories.release_repositories(
+        repo_paths, args, jobs=args.jobs
+    ):
+        repositories.write_repository_result(repository_result)
+        repository_results.append(repository_result)
+    print(repositories.format_summary(repository_results))
+    if not all(
+        repository_result.is_success for repository_result in repository_results
+    ):
+        sys.exit(1)
+
+
+# Run the bump described by the given CLI arguments, loading the version
+# location cache beforehand (unless disabled) and saving it afterward
+def run_with_cache(args):
+    import bumpanything.instrumentation as instrumentation
+    import bumpanything.transaction as transaction
+
+    transaction.recover(get_journal_path())
+    version_cache = None
+    if not args.no_cache:
+        import bumpanything.cache as cache
+
+        with instrumentation.measure("cache"):
+            version_cache = cache.VersionCache.load(*get_cache_location())
+    try:
+        return run(args, version_cache)
+    finally:
+        if version_cache:
+            with instrumentation.measure("cache"):
+                version_cache.save()
+
+
+def run(args, version_cache=None):
+    import bumpanything.output as output
+
+    result_writer = output.ResultWriter(args.output, is_quiet=args.quiet)
+    try:
+        return run_with_writer(args, result_writer, version_cache)
+    finally:
+        result_writer.flush()
+
+
+# Return the given file paths, with any glob patterns among them expanded in
+# place (see workspace.find_glob_paths()), followed by the paths listed in the
+# given file (where "-" denotes stdin), if any
+def get_explicit_file_paths(file_paths, files_from_path=None):
+    explicit_file_paths = []
+    for file_path in file_paths:
+        # The workspace module is only imported if there is a pattern to expand
+        if any(char in file_path for char in "*?["):
+            import bumpanything.workspace as workspace
+
+            if workspace.is_glob_pattern(file_path):
+                # As in the shell, a pattern matching nothing is left as it is
+                explicit_file_paths.extend(
+                    workspace.find_glob_paths(file_path) or [file_path]
+                )
+                continue
+        explicit_file_paths.append(file_path)
+    if files_from_path:
+        import bumpanything.workspace as workspace
+
+        if files_from_path == "-":
+            explicit_file_paths.extend(workspace.iterate_listed_paths(sys.stdin.buffer))
+            return explicit_file_paths
+        try:
+            with open(files_from_path, "rb") as list_file:
+                explicit_file_paths.extend(workspace.iterate_listed_paths(list_file))
+        except OSError as error:
+            sys.exit(
+                "Aborting because {} could not be read: {}".format(
+                    files_from_path, error.strerror
+                )
+            )
+    return explicit_file_paths
+
+
+# Return the paths of the files which the given CLI arguments refer to, as
+# given or found (see get_workspace_file_paths() and get_default_file_paths())
+# and narrowed to those with changes (for --changed-since)
+def get_file_paths(args):
+    changed_paths = None
+    if args.changed_since or args.changed_since_last_tag:
+        changed_paths = get_changed_paths(args)
+    if args.workspace and changed_paths is not None:
+        file_paths = get_changed_workspace_file_paths(
+            changed_paths, args.file_paths or (os.curdir,)
+        )
+    elif args.workspace:
+        file_paths = get_workspace_file_paths(args.file_paths or (os.curdir,))
+    elif args.file_paths or args.files_from:
+        file_paths = get_explicit_file_paths(args.file_paths, args.files_from)
+    else:
+        # Only probe for the default files if none were given explicitly
+        file_paths = get_default_file_paths()
+    if changed_paths is not None and not args.workspace:
+        file_paths = filter_changed_file_paths(file_paths, changed_paths)
+    return file_paths
+
+
+def run_with_writer(args, result_writer, version_cache=None):
+    import bumpanything.instrumentation as instrumentation
+
+    if args.apply_plan:
+        import bumpanything.plan as plan
+
+        # The plan already records where each version is, so the files do not
+        # need to be scanned again
+        with instrumentation.measure("plan"):
+            try:
+                version_changes = plan.load_plan(args.apply_plan)
+            except (OSError, ValueError) as error:
+                sys.exit(
+                    "Aborting because the plan could not be read: {}".format(error)
+                )
+            abort_if_plan_stale(version_changes)
+    else:
+        with instrumentation.measure("discover"):
+            file_paths = get_file_paths(args)
+        if args.check:
+            with instrumentation.measure("check"):
+                check_staged_versions(file_paths, result_writer)
+            return
+        with instrumentation.measure("plan"):
+            version_changes = iterate_version_changes(
+                file_paths,
+                args.version_specifier,
+                jobs=args.jobs,
+                executor_type=args.executor,
+                version_cache=version_cache,
+                byte_budget=args.max_scan_bytes,
+            )
+            # Stop scanning files as soon as a mismatch would abort the commit
+            if not args.no_commit:
+                import bumpanything.git as git
+
+                if git.is_in_git_repository():
+                    version_changes = check_version_mismatch(version_changes)
+            version_changes = list(version_changes)
+    if not version_changes:
+        result_writer.write_message("No files updated")
+        return
+    dependency_changes = []
+    if args.propagate:
+        with instrumentation.measure("propagate"):
+            dependency_changes = plan_dependency_changes(args, version_changes)
+    new_version = version_changes[0].new_version
+    commit_message = args.commit_message.format(new_version=new_version)
+    tag_name = args.tag_name.format(new_version=new_version)
     if not args.no_commit:
-        new_version = file_results[0].new_version
-        handle_git_operations(
-            file_results=file_results,
-            commit_message=args.commit_message.format(new_version=new_version),
-            tag_name=args.tag_name.format(new_version=new_version),
-            should_tag=not args.no_tag,
+        with instrumentation.measure("preflight"):
+            preflight_git_operations(
+                version_changes, tag_name=tag_name, should_tag=not args.no_tag
+            )
+    release_notes = None
+    if args.changelog:
+        with instrumentation.measure("changelog"):
+            release_notes = plan_release_notes(args, new_version, version_cache)
+    if args.save_plan:
+        import bumpanything.plan as plan
+
+        plan.save_plan(args.save_plan, version_changes)
+        result_writer.write_message("Saved plan to {}".format(args.save_plan))
+        return
+    if args.dry_run and args.output == "jsonl":
+        # Report the planned changes as if they had been made
+        write_changes(result_writer, version_changes, dependency_changes)
+        return
+    if args.dry_run:
+        import bumpanything.plan as plan
+
+        for file_path, splices in get_file_splices(version_changes, dependency_changes):
+            result_writer.write(plan.get_file_diff(file_path, splices))
+        if release_notes:
+            import bumpanything.changelog as changelog
+
+            result_writer.write(
+                changelog.get_release_notes_diff(
+                    changelog.CHANGELOG_FILE_NAME, release_notes
+                )
+            )
+        return
+    with instrumentation.measure("apply"):
+        file_results = apply_version_changes(
+            version_changes,
+            version_cache=version_cache,
+            dependency_changes=dependency_changes,
+            release_notes=release_notes,
+        )
+        file_results = write_changes(result_writer, file_results, dependency_changes)
+    other_file_paths = [
+        dependency_change.file_path for dependency_change in dependency_changes
+    ]
+    if release_notes:
+        import bumpanything.changelog as changelog
+
+        result_writer.write_release_notes(
+            changelog.CHANGELOG_FILE_NAME, new_version, release_notes
         )
+        other_file_paths.append(changelog.CHANGELOG_FILE_NAME)
+    if not args.no_commit:
+        from contextlib import redirect_stdout
+
+        result_writer.flush()
+        message_stream = result_writer.get_message_stream()
+        with instrumentation.measure("git"), redirect_stdout(message_stream):
+            is_git_success = handle_git_operations(
+                file_results=file_results,
+                commit_message=commit_message,
+                tag_name=tag_name,
+                should_tag=not args.no_tag,
+                git_backend=get_git_backend(args.git_backend),
+                other_file_paths=other_file_paths,
+            )
+        if not is_git_success:
+            sys.exit(1)
+    return file_results
 
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import os.path
+from collections import OrderedDict
+
+import bumpanything.instrumentation as instrumentation
+
+# The name of the file (in the Git directory of the repository, so that it is
+# never part of the work tree) which caches the location of the version within
+# each previously-scanned file (and the metadata parsed from each commit
+# included in a changelog)
+CACHE_FILE_NAME = "bump-anything-cache"
+
+# The directory (within the user's cache directory) which holds the caches of
+# projects outside of any repository, each named after a hash of the path of
+# the project
+USER_CACHE_DIR_NAME = "bump-anything"
+
+# The version of the cache file format; caches in any other format are ignored
+CACHE_FORMAT_VERSION = 1
+
+# The maximum number of files whose version locations are cached; the least
+# recently used entries are evicted first
+MAX_CACHE_ENTRIES = 10000
+
+# The maximum number of commits whose parsed metadata is cached; as with files,
+# the least recently used commits are evicted first
+MAX_CACHE_COMMITS = 10000
+
+# Caches which have already been loaded, keyed by path, along with the
+# signature of the cache file when it was last read or written; this is only
+# enabled (by setting it to a dictionary) in long-running processes, such as
+# the daemon, so that an unchanged cache file need not be parsed again
+loaded_caches = None
+
+
+# Return the parts of the given stat result which change whenever the file is
+# modified or replaced
+def get_file_signature(file_stat):
+    return (file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino)
+
+
+# Return the path to the cache of the project at the given path (outside of
+# any repository) within the user's cache directory
+def get_user_cache_path(project_path):
+    import hashlib
+
+    cache_home_path = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(
+        cache_home_path,
+        USER_CACHE_DIR_NAME,
+        hashlib.sha1(os.path.abspath(project_path).encode()).hexdigest(),
+    )
+
+
+# Return the cached version location for the given open binary file if the
+# given cache entry still describes it (i.e. the file has the same signature
+# and the cached version is still at the cached offset); otherwise, return
+# None
+def verify_cached_location(file, file_signature, cache_entry):
+    mtime_ns, size, ino, version_start, version_end, current_version = cache_entry
+    if (mtime_ns, size, ino) != tuple(file_signature):
+        return None
+    file.seek(version_start)
+    instrumentation.count_bytes_read(version_end - version_start)
+    if file.read(version_end - version_start) != current_version.encode():
+        return None
+    return (version_start, version_end, current_version)
+
+
+# A persistent, size-bounded cache of where the version is within each file,
+# keyed by the file path relative to the root directory of the project (by
+# default, the directory containing the cache); the
+# metadata parsed from each commit (see changelog.py) is cached alongside,
+# keyed by the commit ID, since a commit can never change
+class VersionCache(object):
+    def __init__(
+        self,
+        cache_path,
+        root_dir_path=None,
+        max_entries=MAX_CACHE_ENTRIES,
+        max_commits=MAX_CACHE_COMMITS,
+    ):
+        self.cache_path = os.path.abspath(cache_path)
+        self.cache_dir_path = os.path.dirname(self.cache_path)
+        self.root_dir_path = os.path.abspath(root_dir_path or self.cache_dir_path)
+        self.max_entries = max_entries
+        self.max_commits = max_commits
+        self.entries = OrderedDict()
+        self.commits = OrderedDict()
+        self.is_dirty = False
+
+    # Read the cache file at the given path (if it exists)
+    @classmethod
+    def load(cls, cache_path, root_dir_path=None, max_entries=MAX_CACHE_ENTRIES):
+        if loaded_caches is not None:
+            version_cache, cache_file_signature = loaded_caches.get(
+                os.path.abspath(cache_path), (None, None)
+            )
+            if version_cache and cache_file_signature == version_cache.get_signature():
+                return version_cache
+        version_cache = cls(
+            cache_path, root_dir_path=root_dir_path, max_entries=max_entries
+        )
+        try:
+            with open(cache_path, "r") as cache_file:
+                cache_data = json.load(cache_file)
+            if cache_data.get("format") == CACHE_FORMAT_VERSION:
+                version_cache.entries.update(cache_data["entries"])
+                version_cache.commits.update(cache_data.get("commits", {}))
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        version_cache.remember()
+        return version_cache
+
+    # Return the signature of the cache file (or None if it does not exist)
+    def get_signature(self):
+        try:
+            return get_file_signature(os.stat(self.cache_path))
+        except OSError:
+            return None
+
+    # Keep this cache in memory (if enabled) for as long as the cache file is
+    # unchanged
+    def remember(self):
+        if loaded_caches is not None:
+            loaded_caches[self.cache_path] = (self, self.get_signature())
+
+    def get_key(self, file_path):
+        return os.path.relpath(os.path.abspath(file_path), self.root_dir_path)
+
+    # Return the cache entry for the given file (or None if there is none)
+    def get(self, file_path):
+        key = self.get_key(file_path)
+        cache_entry = self.entries.get(key)
+        if cache_entry is not None:
+            self.entries.move_to_end(key)
+        return cache_entry
+
+    # Record the location of the version within the given file
+    def set(self, file_path, file_signature, version_location):
+        key = self.get_key(file_path)
+        cache_entry = [*file_signature, *version_location]
+        if self.entries.get(key) != cache_entry:
+            self.entries[key] = cache_entry
+            self.is_dirty = True
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.is_dirty = True
+
+    # Return the cached metadata of the commit with the given ID (or None if
+    # there is none)
+    def get_commit(self, commit_id):
+        commit_metadata = self.commits.get(commit_id)
+        if commit_metadata is not None:
+            self.commits.move_to_end(commit_id)
+        return commit_metadata
+
+    # Record the metadata parsed from the commit with the given ID
+    def set_commit(self, commit_id, commit_metadata):
+        if self.commits.get(commit_id) != commit_metadata:
+            self.commits[commit_id] = commit_metadata
+            self.is_dirty = True
+        self.commits.move_to_end(commit_id)
+        while len(self.commits) > self.max_commits:
+            self.commits.popitem(last=False)
+            self.is_dirty = True
+
+    # Write the cache back to disk (atomically) if it has changed
+    def save(self):
+        if not self.is_dirty:
+            return
+        import tempfile
+
+        try:
+            os.makedirs(self.cache_dir_path, exist_ok=True)
+            temp_fd, temp_cache_path = tempfile.mkstemp(
+                dir=self.cache_dir_path, prefix=CACHE_FILE_NAME, suffix=".tmp"
+            )
+            with os.fdopen(temp_fd, "w") as temp_cache_file:
+                json.dump(
+                    {
+                        "format": CACHE_FORMAT_VERSION,
+                        "entries": self.entries,
+                        "commits": self.commits,
+                    },
+                    temp_cache_file,
+                    separators=(",", ":"),
+                )
+            os.replace(temp_cache_path, self.cache_path)
+            self.is_dirty = False
+            self.remember()
+        except OSError:
+            # The cache is purely an optimization, so failing to write it
+            # (e.g. in a read-only checkout) is not an error
+            pass
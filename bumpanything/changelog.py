@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+import os
+import os.path
+import re
+
+import bumpanything.git as git
+from bumpanything.release_commit import ReleaseCommit
+
+# The name of the file (in the current directory) to which the release notes
+# for each new version are prepended
+CHANGELOG_FILE_NAME = "CHANGELOG.md"
+
+# The headings under which commits are grouped, keyed by their Conventional
+# Commits type (in the order in which the groups appear)
+COMMIT_TYPE_HEADINGS = {
+    "feat": "Features",
+    "fix": "Bug Fixes",
+    "perf": "Performance Improvements",
+    "revert": "Reverts",
+    "refactor": "Code Refactoring",
+    "docs": "Documentation",
+    "style": "Styles",
+    "test": "Tests",
+    "build": "Build System",
+    "ci": "Continuous Integration",
+    "chore": "Chores",
+}
+# The heading for breaking changes (which are listed first, whatever their
+# type), and for commits of any other type (or none), which are listed last
+BREAKING_CHANGES_HEADING = "BREAKING CHANGES"
+OTHER_CHANGES_HEADING = "Other Changes"
+
+# The first line of a commit message which follows the Conventional Commits
+# format, e.g. "feat(parser)!: support arrays"
+CONVENTIONAL_COMMIT_REGEX = re.compile(
+    r"^(?P<type>[A-Za-z]+)(?:\((?P<scope>[^()\r\n]+)\))?(?P<breaking>!)?: +"
+    r"(?P<description>\S.*)$"
+)
+# The footer which marks a commit as a breaking change, whatever its type
+BREAKING_CHANGE_FOOTER_REGEX = re.compile(r"^BREAKING[ -]CHANGE: ", re.MULTILINE)
+
+# The number of characters of each commit ID shown in the release notes
+SHORT_COMMIT_ID_LENGTH = 7
+
+
+# Parse the given commit message, returning a list of [commit_type, scope,
+# description, is_breaking] (the form in which it is cached)
+def parse_commit_message(message):
+    subject = message.strip().split("\n", 1)[0].strip()
+    commit_match = CONVENTIONAL_COMMIT_REGEX.match(subject)
+    if not commit_match:
+        return [None, None, subject, False]
+    return [
+        commit_match.group("type").lower(),
+        commit_match.group("scope"),
+        commit_match.group("description").strip(),
+        bool(
+            commit_match.group("breaking")
+            or BREAKING_CHANGE_FOOTER_REGEX.search(message)
+        ),
+    ]
+
+
+# Yield a ReleaseCommit for each (non-merge) commit in the given revision range
+# which touches the current directory, newest first, as the log is streamed
+# from Git (see git.iterate_commit_messages()); if a version cache is given,
+# each commit is only parsed if it has not been before (by any release)
+def iterate_release_commits(revision_range, version_cache=None):
+    for commit_id, message in git.iterate_commit_messages(revision_range, os.curdir):
+        commit_metadata = version_cache.get_commit(commit_id) if version_cache else None
+        if commit_metadata is None:
+            commit_metadata = parse_commit_message(message)
+            if version_cache:
+                version_cache.set_commit(commit_id, commit_metadata)
+        yield ReleaseCommit(commit_id, *commit_metadata)
+
+
+# Return the heading of the group in the release notes which the given commit
+# belongs to
+def get_commit_heading(release_commit):
+    if release_commit.is_breaking:
+        return BREAKING_CHANGES_HEADING
+    return COMMIT_TYPE_HEADINGS.get(release_commit.commit_type, OTHER_CHANGES_HEADING)
+
+
+# Return the line of the release notes listing the given commit
+def format_commit(release_commit):
+    scope_prefix = (
+        "**{}:** ".format(release_commit.scope) if release_commit.scope else ""
+    )
+    return "- {}{} ({})\n".format(
+        scope_prefix,
+        release_commit.description,
+        release_commit.commit_id[:SHORT_COMMIT_ID_LENGTH],
+    )
+
+
+# Return the release notes (as Markdown) for the given new version, released
+# on the given date, listing the given commits grouped by their type
+def format_release_notes(new_version, release_commits, release_date):
+    commit_groups = {
+        heading: []
+        for heading in (
+            BREAKING_CHANGES_HEADING,
+            *COMMIT_TYPE_HEADINGS.values(),
+            OTHER_CHANGES_HEADING,
+        )
+    }
+    for release_commit in release_commits:
+        commit_groups[get_commit_heading(release_commit)].append(release_commit)
+    release_notes = ["## {} ({})\n\n".format(new_version, release_date)]
+    for heading, grouped_commits in commit_groups.items():
+        if grouped_commits:
+            release_notes.append("### {}\n\n".format(heading))
+            release_notes.extend(map(format_commit, grouped_commits))
+            release_notes.append("\n")
+    return "".join(release_notes)
+
+
+# Return the offset within the changelog at the given path at which the notes
+# for a new release belong: after its title (and the blank lines which follow
+# it), if it begins with one, or else at the very start; returns None if the
+# changelog does not exist yet
+def get_release_notes_start(changelog_path):
+    try:
+        changelog_file = open(changelog_path, "rb")
+    except FileNotFoundError:
+        return None
+    with changelog_file:
+        first_line = changelog_file.readline()
+        if not first_line.startswith(b"# "):
+            return 0
+        release_notes_start = len(first_line)
+        for line in changelog_file:
+            if line.strip():
+                break
+            release_notes_start += len(line)
+        return release_notes_start
+
+
+# Stage the addition of the given release notes to the changelog at the given
+# path in the given transaction, creating the changelog if it does not exist
+def stage_release_notes(bump_transaction, changelog_path, release_notes):
+    release_notes_start = get_release_notes_start(changelog_path)
+    if release_notes_start is None:
+        bump_transaction.write_new_file(changelog_path, release_notes)
+        return
+    bump_transaction.write_splices(
+        changelog_path,
+        [(release_notes_start, release_notes_start, "", release_notes)],
+    )
+
+
+# Render the addition of the given release notes to the changelog at the given
+# path as a unified diff
+def get_release_notes_diff(changelog_path, release_notes):
+    release_notes_start = get_release_notes_start(changelog_path)
+    if release_notes_start is None:
+        line_number = 0
+        source_path = os.devnull
+    else:
+        with open(changelog_path, "rb") as changelog_file:
+            line_number = changelog_file.read(release_notes_start).count(b"\n")
+        source_path = "a/{}".format(changelog_path)
+    added_lines = release_notes.splitlines()
+    return "".join(
+        (
+            "--- {}\n".format(source_path),
+            "+++ b/{}\n".format(changelog_path),
+            "@@ -{},0 +{},{} @@\n".format(
+                line_number, line_number + 1, len(added_lines)
+            ),
+            *("+{}\n".format(line) for line in added_lines),
+        )
+    )
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import os.path
+import socket
+import sys
+
+# The environment variable which, when set to the path of a daemon's socket,
+# makes the `bump` command forward its arguments to that daemon rather than
+# running them itself
+SOCKET_ENV_VAR_NAME = "BUMP_ANYTHING_SOCKET"
+
+# The size of the chunks in which responses are read from the daemon
+RESPONSE_CHUNK_SIZE = 64 * 1024
+
+
+# Return the path of the socket to serve on when none is given explicitly
+def get_default_socket_path():
+    if os.environ.get(SOCKET_ENV_VAR_NAME):
+        return os.environ[SOCKET_ENV_VAR_NAME]
+    import tempfile
+
+    return os.path.join(
+        os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+        "bump-anything-{}.sock".format(os.getuid()),
+    )
+
+
+# Send a single message (a JSON-serializable dictionary) over the given socket
+def send_message(connection, message):
+    connection.sendall(json.dumps(message).encode() + b"\n")
+
+
+# A text stream which forwards everything written to it to the client as it
+# is written, so that output arrives in the same order as it would locally
+class ForwardingStream(object):
+    def __init__(self, connection, stream_name):
+        self.connection = connection
+        self.stream_name = stream_name
+
+    def write(self, data):
+        if data:
+            send_message(self.connection, {"stream": self.stream_name, "data": data})
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+# Return the exit status the interpreter would use for the given SystemExit
+# code, printing it first if it is a message (as the interpreter would)
+def get_exit_status(exit_code):
+    if exit_code is None:
+        return 0
+    if isinstance(exit_code, int):
+        return exit_code
+    print(exit_code, file=sys.stderr)
+    return 1
+
+
+# Run the bump command for a single request (a dictionary of the client's
+# argv, working directory and environment), streaming its output back over
+# the given connection; the process-wide state (the working directory, the
+# environment and the standard streams) is swapped in for the duration of the
+# run, which is why requests must be handled one at a time
+def handle_request(connection, request):
+    import bumpanything.__main__ as bump
+
+    original_dir_path = os.getcwd()
+    original_environ = dict(os.environ)
+    original_argv = sys.argv
+    original_stdout = sys.stdout
+    original_stderr = sys.stderr
+    sys.stdout = ForwardingStream(connection, "stdout")
+    sys.stderr = ForwardingStream(connection, "stderr")
+    try:
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        # The run must not try to forward itself back to this daemon
+        os.environ.pop(SOCKET_ENV_VAR_NAME, None)
+        sys.argv = ["bump", *request["argv"]]
+        try:
+            bump.main()
+            exit_status = 0
+        except SystemExit as error:
+            exit_status = get_exit_status(error.code)
+        except Exception:
+            import traceback
+
+            traceback.print_exc()
+            exit_status = 1
+    finally:
+        sys.stdout = original_stdout
+        sys.stderr = original_stderr
+        sys.argv = original_argv
+        os.environ.clear()
+        os.environ.update(original_environ)
+        os.chdir(original_dir_path)
+    send_message(connection, {"exit": exit_status})
+
+
+# Read a single request (one line of JSON) from the given connection
+def read_request(connection):
+    request_data = b""
+    while not request_data.endswith(b"\n"):
+        chunk = connection.recv(RESPONSE_CHUNK_SIZE)
+        if not chunk:
+            return None
+        request_data += chunk
+    return json.loads(request_data)
+
+
+def stop_serving(signal_number, frame):
+    raise KeyboardInterrupt
+
+
+# Listen for requests on the Unix socket at the given path until interrupted,
+# handling them one at a time; everything imported, compiled or discovered by
+# one request stays warm for the next
+def serve(socket_path):
+    import bumpanything.cache as cache
+    import bumpanything.patterns as patterns
+    import bumpanything.workspace as workspace
+
+    # Keep the results of manifest discovery, the loaded version location
+    # caches and the loaded pattern configs between requests, revalidating
+    # them by stat before each reuse
+    workspace.discovery_cache = {}
+    cache.loaded_caches = {}
+    patterns.loaded_configs = {}
+    if os.path.exists(socket_path):
+        if is_daemon_listening(socket_path):
+            sys.exit(
+                "Aborting because a daemon is already listening on {}".format(
+                    socket_path
+                )
+            )
+        # The socket was left behind by a daemon which did not exit cleanly
+        os.remove(socket_path)
+    import signal
+
+    # Shut down cleanly (removing the socket) when terminated, as when
+    # interrupted
+    signal.signal(signal.SIGTERM, stop_serving)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(socket_path)
+        os.chmod(socket_path, 0o600)
+        server.listen()
+        print("Listening on {}".format(socket_path), flush=True)
+        while True:
+            connection, _ = server.accept()
+            with connection:
+                try:
+                    request = read_request(connection)
+                    if request:
+                        handle_request(connection, request)
+                except (OSError, ValueError):
+                    # The client went away (or sent garbage); there is
+                    # nothing to report back to
+                    pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+# Return True if a daemon is accepting connections on the given socket
+def is_daemon_listening(socket_path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        client.close()
+
+
+# Forward the given CLI arguments to the daemon listening on the given socket,
+# writing its output to this process's stdout and stderr as it arrives;
+# returns the exit status of the run, or None if no daemon could be reached
+# (in which case the arguments should be run locally instead)
+def forward(socket_path, argv):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return None
+        send_message(
+            client, {"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+        )
+        streams = {"stdout": sys.stdout, "stderr": sys.stderr}
+        response_data = b""
+        while True:
+            chunk = client.recv(RESPONSE_CHUNK_SIZE)
+            if not chunk:
+                print("Lost connection to the bump daemon", file=sys.stderr)
+                return 1
+            response_data += chunk
+            *messages, response_data = response_data.split(b"\n")
+            for message in map(json.loads, messages):
+                if "exit" in message:
+                    return message["exit"]
+                streams[message["stream"]].write(message["data"])
+                streams[message["stream"]].flush()
+    finally:
+        client.close()
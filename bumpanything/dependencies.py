@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+
+import os.path
+import re
+
+import bumpanything.locators as locators
+
+# Each parser below reads the data of a manifest, returning a tuple of
+# (package_name, dependencies), where package_name is None if the manifest
+# does not name a package, and dependencies is a list of (dependency_name,
+# range_start, range_end) tuples giving the span of each version range the
+# manifest declares for its dependencies; spans are byte offsets into the
+# data, so that ranges can be rewritten in place
+
+# The members of a package.json which map dependency names to version ranges
+NPM_DEPENDENCY_KEYS = frozenset(
+    (
+        b"dependencies",
+        b"devDependencies",
+        b"peerDependencies",
+        b"optionalDependencies",
+    )
+)
+
+# The tables of a Cargo.toml which map crate names to version requirements
+CARGO_DEPENDENCY_TABLE_NAMES = frozenset(
+    ("dependencies", "dev-dependencies", "build-dependencies")
+)
+
+# A key/value pair within a TOML table (dotted keys are not supported)
+TOML_KEY_VALUE_REGEX = re.compile(
+    rb"^[ \t]*(?:\"([^\"\r\n]*)\"|'([^'\r\n]*)'|([A-Za-z0-9_-]+))[ \t]*=[ \t]*",
+    flags=re.MULTILINE,
+)
+# A TOML string (on a single line), or the end of the array containing it, or
+# a comment
+TOML_TOKEN_REGEX = re.compile(
+    rb"\"((?:[^\"\\\r\n]|\\.)*)\"|'([^'\r\n]*)'|(\])|#[^\r\n]*"
+)
+# A key within a TOML inline table
+TOML_INLINE_KEY_REGEX = re.compile(rb"[{,][ \t]*\"?([A-Za-z0-9_-]+)\"?[ \t]*=[ \t]*")
+
+# The name of a Python package at the start of a PEP 508 requirement, followed
+# by its (optional) extras and version specifier
+PEP_508_REGEX = re.compile(
+    rb"[ \t]*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)[ \t]*(?:\[[^\]]*\])?([^;@]*)"
+)
+
+# A version range which can be rewritten: a single (optionally partial)
+# version, optionally preceded by one of the operators which mean "this
+# version or newer" (such as ^ or ~=); compound ranges, wildcards, and upper
+# bounds are left alone
+REWRITABLE_RANGE_REGEX = re.compile(
+    rb"\s*(?:workspace:)?(?:\^|~=|~>|~|==|>=|=)?\s*v?"
+    rb"(?P<version>\d+(?:\.\d+){0,2}(?:-[0-9A-Za-z.-]+)?(?:\+[0-9A-Za-z.-]+)?)\s*"
+)
+
+
+# Yield a tuple of (member_name, value_start, value_end) for each member of the
+# JSON object whose members begin at the given position, stopping at the end
+# of the object (or at anything malformed)
+def iterate_json_members(data, pos):
+    while True:
+        member_name_match = locators.JSON_MEMBER_NAME_REGEX.match(data, pos)
+        if not member_name_match:
+            return
+        value_start = member_name_match.end()
+        value_end = locators.skip_json_value(data, value_start)
+        if value_end is None:
+            return
+        yield (member_name_match.group(1), value_start, value_end)
+        separator_match = locators.JSON_MEMBER_SEPARATOR_REGEX.match(data, value_end)
+        if not separator_match:
+            return
+        pos = separator_match.end()
+
+
+# Return True if the JSON value between the given positions is a string
+def is_json_string(data, value_start, value_end):
+    return data[value_start : value_start + 1] == b'"' and value_end - value_start > 1
+
+
+def parse_package_json(data):
+    object_start_match = locators.JSON_OBJECT_START_REGEX.match(data)
+    if not object_start_match:
+        return (None, [])
+    package_name = None
+    dependencies = []
+    for member_name, value_start, value_end in iterate_json_members(
+        data, object_start_match.end()
+    ):
+        if member_name == b"name" and is_json_string(data, value_start, value_end):
+            package_name = data[value_start + 1 : value_end - 1].decode()
+        elif member_name in NPM_DEPENDENCY_KEYS and data[value_start] == ord("{"):
+            dependencies.extend(
+                (dependency_name.decode(), range_start + 1, range_end - 1)
+                for dependency_name, range_start, range_end in iterate_json_members(
+                    data, value_start + 1
+                )
+                if is_json_string(data, range_start, range_end)
+            )
+    return (package_name, dependencies)
+
+
+# Yield a tuple of (table_name, body_start, body_end) for each table of the
+# given TOML data (starting with the root table, whose name is empty); the
+# names of arrays of tables are None, since they never declare dependencies
+def iterate_toml_tables(data):
+    table_name = ""
+    body_start = 0
+    for table_header_match in locators.TOML_TABLE_HEADER_REGEX.finditer(data):
+        yield (table_name, body_start, table_header_match.start())
+        if table_header_match.group(1) == b"[[":
+            table_name = None
+        else:
+            table_name = re.sub(
+                rb"\s*\.\s*", b".", table_header_match.group(2).replace(b'"', b"")
+            ).decode(errors="replace")
+        body_start = table_header_match.end()
+    yield (table_name, body_start, len(data))
+
+
+# Yield a tuple of (key, value_start) for each key/value pair in the body of a
+# TOML table
+def iterate_toml_keys(data, body_start, body_end):
+    for key_value_match in TOML_KEY_VALUE_REGEX.finditer(data, body_start, body_end):
+        key = next(key for key in key_value_match.groups() if key is not None)
+        yield (key.decode(errors="replace"), key_value_match.end())
+
+
+# Return the span of the contents of the TOML string starting at the given
+# position (or None if there is no string there)
+def get_toml_string_span(data, pos):
+    token_match = TOML_TOKEN_REGEX.match(data, pos)
+    if not token_match or token_match.lastindex not in (1, 2):
+        return None
+    return token_match.span(token_match.lastindex)
+
+
+# Yield the span of the contents of each string within the TOML array
+# starting at the given position
+def iterate_toml_strings(data, pos):
+    for token_match in TOML_TOKEN_REGEX.finditer(data, pos + 1):
+        if token_match.lastindex == 3:
+            return
+        if token_match.lastindex in (1, 2):
+            yield token_match.span(token_match.lastindex)
+
+
+# Return a dictionary of the string values of the given keys within the TOML
+# inline table starting at the given position, mapping each key to the span
+# of its value's contents
+def get_toml_inline_table_spans(data, pos, keys):
+    table_end = data.find(b"}", pos)
+    line_end = data.find(b"\n", pos)
+    if table_end == -1 or (line_end != -1 and line_end < table_end):
+        return {}
+    value_spans = {}
+    for inline_key_match in TOML_INLINE_KEY_REGEX.finditer(data, pos, table_end):
+        key = inline_key_match.group(1).decode()
+        value_span = get_toml_string_span(data, inline_key_match.end())
+        if key in keys and value_span:
+            value_spans[key] = value_span
+    return value_spans
+
+
+# Return a (dependency_name, range_start, range_end) tuple for the dependency
+# declared by the TOML value at the given position, which is either a version
+# string or an inline table with a version key (and, for renamed Cargo
+# dependencies, a package key)
+def get_toml_dependency(data, dependency_name, value_start):
+    range_span = get_toml_string_span(data, value_start)
+    if range_span:
+        return (dependency_name, *range_span)
+    if data[value_start : value_start + 1] != b"{":
+        return None
+    value_spans = get_toml_inline_table_spans(data, value_start, ("version", "package"))
+    if "version" not in value_spans:
+        return None
+    if "package" in value_spans:
+        package_start, package_end = value_spans["package"]
+        dependency_name = data[package_start:package_end].decode()
+    return (dependency_name, *value_spans["version"])
+
+
+# Return a (dependency_name, range_start, range_end) tuple for the PEP 508
+# requirement whose contents span the given positions
+def get_pep_508_dependency(data, requirement_start, requirement_end):
+    requirement_match = PEP_508_REGEX.match(data, requirement_start, requirement_end)
+    if not requirement_match:
+        return None
+    return (requirement_match.group(1).decode(), *requirement_match.span(2))
+
+
+def parse_pyproject_toml(data):
+    package_names = {}
+    dependencies = []
+    for table_name, body_start, body_end in iterate_toml_tables(data):
+        for key, value_start in iterate_toml_keys(data, body_start, body_end):
+            if table_name in ("project", "tool.poetry") and key == "name":
+                name_span = get_toml_string_span(data, value_start)
+                if name_span:
+                    package_names[table_name] = data[slice(*name_span)].decode()
+            elif (
+                (table_name == "project" and key == "dependencies")
+                or table_name == "project.optional-dependencies"
+                or table_name == "dependency-groups"
+            ):
+                requirements = (
+                    get_pep_508_dependency(data, *requirement_span)
+                    for requirement_span in iterate_toml_strings(data, value_start)
+                )
+                dependencies.extend(filter(None, requirements))
+            elif table_name and (
+                table_name
+                in ("tool.poetry.dependencies", "tool.poetry.dev-dependencies")
+                or (
+                    table_name.startswith("tool.poetry.group.")
+                    and table_name.endswith(".dependencies")
+                )
+            ):
+                dependency = get_toml_dependency(data, key, value_start)
+                if dependency:
+                    dependencies.append(dependency)
+    package_name = package_names.get("project", package_names.get("tool.poetry"))
+    return (package_name, dependencies)
+
+
+# Return True if the Cargo.toml table with the given name maps dependency names
+# to requirements (e.g. [dependencies], [workspace.dependencies] or
+# [target.'cfg(unix)'.dev-dependencies])
+def is_cargo_dependency_table(table_name):
+    table_name_parts = table_name.split(".")
+    return table_name_parts[-1] in CARGO_DEPENDENCY_TABLE_NAMES and (
+        len(table_name_parts) == 1 or table_name_parts[0] in ("target", "workspace")
+    )
+
+
+def parse_cargo_toml(data):
+    package_name = None
+    dependencies = []
+    for table_name, body_start, body_end in iterate_toml_tables(data):
+        if table_name is None:
+            continue
+        if table_name == "package":
+            for key, value_start in iterate_toml_keys(data, body_start, body_end):
+                name_span = get_toml_string_span(data, value_start)
+                if key == "name" and name_span:
+                    package_name = data[slice(*name_span)].decode()
+        elif is_cargo_dependency_table(table_name):
+            for key, value_start in iterate_toml_keys(data, body_start, body_end):
+                dependency = get_toml_dependency(data, key, value_start)
+                if dependency:
+                    dependencies.append(dependency)
+        elif is_cargo_dependency_table(table_name.rpartition(".")[0]):
+            # A dependency declared as a table of its own, like
+            # [dependencies.foo]
+            dependency_name = table_name.rpartition(".")[2]
+            value_spans = {}
+            for key, value_start in iterate_toml_keys(data, body_start, body_end):
+                value_span = get_toml_string_span(data, value_start)
+                if key in ("version", "package") and value_span:
+                    value_spans[key] = value_span
+            if "package" in value_spans:
+                dependency_name = data[slice(*value_spans["package"])].decode()
+            if "version" in value_spans:
+                dependencies.append((dependency_name, *value_spans["version"]))
+    return (package_name, dependencies)
+
+
+# The parser for each type of manifest whose dependencies can be propagated,
+# along with the ecosystem its package names belong to
+MANIFEST_PARSERS = {
+    "package.json": ("npm", parse_package_json),
+    "pyproject.toml": ("python", parse_pyproject_toml),
+    "Cargo.toml": ("cargo", parse_cargo_toml),
+}
+
+
+# Return the key identifying the package with the given name within the given
+# ecosystem; Python package names are compared in their normalized form
+def get_package_key(ecosystem, package_name):
+    if ecosystem == "python":
+        package_name = re.sub(r"[-_.]+", "-", package_name).lower()
+    return (ecosystem, package_name)
+
+
+# Read the manifest at the given path, returning a tuple of (package_key,
+# dependencies), where package_key is None if the manifest does not name a
+# package, and dependencies is a list of (package_key, version_start,
+# version_end, current_version) tuples for each rewritable dependency range;
+# returns None if the manifest is of an unsupported type or cannot be read
+def read_manifest(file_path):
+    if os.path.basename(file_path) not in MANIFEST_PARSERS:
+        return None
+    ecosystem, parse_manifest = MANIFEST_PARSERS[os.path.basename(file_path)]
+    try:
+        with open(file_path, "rb") as manifest_file:
+            data = manifest_file.read()
+    except OSError:
+        return None
+    try:
+        package_name, dependencies = parse_manifest(data)
+    except UnicodeDecodeError:
+        return None
+    dependency_ranges = []
+    for dependency_name, range_start, range_end in dependencies:
+        range_match = REWRITABLE_RANGE_REGEX.fullmatch(data, range_start, range_end)
+        if range_match:
+            dependency_ranges.append(
+                (
+                    get_package_key(ecosystem, dependency_name),
+                    *range_match.span("version"),
+                    range_match.group("version").decode(),
+                )
+            )
+    return (
+        get_package_key(ecosystem, package_name) if package_name else None,
+        dependency_ranges,
+    )
+
+
+# Return the version to write in place of the given version within a range,
+# keeping the same precision (so a range of ^1.2 becomes ^1.3, not ^1.3.0)
+def get_new_range_version(current_version, new_version):
+    part_count = re.split(r"[-+]", current_version)[0].count(".") + 1
+    if part_count >= 3:
+        return new_version
+    return ".".join(re.split(r"[-+]", new_version)[0].split(".")[:part_count])
+
+
+# Determine how the given manifests should change to depend on the new
+# versions given by the version changes, returning a DependencyChange for each
+# dependency range to rewrite; every manifest is read exactly once to build a
+# reverse-dependency index, so the work done is proportional to the number of
+# manifests and dependencies, no matter how many packages were bumped; the
+# changes are ordered so that each manifest comes after those of its bumped
+# dependencies
+def plan_dependency_changes(manifest_paths, version_changes):
+    from bumpanything.dependency_change import DependencyChange
+
+    manifests = {}
+    for manifest_path in manifest_paths:
+        manifest = read_manifest(manifest_path)
+        if manifest:
+            manifests[os.path.normpath(manifest_path)] = (manifest_path, *manifest)
+    # The bumped files need not be in the workspace themselves
+    for version_change in version_changes:
+        if os.path.normpath(version_change.file_path) not in manifests:
+            manifest = read_manifest(version_change.file_path)
+            if manifest:
+                manifests[os.path.normpath(version_change.file_path)] = (
+                    version_change.file_path,
+                    *manifest,
+                )
+    # Map each package to the ranges with which other manifests depend on it
+    dependents_index = {}
+    for manifest_path, _, dependency_ranges in manifests.values():
+        for package_key, *version_span in dependency_ranges:
+            dependents_index.setdefault(package_key, []).append(
+                (manifest_path, *version_span)
+            )
+    dependency_changes = []
+    # Map each dependent manifest to the bumped manifests it depends on
+    dependency_graph = {}
+    for version_change in version_changes:
+        manifest = manifests.get(os.path.normpath(version_change.file_path))
+        if not manifest or not manifest[1]:
+            continue
+        _, package_name = manifest[1]
+        for (
+            manifest_path,
+            version_start,
+            version_end,
+            current_version,
+        ) in dependents_index.get(manifest[1], []):
+            new_version = get_new_range_version(
+                current_version, version_change.new_version
+            )
+            if new_version == current_version:
+                continue
+            dependency_changes.append(
+                DependencyChange(
+                    file_path=manifest_path,
+                    dependency_name=package_name,
+                    version_start=version_start,
+                    version_end=version_end,
+                    current_version=current_version,
+                    new_version=new_version,
+                )
+            )
+            dependency_graph.setdefault(manifest_path, set()).add(
+                version_change.file_path
+            )
+    import graphlib
+
+    try:
+        manifest_order = {
+            manifest_path: i
+            for i, manifest_path in enumerate(
+                graphlib.TopologicalSorter(dependency_graph).static_order()
+            )
+        }
+    except graphlib.CycleError:
+        # Packages which depend on each other have no such order, but since
+        # every change is applied together, any order is just as correct
+        manifest_order = {}
+    dependency_changes.sort(
+        key=lambda dependency_change: (
+            manifest_order.get(dependency_change.file_path, 0),
+            dependency_change.version_start,
+        )
+    )
+    return dependency_changes
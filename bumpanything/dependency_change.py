@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+
+
+# A planned change to the version range with which a manifest depends on a
+# package bumped in the same run; only the version within the range is
+# replaced, so that its operator (such as ^ or ~=) is kept
+@dataclass
+class DependencyChange(object):
+    file_path: str
+    dependency_name: str
+    version_start: int
+    version_end: int
+    current_version: str
+    new_version: str
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+# The kinds of worker pools which can be used to process files in parallel;
+# threads suit I/O-bound runs (and, on free-threaded builds of CPython, can
+# also run CPU-bound work in parallel), while processes sidestep the GIL for
+# CPU-bound runs on standard builds
+EXECUTOR_TYPES = ("thread", "process")
+
+
+# Call the given (picklable, for process pools) function on every item from
+# the given iterables (as with the built-in map()), using the given number of
+# workers, and yield each result as soon as it (and every result before it) is
+# ready, in the same order as the items themselves; if the consumer stops
+# early, the items which have not yet been started are cancelled
+def iterate_in_order(func, *iterables, jobs=1, executor_type="thread"):
+    item_lists = [list(items) for items in iterables]
+    item_count = min(len(items) for items in item_lists)
+    if jobs <= 1 or item_count <= 1:
+        yield from map(func, *item_lists)
+        return
+    # The concurrent.futures package is relatively slow to import, so it is
+    # only imported when actually needed
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if executor_type == "process":
+        pool_executor_class = ProcessPoolExecutor
+    else:
+        pool_executor_class = ThreadPoolExecutor
+    with pool_executor_class(max_workers=jobs) as executor:
+        # Hand out items in batches to amortize the cost of inter-process
+        # communication (this is ignored by thread pools)
+        chunk_size = max(1, item_count // (jobs * 4))
+        yield from executor.map(func, *item_lists, chunksize=chunk_size)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+import mmap
+import os
+import os.path
+
+import bumpanything.instrumentation as instrumentation
+
+# The number of bytes to read from the start of a file when looking for its
+# version; since the version is almost always declared near the top of a file,
+# the rest of the file only needs to be scanned (via a memory map) if the
+# version is not found within this window
+HEAD_WINDOW_SIZE = 64 * 1024
+
+# The size of the chunks used when streaming a copy of a file
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+# Search the given binary file object with the given version searcher (see
+# version_search.py, though any compiled bytes pattern will do), returning a
+# tuple of (version_start, version_end, current_version), or None if the file
+# contains no version; the file is never read into memory as a whole, nor
+# decoded
+def find_version_in_file(file, version_searcher):
+    head = file.read(HEAD_WINDOW_SIZE)
+    instrumentation.count_bytes_read(len(head))
+    version_match = version_searcher.search(head)
+    # A match is only trustworthy if it ends before the end of the window,
+    # since the version may otherwise continue past it
+    if len(head) < HEAD_WINDOW_SIZE or (
+        version_match and version_match.end() < len(head)
+    ):
+        return get_version_location(version_match)
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as file_map:
+        # The whole file is scanned (though the window is already counted)
+        instrumentation.count_bytes_read(len(file_map) - len(head))
+        return get_version_location(version_searcher.search(file_map))
+
+
+# Search only the region of the given binary file object found by the given
+# locator (see locators.py) with the given version searcher, returning
+# the version location (as with find_version_in_file()), or None if the
+# region could not be found or contains no version
+def find_version_in_region(file, locate_region, version_searcher):
+    if not os.fstat(file.fileno()).st_size:
+        # Empty files cannot be memory-mapped (and have no version anyway)
+        return None
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as file_map:
+        region = locate_region(file_map)
+        if not region:
+            return None
+        instrumentation.count_bytes_read(region[1])
+        return get_version_location(version_searcher.search(file_map, *region))
+
+
+# Convert the given version match (if any) to a tuple of (version_start,
+# version_end, current_version)
+def get_version_location(version_match):
+    if not version_match:
+        return None
+    version_start, version_end = version_match.span("version")
+    return (version_start, version_end, version_match.group("version").decode())
+
+
+# Copy up to the given number of bytes (or all remaining bytes, if the length
+# is None) from one binary file object to another, one chunk at a time
+def copy_file_bytes(src_file, dest_file, length=None):
+    while length is None or length > 0:
+        chunk_size = COPY_CHUNK_SIZE if length is None else min(length, COPY_CHUNK_SIZE)
+        chunk = src_file.read(chunk_size)
+        if not chunk:
+            break
+        dest_file.write(chunk)
+        instrumentation.count_bytes_read(len(chunk))
+        instrumentation.count_bytes_written(len(chunk))
+        if length is not None:
+            length -= len(chunk)
+
+
+# Write a copy of the file at the given path to the given binary file object,
+# replacing the bytes of each of the given splices, which are (start, end,
+# replacement) tuples, with its replacement; raises a ValueError if any two
+# splices overlap, since the result would be garbled
+def write_spliced_file(file_path, dest_file, splices):
+    splices = sorted(splices)
+    for (_, prev_splice_end, _), (splice_start, _, _) in zip(splices, splices[1:]):
+        if splice_start < prev_splice_end:
+            raise ValueError(
+                "overlapping splices at byte {} of {}".format(splice_start, file_path)
+            )
+    with open(file_path, "rb") as src_file:
+        src_pos = 0
+        for splice_start, splice_end, replacement in splices:
+            copy_file_bytes(src_file, dest_file, splice_start - src_pos)
+            dest_file.write(replacement.encode())
+            instrumentation.count_bytes_written(len(replacement.encode()))
+            src_pos = splice_end
+            src_file.seek(src_pos)
+        copy_file_bytes(src_file, dest_file)
+
+
+# Return the splices (see write_spliced_file()) which replace the version
+# between version_start and version_end, and at any other given starts, with
+# the new version
+def get_version_splices(
+    version_start, version_end, new_version, other_version_starts=()
+):
+    return [
+        (splice_start, splice_start + version_end - version_start, new_version)
+        for splice_start in (version_start, *other_version_starts)
+    ]
+
+
+# Write the new version to the file at the given path, in place of the bytes
+# between version_start and version_end (and at any other given starts); if
+# the new version is the same length as the old one, only those bytes are
+# overwritten; otherwise, a spliced copy of the file is streamed to a sibling
+# file which then replaces the original
+def write_version_to_file(
+    file_path, version_start, version_end, new_version, other_version_starts=()
+):
+    if len(new_version.encode()) == version_end - version_start:
+        with open(file_path, "r+b") as file:
+            for splice_start in (version_start, *other_version_starts):
+                file.seek(splice_start)
+                file.write(new_version.encode())
+                instrumentation.count_bytes_written(len(new_version.encode()))
+        return
+    import tempfile
+
+    file_dir_path, file_name = os.path.split(os.path.abspath(file_path))
+    temp_fd, temp_file_path = tempfile.mkstemp(
+        dir=file_dir_path, prefix=".{}.".format(file_name), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(temp_fd, "wb") as temp_file:
+            write_spliced_file(
+                file_path,
+                temp_file,
+                get_version_splices(
+                    version_start, version_end, new_version, other_version_starts
+                ),
+            )
+        os.chmod(temp_file_path, os.stat(file_path).st_mode & 0o7777)
+        os.replace(temp_file_path, file_path)
+    except BaseException:
+        os.remove(temp_file_path)
+        raise
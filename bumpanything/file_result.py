@@ -3,8 +3,11 @@ from dataclasses import dataclass
 
 # The result of a version bump operation on a particular file; each result
 # represents an individual file along with the details of its version change
+# (results are slotted, since there may be one for each of many thousands of
+# files)
 @dataclass
 class FileResult(object):
+    __slots__ = ("file_path", "current_version", "new_version")
     file_path: str
     current_version: str
     new_version: str
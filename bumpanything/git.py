@@ -4,18 +4,72 @@ import os
 import os.path
 import subprocess
 
+import bumpanything.instrumentation as instrumentation
+from bumpanything.git_repository import SIMPLE_REF_NAME_PATT, Repository
+
+# The repositories found so far, keyed by the directory (and Git environment
+# variables) each was found from, so that the same repository is only looked
+# for once
+discovered_repositories = {}
+
+# The size of the chunks in which the output of `git log` is read
+LOG_CHUNK_SIZE = 64 * 1024
+
+
+# Return the Repository containing the current directory (or None if the
+# current directory is not in a Git repository)
+def get_repository():
+    discovery_key = (
+        os.getcwd(),
+        os.environ.get("GIT_DIR"),
+        os.environ.get("GIT_WORK_TREE"),
+    )
+    repository = discovered_repositories.get(discovery_key)
+    if repository and repository.is_valid():
+        return repository
+    repository = Repository.discover()
+    if repository:
+        discovered_repositories[discovery_key] = repository
+    else:
+        discovered_repositories.pop(discovery_key, None)
+    return repository
+
+
+# Return the path to the root of the work tree of the Git repository
+# containing the current directory (or None if the current directory is not in
+# a Git repository, or the repository is bare)
+def get_repository_root():
+    repository = get_repository()
+    if not repository:
+        return None
+    return repository.work_tree_path
+
 
 def is_in_git_repository():
-    root_dir = os.path.abspath(os.path.sep)
-    current_dir_path = os.getcwd()
-    while current_dir_path != root_dir:
-        if os.path.exists(os.path.join(current_dir_path, ".git")):
-            return True
-        current_dir_path = os.path.dirname(current_dir_path)
-    return False
+    return get_repository_root() is not None
+
+
+# Return the ID of the commit HEAD points to (or None if there is none yet)
+def get_head():
+    repository = get_repository()
+    if not repository:
+        return None
+    try:
+        return repository.get_head()
+    except (OSError, ValueError):
+        pass
+    instrumentation.count_subprocess()
+    result = subprocess.run(
+        ["git", "rev-parse", "--quiet", "--verify", "HEAD"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    return result.stdout.strip() or None
 
 
 def run_git_command(subcommand, *args):
+    instrumentation.count_subprocess()
     try:
         print(
             subprocess.check_output(
@@ -28,6 +82,27 @@ def run_git_command(subcommand, *args):
         return False
 
 
+# Return True if a tag with the given name already exists; the refs are read
+# directly, unless the name is unusual enough to need Git's own validation
+def tag_exists(tag_name):
+    ref_name = f"refs/tags/{tag_name}"
+    repository = get_repository()
+    if repository and SIMPLE_REF_NAME_PATT.match(ref_name):
+        try:
+            return repository.ref_exists(ref_name)
+        except (OSError, ValueError):
+            pass
+    instrumentation.count_subprocess()
+    return (
+        subprocess.run(
+            ["git", "rev-parse", "--quiet", "--verify", f"refs/tags/{tag_name}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ).returncode
+        == 0
+    )
+
+
 def add(file_paths):
     return run_git_command("add", *file_paths)
 
@@ -38,3 +113,144 @@ def commit(message):
 
 def tag(tag_name):
     return run_git_command("tag", tag_name)
+
+
+# Return the most recent tag reachable from HEAD whose name matches the given
+# glob pattern (or None if there is no such tag); the history is read directly
+# where possible (see Repository.find_latest_tag())
+def get_latest_tag(tag_pattern):
+    repository = get_repository()
+    if repository:
+        try:
+            return repository.find_latest_tag(tag_pattern)
+        except (OSError, KeyError, ValueError):
+            pass
+    instrumentation.count_subprocess()
+    result = subprocess.run(
+        ["git", "describe", "--tags", "--abbrev=0", "--match", tag_pattern],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+# Return the paths (relative to the current directory, with forward slashes)
+# of every tracked file within the current directory which differs between
+# the given ref and the working tree, or None if the ref could not be compared
+def get_changed_file_paths(ref):
+    instrumentation.count_subprocess()
+    result = subprocess.run(
+        ["git", "diff", "--name-only", "--relative", "-z", ref, "--"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    if result.returncode != 0:
+        return None
+    return [
+        os.fsdecode(changed_path)
+        for changed_path in result.stdout.split(b"\0")
+        if changed_path
+    ]
+
+
+# Yield a tuple of (file_path, contents) for each of the given files, where the
+# contents (as bytes) are those of the file as staged in the index, or None if
+# the file is not in the index; every blob is read through a single `git
+# cat-file --batch` process, which is fed the paths from a separate thread so
+# that neither side of the pipe can fill up and block the other
+def iterate_staged_file_contents(file_paths):
+    import threading
+
+    repository_root = get_repository_root()
+    file_paths = list(file_paths)
+    object_names = [
+        ":{}".format(
+            os.path.relpath(os.path.abspath(file_path), repository_root).replace(
+                os.sep, "/"
+            )
+        )
+        for file_path in file_paths
+    ]
+    instrumentation.count_subprocess()
+    process = subprocess.Popen(
+        ["git", "cat-file", "--batch", "--buffer"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        cwd=repository_root,
+    )
+
+    def write_object_names():
+        try:
+            for object_name in object_names:
+                # Names cannot span lines, so such a path can never be found
+                process.stdin.write(object_name.replace("\n", "?").encode() + b"\n")
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+    writer_thread = threading.Thread(target=write_object_names, daemon=True)
+    writer_thread.start()
+    try:
+        for file_path in file_paths:
+            header = process.stdout.readline().rstrip(b"\n")
+            # An object which cannot be found is reported by its name (which
+            # may itself contain spaces), followed by "missing"
+            if not header or header.endswith((b" missing", b" ambiguous")):
+                yield (file_path, None)
+                continue
+            _, _, object_size = header.rsplit(b" ", 2)
+            contents = process.stdout.read(int(object_size) + 1)[:-1]
+            instrumentation.count_bytes_read(len(contents))
+            yield (file_path, contents)
+    finally:
+        # If the consumer stopped early, Git simply exits once it can no longer
+        # write its output
+        process.stdout.close()
+        process.wait()
+        writer_thread.join()
+
+
+# Yield a tuple of (commit_id, message) for each non-merge commit in the given
+# revision range (as passed to `git log`) which touches any of the given paths
+# (or any commit at all, if no paths are given), newest first; the log is
+# streamed from a single `git log` process and split into commits as it
+# arrives, so the history is never held in memory as a whole; raises
+# CalledProcessError once the log is exhausted if it could not be read
+def iterate_commit_messages(revision_range, *paths):
+    command = [
+        "git",
+        "log",
+        "-z",
+        "--no-merges",
+        "--format=%H%n%B",
+        revision_range,
+        "--",
+        *paths,
+    ]
+    instrumentation.count_subprocess()
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    try:
+        pending_record = b""
+        for chunk in iter(lambda: process.stdout.read1(LOG_CHUNK_SIZE), b""):
+            instrumentation.count_bytes_read(len(chunk))
+            # Each commit is terminated by a NUL (except for the last one)
+            *records, pending_record = (pending_record + chunk).split(b"\0")
+            for record in records:
+                commit_id, _, message = record.partition(b"\n")
+                yield (commit_id.decode(), message.decode(errors="replace"))
+        if pending_record:
+            commit_id, _, message = pending_record.partition(b"\n")
+            yield (commit_id.decode(), message.decode(errors="replace"))
+    finally:
+        # If the consumer stopped early, Git simply exits once it can no longer
+        # write its output
+        process.stdout.close()
+        return_code = process.wait()
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, command)
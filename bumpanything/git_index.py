@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+import bisect
+import hashlib
+import os
+import struct
+
+# The format of the fixed-size part of an index entry (up to and including
+# the flags)
+INDEX_ENTRY_FORMAT = struct.Struct(">10I20sH")
+
+# Index entry flags
+INDEX_FLAG_EXTENDED = 0x4000
+INDEX_FLAG_STAGE_MASK = 0x3000
+INDEX_NAME_LENGTH_MASK = 0x0FFF
+
+
+# Raised when the index uses a feature which cannot be safely handled here
+# (e.g. a split or sparse index), in which case Git itself should be used
+class UnsupportedIndexError(Exception):
+    pass
+
+
+# A single entry in the index
+class IndexEntry(object):
+    __slots__ = ("stat_fields", "mode", "object_id", "flags", "extended_flags", "path")
+
+    def __init__(self, stat_fields, mode, object_id, flags, extended_flags, path):
+        # (ctime_s, ctime_ns, mtime_s, mtime_ns, dev, ino, uid, gid, size)
+        self.stat_fields = stat_fields
+        self.mode = mode
+        self.object_id = object_id
+        self.flags = flags
+        self.extended_flags = extended_flags
+        self.path = path
+
+    @property
+    def stage(self):
+        return (self.flags & INDEX_FLAG_STAGE_MASK) >> 12
+
+
+# A node of the cache tree (the TREE extension of the index), which records
+# the tree ID of each directory so that unchanged trees need not be rebuilt;
+# an entry count of -1 marks a node as invalid
+class CacheTreeNode(object):
+    __slots__ = ("entry_count", "object_id", "children")
+
+    def __init__(self, entry_count=-1, object_id=None):
+        self.entry_count = entry_count
+        self.object_id = object_id
+        self.children = {}
+
+
+# Parse the given TREE extension data, returning the root CacheTreeNode
+def parse_cache_tree(data):
+    def parse_node(pos):
+        name_end = data.index(b"\0", pos)
+        name = data[pos:name_end]
+        line_end = data.index(b"\n", name_end)
+        entry_count, subtree_count = map(int, data[name_end + 1 : line_end].split())
+        pos = line_end + 1
+        node = CacheTreeNode(entry_count)
+        if entry_count >= 0:
+            node.object_id = data[pos : pos + 20].hex()
+            pos += 20
+        for _ in range(subtree_count):
+            child_name, child, pos = parse_node(pos)
+            node.children[child_name] = child
+        return (name, node, pos)
+
+    return parse_node(0)[1]
+
+
+# Serialize the given cache tree as TREE extension data
+def serialize_cache_tree(root_node):
+    parts = []
+
+    def serialize_node(name, node):
+        parts.append(b"%s\0%d %d\n" % (name, node.entry_count, len(node.children)))
+        if node.entry_count >= 0:
+            parts.append(bytes.fromhex(node.object_id))
+        # Git orders subtrees by name length, then by name
+        for child_name in sorted(node.children, key=lambda n: (len(n), n)):
+            serialize_node(child_name, node.children[child_name])
+
+    serialize_node(b"", root_node)
+    return b"".join(parts)
+
+
+# The index (staging area) of a Git repository, in version 2 or 3 format; the
+# path of every entry is also kept in a list of its own (in the same order),
+# so that entries can be looked up by bisecting it without rebuilding it
+class Index(object):
+    def __init__(self, version=2, entries=None, cache_tree=None):
+        self.version = version
+        self.entries = entries or []
+        self.paths = [entry.path for entry in self.entries]
+        self.cache_tree = cache_tree or CacheTreeNode()
+
+    # Read the index at the given path (or return an empty index if there is
+    # none yet)
+    @classmethod
+    def read(cls, index_path):
+        try:
+            with open(index_path, "rb") as index_file:
+                data = index_file.read()
+        except FileNotFoundError:
+            return cls()
+        if hashlib.sha1(data[:-20]).digest() != data[-20:]:
+            raise UnsupportedIndexError("index checksum mismatch")
+        signature, version, entry_count = struct.unpack_from(">4sII", data, 0)
+        if signature != b"DIRC" or version not in (2, 3):
+            raise UnsupportedIndexError("unsupported index version")
+        pos = 12
+        entries = []
+        for _ in range(entry_count):
+            fields = INDEX_ENTRY_FORMAT.unpack_from(data, pos)
+            flags = fields[11]
+            entry_pos = pos + INDEX_ENTRY_FORMAT.size
+            extended_flags = None
+            if flags & INDEX_FLAG_EXTENDED:
+                (extended_flags,) = struct.unpack_from(">H", data, entry_pos)
+                entry_pos += 2
+            path_end = data.index(b"\0", entry_pos)
+            entries.append(
+                IndexEntry(
+                    stat_fields=fields[:6] + fields[7:10],
+                    mode=fields[6],
+                    object_id=fields[10].hex(),
+                    flags=flags,
+                    extended_flags=extended_flags,
+                    path=data[entry_pos:path_end],
+                )
+            )
+            # Entries are padded with 1-8 NUL bytes to a multiple of 8
+            entry_length = path_end - pos
+            pos += (entry_length + 8) & ~7
+        cache_tree = None
+        while pos < len(data) - 20:
+            extension_signature, extension_size = struct.unpack_from(">4sI", data, pos)
+            extension_data = data[pos + 8 : pos + 8 + extension_size]
+            if extension_signature == b"TREE":
+                cache_tree = parse_cache_tree(extension_data)
+            elif not b"A"[0] <= extension_signature[0] <= b"Z"[0]:
+                # Extensions whose signature does not start with an uppercase
+                # letter must be understood to use the index correctly
+                raise UnsupportedIndexError(
+                    "unsupported index extension {}".format(extension_signature)
+                )
+            # Any other (optional) extensions are caches which Git rebuilds
+            # as needed, so they can be safely dropped
+            pos += 8 + extension_size
+        return cls(version=version, entries=entries, cache_tree=cache_tree)
+
+    # Serialize the index (including its checksum)
+    def serialize(self):
+        parts = [struct.pack(">4sII", b"DIRC", self.version, len(self.entries))]
+        for entry in self.entries:
+            stat_fields = entry.stat_fields
+            entry_data = INDEX_ENTRY_FORMAT.pack(
+                *stat_fields[:6],
+                entry.mode,
+                *stat_fields[6:],
+                bytes.fromhex(entry.object_id),
+                entry.flags,
+            )
+            if entry.extended_flags is not None:
+                entry_data += struct.pack(">H", entry.extended_flags)
+            entry_data += entry.path
+            parts.append(entry_data)
+            parts.append(b"\0" * (8 - len(entry_data) % 8))
+        if self.cache_tree.entry_count >= 0:
+            tree_data = serialize_cache_tree(self.cache_tree)
+            parts.append(struct.pack(">4sI", b"TREE", len(tree_data)))
+            parts.append(tree_data)
+        data = b"".join(parts)
+        return data + hashlib.sha1(data).digest()
+
+    # Write the index to the given path, using Git's lock file protocol
+    def write(self, index_path):
+        lock_path = index_path + ".lock"
+        lock_fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            with os.fdopen(lock_fd, "wb") as lock_file:
+                lock_file.write(self.serialize())
+            os.replace(lock_path, index_path)
+        except BaseException:
+            os.remove(lock_path)
+            raise
+
+    # Add or update the entry for the given path (as bytes, relative to the
+    # root of the work tree) with the given blob ID and file stat
+    def set_entry(self, path, object_id, file_stat):
+        stat_fields = tuple(
+            value & 0xFFFFFFFF
+            for value in (
+                file_stat.st_ctime_ns // 1000000000,
+                file_stat.st_ctime_ns % 1000000000,
+                file_stat.st_mtime_ns // 1000000000,
+                file_stat.st_mtime_ns % 1000000000,
+                file_stat.st_dev,
+                file_stat.st_ino,
+                file_stat.st_uid,
+                file_stat.st_gid,
+                file_stat.st_size,
+            )
+        )
+        mode = 0o100755 if file_stat.st_mode & 0o111 else 0o100644
+        entry_index = bisect.bisect_left(self.paths, path)
+        if entry_index < len(self.paths) and self.paths[entry_index] == path:
+            entry = self.entries[entry_index]
+            if entry.stage or entry.extended_flags or entry.mode >> 12 != 0o10:
+                # Conflicted, intent-to-add, skip-worktree, and non-regular
+                # entries all require Git's own handling
+                raise UnsupportedIndexError("unsupported entry for {}".format(path))
+            entry.stat_fields = stat_fields
+            entry.mode = mode
+            entry.object_id = object_id
+        else:
+            self.paths.insert(entry_index, path)
+            self.entries.insert(
+                entry_index,
+                IndexEntry(
+                    stat_fields=stat_fields,
+                    mode=mode,
+                    object_id=object_id,
+                    flags=min(len(path), INDEX_NAME_LENGTH_MASK),
+                    extended_flags=None,
+                    path=path,
+                ),
+            )
+        self.invalidate_cache_tree(path)
+
+    # Mark every cached tree containing the given path as invalid
+    def invalidate_cache_tree(self, path):
+        node = self.cache_tree
+        node.entry_count = -1
+        for dir_name in path.split(b"/")[:-1]:
+            node = node.children.get(dir_name)
+            if node is None:
+                return
+            node.entry_count = -1
+
+    # Write a tree object for every directory in the index (reusing the IDs
+    # of trees which have not changed), returning the ID of the root tree
+    def write_tree(self, object_store):
+        if any(entry.stage for entry in self.entries):
+            raise UnsupportedIndexError("index contains unmerged entries")
+        paths = self.paths
+
+        def write_subtree(start, end, prefix_length, node):
+            if node.entry_count == end - start and node.object_id:
+                return node.object_id
+            tree_items = []
+            children = {}
+            i = start
+            while i < end:
+                path = paths[i]
+                slash_index = path.find(b"/", prefix_length)
+                if slash_index == -1:
+                    entry = self.entries[i]
+                    tree_items.append(
+                        b"%o %s\0%s"
+                        % (
+                            entry.mode,
+                            path[prefix_length:],
+                            bytes.fromhex(entry.object_id),
+                        )
+                    )
+                    i += 1
+                    continue
+                dir_name = path[prefix_length:slash_index]
+                # All paths within the directory sort before the first path
+                # which shares its prefix but is followed by "0" (the byte
+                # after "/")
+                dir_end = bisect.bisect_left(paths, path[:slash_index] + b"0", i, end)
+                child = node.children.get(dir_name) or CacheTreeNode()
+                child_id = write_subtree(i, dir_end, slash_index + 1, child)
+                children[dir_name] = child
+                tree_items.append(b"40000 %s\0%s" % (dir_name, bytes.fromhex(child_id)))
+                i = dir_end
+            node.children = children
+            node.entry_count = end - start
+            node.object_id = object_store.write_object(b"tree", b"".join(tree_items))
+            return node.object_id
+
+        return write_subtree(0, len(self.entries), 0, self.cache_tree)
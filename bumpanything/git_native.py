@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+import os
+import os.path
+import re
+import stat
+import time
+
+import bumpanything.git as git
+from bumpanything.git_index import Index, UnsupportedIndexError
+from bumpanything.git_objects import ObjectStore
+from bumpanything.git_repository import (
+    SIMPLE_REF_NAME_PATT,
+    Repository,
+    is_config_true,
+)
+
+# The hooks which `git commit` would run; if any of them is installed, Git
+# itself must be used so that they still run
+COMMIT_HOOK_NAMES = (
+    "pre-commit",
+    "prepare-commit-msg",
+    "commit-msg",
+    "post-commit",
+    "post-index-change",
+    "reference-transaction",
+)
+
+# Environment variables which alter how Git behaves in ways this backend does
+# not replicate
+UNSUPPORTED_ENV_VAR_NAMES = (
+    "GIT_DIR",
+    "GIT_WORK_TREE",
+    "GIT_INDEX_FILE",
+    "GIT_OBJECT_DIRECTORY",
+    "GIT_ALTERNATE_OBJECT_DIRECTORIES",
+    "GIT_AUTHOR_DATE",
+    "GIT_COMMITTER_DATE",
+    "GIT_CONFIG_PARAMETERS",
+    "GIT_CONFIG_COUNT",
+)
+
+# The values of core.autocrlf which leave line endings as they are
+AUTOCRLF_DISABLED_VALUES = ("false", "no", "off", "0")
+
+# Files whose presence indicates an operation (e.g. a merge) is in progress
+IN_PROGRESS_FILE_NAMES = (
+    "MERGE_HEAD",
+    "CHERRY_PICK_HEAD",
+    "REVERT_HEAD",
+    "rebase-merge",
+    "rebase-apply",
+)
+
+
+# Clean up a commit or tag message the way `git commit -m` does, by removing
+# trailing whitespace, collapsing consecutive blank lines, and stripping
+# leading and trailing blank lines
+def clean_up_message(message):
+    lines = [line.rstrip() for line in message.splitlines()]
+    cleaned_lines = []
+    for line in lines:
+        if line or (cleaned_lines and cleaned_lines[-1]):
+            cleaned_lines.append(line)
+    while cleaned_lines and not cleaned_lines[-1]:
+        cleaned_lines.pop()
+    return "\n".join(cleaned_lines) + "\n" if cleaned_lines else ""
+
+
+# Return the current time formatted as a Git timestamp (e.g.
+# "1700000000 +0100")
+def get_git_timestamp():
+    now = time.time()
+    utc_offset = time.localtime(now).tm_gmtoff
+    sign = "-" if utc_offset < 0 else "+"
+    utc_offset = abs(utc_offset) // 60
+    return "{} {}{:02d}{:02d}".format(int(now), sign, utc_offset // 60, utc_offset % 60)
+
+
+# A Git backend which commits and tags by writing objects, the index and refs
+# directly, without spawning Git at all; anything unusual (a non-default
+# repository layout, commit hooks, signing, an unsupported index feature, and
+# so on) is delegated to the regular subprocess-based backend instead
+class GitNativeSession(object):
+    def __init__(self, fallback_backend=git):
+        self.fallback_backend = fallback_backend
+        self.repository = Repository.discover()
+        self.object_store = None
+        self.index = None
+        self.commit_id = None
+        self.is_using_fallback = not self.is_supported()
+        if not self.is_using_fallback:
+            self.object_store = ObjectStore(self.repository.get_path("objects"))
+
+    # Return True if committing in the current repository can be handled
+    # without Git
+    def is_supported(self):
+        if not self.repository or not self.repository.work_tree_path:
+            return False
+        # Linked worktrees keep their index and HEAD apart from the objects
+        # and refs they share
+        if self.repository.common_dir_path != self.repository.git_dir_path:
+            return False
+        if any(os.environ.get(name) for name in UNSUPPORTED_ENV_VAR_NAMES):
+            return False
+        if any(
+            os.path.exists(self.repository.get_path(file_name))
+            for file_name in IN_PROGRESS_FILE_NAMES
+        ):
+            return False
+        if os.path.exists(self.repository.get_path("objects", "info", "alternates")):
+            return False
+        config = self.repository.get_config()
+        if any(
+            name.startswith(("include", "extensions.", "gpg."))
+            for name in config.keys()
+        ):
+            return False
+        if config.get("core.repositoryformatversion", "0") != "0":
+            return False
+        if is_config_true(config.get("core.bare", "false")):
+            return False
+        # Blobs are written from the exact contents and executable bit of each
+        # file, whereas Git would convert line endings, or keep the mode
+        # already in the index
+        if config.get("core.autocrlf", "false").lower() not in AUTOCRLF_DISABLED_VALUES:
+            return False
+        if not is_config_true(config.get("core.filemode", "true")):
+            return False
+        # Attributes (such as text, eol, or a filter like Git LFS's) can change
+        # what Git stores for a file; those in the work tree are checked for
+        # each file added (see has_attributes_file())
+        if any(map(os.path.exists, self.get_global_attributes_paths(config))):
+            return False
+        if any(
+            is_config_true(config.get(name, "false"))
+            for name in ("commit.gpgsign", "tag.gpgsign", "index.skiphash")
+        ):
+            return False
+        hooks_dir_path = self.repository.get_path("hooks")
+        if config.get("core.hookspath"):
+            # As with Git, a relative hooks path is relative to the root of
+            # the work tree, wherever bump is run from
+            hooks_dir_path = os.path.join(
+                self.repository.work_tree_path,
+                os.path.expanduser(config["core.hookspath"]),
+            )
+        for hook_name in COMMIT_HOOK_NAMES:
+            hook_path = os.path.join(hooks_dir_path, hook_name)
+            if os.access(hook_path, os.X_OK) and os.path.isfile(hook_path):
+                return False
+        return self.get_identity("author") is not None
+
+    # Return the name and email of the author or committer (as a string like
+    # "Name <email>"), or None if no identity is configured
+    def get_identity(self, role):
+        config = self.repository.get_config()
+        name = os.environ.get("GIT_{}_NAME".format(role.upper())) or config.get(
+            "{}.name".format(role), config.get("user.name")
+        )
+        email = os.environ.get("GIT_{}_EMAIL".format(role.upper())) or config.get(
+            "{}.email".format(role), config.get("user.email")
+        )
+        if not name or not email:
+            return None
+        return "{} <{}>".format(name, email)
+
+    # Return the paths of the attributes files which apply to every path of the
+    # repository, as listed in gitattributes(5)
+    def get_global_attributes_paths(self, config):
+        xdg_config_dir_path = os.environ.get("XDG_CONFIG_HOME") or os.path.join(
+            os.path.expanduser("~"), ".config"
+        )
+        attributes_paths = [
+            self.repository.get_path("info", "attributes"),
+            os.path.expanduser(
+                config.get("core.attributesfile")
+                or os.path.join(xdg_config_dir_path, "git", "attributes")
+            ),
+        ]
+        if not os.environ.get("GIT_ATTR_NOSYSTEM"):
+            attributes_paths.append("/etc/gitattributes")
+        return attributes_paths
+
+    # Return True if a .gitattributes file within the work tree could apply to
+    # the given path (relative to the root of the work tree); such a file
+    # applies to every path within its own directory
+    def has_attributes_file(self, index_path):
+        dir_names = index_path.split("/")[:-1]
+        return any(
+            os.path.lexists(
+                os.path.join(
+                    self.repository.work_tree_path, *dir_names[:depth], ".gitattributes"
+                )
+            )
+            for depth in range(len(dir_names) + 1)
+        )
+
+    def get_index_path(self):
+        return self.repository.get_path("index")
+
+    # Stage the given files, writing their contents to the object database
+    # and updating their entries in the index
+    def add(self, file_paths):
+        if self.is_using_fallback:
+            return self.fallback_backend.add(file_paths)
+        try:
+            index = Index.read(self.get_index_path())
+            for file_path in file_paths:
+                file_stat = os.lstat(file_path)
+                if not stat.S_ISREG(file_stat.st_mode):
+                    raise UnsupportedIndexError(
+                        "unsupported file type for {}".format(file_path)
+                    )
+                index_path = os.path.relpath(
+                    os.path.abspath(file_path), self.repository.work_tree_path
+                ).replace(os.sep, "/")
+                if index_path.startswith("../"):
+                    raise UnsupportedIndexError(
+                        "{} is outside the repository".format(file_path)
+                    )
+                if self.has_attributes_file(index_path):
+                    raise UnsupportedIndexError(
+                        "{} may have attributes".format(file_path)
+                    )
+                blob_id = self.object_store.write_blob_from_file(file_path)
+                index.set_entry(index_path.encode(), blob_id, file_stat)
+            index.write(self.get_index_path())
+            self.index = index
+        except (UnsupportedIndexError, OSError):
+            # Nothing has been written to the index, so Git can start afresh
+            self.is_using_fallback = True
+            return self.fallback_backend.add(file_paths)
+        return True
+
+    # Return the ID of the tree of the given commit
+    def get_commit_tree_id(self, commit_id):
+        _, commit_data = self.object_store.read_object(commit_id)
+        return re.match(rb"tree ([0-9a-f]{40})", commit_data).group(1).decode()
+
+    # Commit the staged files with the given message
+    def commit(self, message):
+        if self.is_using_fallback:
+            return self.fallback_backend.commit(message)
+        message = clean_up_message(message)
+        if not message:
+            return False
+        try:
+            index = self.index or Index.read(self.get_index_path())
+            tree_id = index.write_tree(self.object_store)
+            # Save the rebuilt cache tree, as `git commit` does
+            index.write(self.get_index_path())
+            ref_name, parent_id = self.repository.resolve_ref("HEAD")
+            if parent_id and tree_id == self.get_commit_tree_id(parent_id):
+                # As with `git commit`, there must be something to commit
+                return False
+        except (UnsupportedIndexError, OSError, KeyError, ValueError):
+            self.is_using_fallback = True
+            return self.fallback_backend.commit(message)
+        timestamp = get_git_timestamp()
+        committer = "{} {}".format(self.get_identity("committer"), timestamp)
+        commit_data = "".join(
+            (
+                "tree {}\n".format(tree_id),
+                "parent {}\n".format(parent_id) if parent_id else "",
+                "author {} {}\n".format(self.get_identity("author"), timestamp),
+                "committer {}\n".format(committer),
+                "\n",
+                message,
+            )
+        ).encode()
+        commit_id = self.object_store.write_object(b"commit", commit_data)
+        if not self.repository.update_ref(ref_name, commit_id, parent_id):
+            return False
+        reflog_message = "commit{}: {}".format(
+            "" if parent_id else " (initial)", message.splitlines()[0]
+        )
+        for reflog_ref_name in sorted({ref_name, "HEAD"}):
+            self.repository.append_reflog(
+                reflog_ref_name, parent_id, commit_id, committer, reflog_message
+            )
+        self.commit_id = commit_id
+        return True
+
+    # Tag the last commit (or HEAD) with the given name, failing if a tag with
+    # that name already exists; if a message is given, an annotated tag object
+    # is created, otherwise the tag is lightweight (as with `git tag`)
+    def tag(self, tag_name, message=None):
+        if self.is_using_fallback or not SIMPLE_REF_NAME_PATT.match(tag_name):
+            # Git validates unusual tag names itself
+            return self.fallback_backend.tag(tag_name)
+        commit_id = self.commit_id or self.repository.resolve_ref("HEAD")[1]
+        if not commit_id:
+            return False
+        tag_target_id = commit_id
+        if message is not None:
+            tag_target_id = self.object_store.write_object(
+                b"tag",
+                "".join(
+                    (
+                        "object {}\n".format(commit_id),
+                        "type commit\n",
+                        "tag {}\n".format(tag_name),
+                        "tagger {} {}\n".format(
+                            self.get_identity("committer"), get_git_timestamp()
+                        ),
+                        "\n",
+                        clean_up_message(message),
+                    )
+                ).encode(),
+            )
+        return self.repository.update_ref(
+            "refs/tags/{}".format(tag_name), tag_target_id, None
+        )
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+import glob
+import hashlib
+import mmap
+import os
+import os.path
+import struct
+import tempfile
+import zlib
+
+# The size of the chunks used when streaming a file into a blob
+BLOB_CHUNK_SIZE = 1024 * 1024
+
+# The types of objects stored in a pack file, by their numeric type ID
+PACK_OBJECT_TYPES = {1: b"commit", 2: b"tree", 3: b"blob", 4: b"tag"}
+PACK_OFS_DELTA = 6
+PACK_REF_DELTA = 7
+
+
+# Read a size-encoded integer from the start of a delta, returning the integer
+# and the position just past it
+def read_delta_size(delta, pos):
+    size = 0
+    shift = 0
+    while True:
+        byte = delta[pos]
+        pos += 1
+        size |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return (size, pos)
+
+
+# Apply the given Git delta to the given base object contents
+def apply_delta(base, delta):
+    _, pos = read_delta_size(delta, 0)
+    result_size, pos = read_delta_size(delta, pos)
+    result = bytearray()
+    while pos < len(delta):
+        opcode = delta[pos]
+        pos += 1
+        if opcode & 0x80:
+            # Copy a range of the base object
+            copy_offset = 0
+            copy_size = 0
+            for i in range(4):
+                if opcode & (1 << i):
+                    copy_offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if opcode & (1 << (4 + i)):
+                    copy_size |= delta[pos] << (8 * i)
+                    pos += 1
+            result += base[copy_offset : copy_offset + (copy_size or 0x10000)]
+        elif opcode:
+            # Insert new data
+            result += delta[pos : pos + opcode]
+            pos += opcode
+        else:
+            raise ValueError("invalid delta opcode")
+    if len(result) != result_size:
+        raise ValueError("delta produced the wrong size")
+    return bytes(result)
+
+
+# A single pack file, along with its index (version 2)
+class Pack(object):
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.pack_path = index_path[: -len(".idx")] + ".pack"
+        with open(index_path, "rb") as index_file:
+            self.index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.index_map[:8] != b"\xfftOc\x00\x00\x00\x02":
+            raise ValueError("unsupported pack index version")
+        self.fanout = struct.unpack_from(">256I", self.index_map, 8)
+        self.object_count = self.fanout[-1]
+        self.ids_offset = 8 + 256 * 4
+        self.offsets_offset = self.ids_offset + self.object_count * (20 + 4)
+        self.large_offsets_offset = self.offsets_offset + self.object_count * 4
+        self.pack_map = None
+
+    # Return the offset of the object with the given (binary) ID within the
+    # pack, or None if the pack does not contain it
+    def find_offset(self, binary_id):
+        low = self.fanout[binary_id[0] - 1] if binary_id[0] else 0
+        high = self.fanout[binary_id[0]]
+        while low < high:
+            mid = (low + high) // 2
+            mid_pos = self.ids_offset + mid * 20
+            mid_id = self.index_map[mid_pos : mid_pos + 20]
+            if mid_id < binary_id:
+                low = mid + 1
+            elif mid_id > binary_id:
+                high = mid
+            else:
+                (offset,) = struct.unpack_from(
+                    ">I", self.index_map, self.offsets_offset + mid * 4
+                )
+                if offset & 0x80000000:
+                    (offset,) = struct.unpack_from(
+                        ">Q",
+                        self.index_map,
+                        self.large_offsets_offset + (offset & 0x7FFFFFFF) * 8,
+                    )
+                return offset
+        return None
+
+    # Read the object at the given offset, returning a tuple of (type, data);
+    # the given object store is used to resolve bases of ref-deltas
+    def read_at(self, offset, object_store):
+        if self.pack_map is None:
+            with open(self.pack_path, "rb") as pack_file:
+                self.pack_map = mmap.mmap(
+                    pack_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        byte = self.pack_map[offset]
+        object_type = (byte >> 4) & 0x07
+        pos = offset + 1
+        while byte & 0x80:
+            byte = self.pack_map[pos]
+            pos += 1
+        if object_type == PACK_OFS_DELTA:
+            byte = self.pack_map[pos]
+            pos += 1
+            base_distance = byte & 0x7F
+            while byte & 0x80:
+                byte = self.pack_map[pos]
+                pos += 1
+                base_distance = ((base_distance + 1) << 7) | (byte & 0x7F)
+            base_type, base = self.read_at(offset - base_distance, object_store)
+            return (base_type, apply_delta(base, self.decompress_at(pos)))
+        if object_type == PACK_REF_DELTA:
+            base_id = self.pack_map[pos : pos + 20].hex()
+            base_type, base = object_store.read_object(base_id)
+            return (base_type, apply_delta(base, self.decompress_at(pos + 20)))
+        return (PACK_OBJECT_TYPES[object_type], self.decompress_at(pos))
+
+    # Decompress the zlib stream starting at the given position in the pack
+    def decompress_at(self, pos):
+        decompressor = zlib.decompressobj()
+        chunks = []
+        while not decompressor.eof:
+            chunk = self.pack_map[pos : pos + 65536]
+            if not chunk:
+                raise ValueError("truncated pack")
+            chunks.append(decompressor.decompress(chunk))
+            pos += len(chunk)
+        return b"".join(chunks)
+
+    def close(self):
+        self.index_map.close()
+        if self.pack_map is not None:
+            self.pack_map.close()
+
+
+# The object database of a Git repository (i.e. its .git/objects directory),
+# which can read loose and packed objects and write loose ones
+class ObjectStore(object):
+    def __init__(self, objects_dir_path):
+        self.objects_dir_path = objects_dir_path
+        self.packs = None
+
+    def get_loose_object_path(self, object_id):
+        return os.path.join(self.objects_dir_path, object_id[:2], object_id[2:])
+
+    def get_packs(self):
+        if self.packs is None:
+            self.packs = [
+                Pack(index_path)
+                for index_path in sorted(
+                    glob.glob(os.path.join(self.objects_dir_path, "pack", "*.idx"))
+                )
+            ]
+        return self.packs
+
+    # Read the object with the given (hex) ID, returning a tuple of (type,
+    # data); raises KeyError if the object cannot be found
+    def read_object(self, object_id):
+        try:
+            with open(self.get_loose_object_path(object_id), "rb") as object_file:
+                raw_object = zlib.decompress(object_file.read())
+            header, _, data = raw_object.partition(b"\0")
+            return (header.split(b" ")[0], data)
+        except FileNotFoundError:
+            pass
+        binary_id = bytes.fromhex(object_id)
+        for pack in self.get_packs():
+            offset = pack.find_offset(binary_id)
+            if offset is not None:
+                return pack.read_at(offset, self)
+        raise KeyError(object_id)
+
+    # Write the given zlib-compressed object to the loose object file for the
+    # given ID (unless it already exists)
+    def write_loose_object(self, object_id, write_compressed):
+        object_path = self.get_loose_object_path(object_id)
+        if os.path.exists(object_path):
+            return
+        object_dir_path = os.path.dirname(object_path)
+        os.makedirs(object_dir_path, exist_ok=True)
+        temp_fd, temp_object_path = tempfile.mkstemp(
+            dir=object_dir_path, prefix="tmp_obj_"
+        )
+        try:
+            with os.fdopen(temp_fd, "wb") as temp_object_file:
+                write_compressed(temp_object_file)
+            os.chmod(temp_object_path, 0o444)
+            os.replace(temp_object_path, object_path)
+        except BaseException:
+            os.remove(temp_object_path)
+            raise
+
+    # Write an object of the given type with the given data, returning its ID
+    def write_object(self, object_type, data):
+        raw_object = b"%s %d\0%s" % (object_type, len(data), data)
+        object_id = hashlib.sha1(raw_object).hexdigest()
+        self.write_loose_object(
+            object_id,
+            lambda object_file: object_file.write(zlib.compress(raw_object)),
+        )
+        return object_id
+
+    # Write the contents of the file at the given path as a blob, returning
+    # its ID; the file is streamed in chunks rather than read all at once
+    def write_blob_from_file(self, file_path):
+        with open(file_path, "rb") as file:
+            header = b"blob %d\0" % os.fstat(file.fileno()).st_size
+            object_hash = hashlib.sha1(header)
+            for chunk in iter(lambda: file.read(BLOB_CHUNK_SIZE), b""):
+                object_hash.update(chunk)
+            object_id = object_hash.hexdigest()
+
+            def write_compressed(object_file):
+                compressor = zlib.compressobj()
+                object_file.write(compressor.compress(header))
+                file.seek(0)
+                for chunk in iter(lambda: file.read(BLOB_CHUNK_SIZE), b""):
+                    object_file.write(compressor.compress(chunk))
+                object_file.write(compressor.flush())
+
+            self.write_loose_object(object_id, write_compressed)
+        return object_id
+
+    def close(self):
+        for pack in self.packs or ():
+            pack.close()
+        self.packs = None
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+import os
+import os.path
+import subprocess
+
+import bumpanything.git as git
+import bumpanything.instrumentation as instrumentation
+from bumpanything.git_native import COMMIT_HOOK_NAMES, clean_up_message
+
+
+# Return the object ID Git uses to indicate that a ref must not already exist,
+# which is as long as the given object ID from the same repository (since
+# SHA-256 repositories have longer object IDs than SHA-1 ones)
+def get_null_object_id(object_id):
+    return "0" * len(object_id)
+
+
+# Run the given Git plumbing command, returning its (stripped) output, or None
+# if the command failed
+def run_plumbing_command(subcommand, *args, input=None):
+    instrumentation.count_subprocess()
+    try:
+        return subprocess.run(
+            ["git", subcommand, *args],
+            input=input,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except subprocess.CalledProcessError:
+        return None
+
+
+# A Git backend which commits and tags via plumbing commands rather than
+# porcelain ones; files are hashed and staged by a pair of long-lived
+# processes (so that the index is loaded and written only once, however many
+# files there are), and the commit and tag are then created directly from the
+# resulting tree; since this would bypass commit hooks and signing, both are
+# left to the regular subprocess-based backend whenever they are configured
+class GitPlumbingSession(object):
+    def __init__(self, fallback_backend=git):
+        self.fallback_backend = fallback_backend
+        self.repository_root = git.get_repository_root() or os.getcwd()
+        self.hash_object_process = None
+        self.update_index_process = None
+        self.commit_id = None
+        self.is_using_fallback = not self.is_supported()
+
+    # Return True if committing and tagging in the current repository can be
+    # done without `git commit` and `git tag`, i.e. no commit hook is installed
+    # and neither commits nor tags are signed; Git itself is asked, so that
+    # every level of config (and core.hooksPath) is honored
+    def is_supported(self):
+        signing_config = run_plumbing_command(
+            "config", "--bool", "--get-regexp", r"^(commit|tag)\.gpgsign$"
+        )
+        if signing_config and any(
+            line.endswith(" true") for line in signing_config.splitlines()
+        ):
+            return False
+        hooks_dir_path = run_plumbing_command("rev-parse", "--git-path", "hooks")
+        if not hooks_dir_path:
+            return False
+        for hook_name in COMMIT_HOOK_NAMES:
+            hook_path = os.path.join(hooks_dir_path, hook_name)
+            if os.access(hook_path, os.X_OK) and os.path.isfile(hook_path):
+                return False
+        return True
+
+    def start(self):
+        instrumentation.count_subprocess()
+        instrumentation.count_subprocess()
+        self.hash_object_process = subprocess.Popen(
+            ["git", "hash-object", "-w", "--stdin-paths"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.update_index_process = subprocess.Popen(
+            ["git", "update-index", "--add", "--index-info"],
+            stdin=subprocess.PIPE,
+            text=True,
+        )
+
+    # Hash and stage the given files; this can be called any number of times
+    # (e.g. as each file is written) before committing
+    def add(self, file_paths):
+        if self.is_using_fallback:
+            return self.fallback_backend.add(file_paths)
+        if not self.hash_object_process:
+            self.start()
+        for file_path in file_paths:
+            abs_file_path = os.path.abspath(file_path)
+            # Paths given to hash-object are resolved relative to the root of
+            # the repository, so they must be absolute
+            self.hash_object_process.stdin.write(abs_file_path + "\n")
+            self.hash_object_process.stdin.flush()
+            blob_id = self.hash_object_process.stdout.readline().strip()
+            if not blob_id:
+                return False
+            file_mode = "100755" if os.stat(abs_file_path).st_mode & 0o111 else "100644"
+            index_path = os.path.relpath(abs_file_path, self.repository_root)
+            self.update_index_process.stdin.write(
+                "{} {}\t{}\n".format(
+                    file_mode, blob_id, index_path.replace(os.sep, "/")
+                )
+            )
+        return True
+
+    # Wait for all staged files to be written to the index
+    def finish_staging(self):
+        if not self.hash_object_process:
+            return True
+        for process in (self.hash_object_process, self.update_index_process):
+            process.stdin.close()
+        return_codes = [
+            self.hash_object_process.wait(),
+            self.update_index_process.wait(),
+        ]
+        self.hash_object_process.stdout.close()
+        self.hash_object_process = self.update_index_process = None
+        return not any(return_codes)
+
+    # Commit the staged files with the given message
+    def commit(self, message):
+        if self.is_using_fallback:
+            return self.fallback_backend.commit(message)
+        # As with `git commit -m`, the message is cleaned up (and ends with a
+        # newline), and must not be empty
+        message = clean_up_message(message)
+        if not self.finish_staging() or not message:
+            return False
+        tree_id = run_plumbing_command("write-tree")
+        if not tree_id:
+            return False
+        # This fails if the branch has no commits yet
+        head = run_plumbing_command("rev-parse", "HEAD", "HEAD^{tree}")
+        parent_id, parent_tree_id = head.split() if head else (None, None)
+        if tree_id == parent_tree_id:
+            # As with `git commit`, there must be something to commit
+            return False
+        commit_id = run_plumbing_command(
+            "commit-tree",
+            tree_id,
+            *(("-p", parent_id) if parent_id else ()),
+            input=message,
+        )
+        if not commit_id:
+            return False
+        if (
+            run_plumbing_command(
+                "update-ref",
+                "-m",
+                "commit: {}".format(message.splitlines()[0]),
+                "HEAD",
+                commit_id,
+                parent_id or get_null_object_id(commit_id),
+            )
+            is None
+        ):
+            return False
+        self.commit_id = commit_id
+        return True
+
+    # Tag the last commit (or HEAD) with the given name, failing if a tag with
+    # that name already exists
+    def tag(self, tag_name):
+        if self.is_using_fallback:
+            return self.fallback_backend.tag(tag_name)
+        commit_id = self.commit_id or run_plumbing_command("rev-parse", "HEAD")
+        if not commit_id:
+            return False
+        return (
+            run_plumbing_command(
+                "update-ref",
+                "refs/tags/{}".format(tag_name),
+                commit_id,
+                get_null_object_id(commit_id),
+            )
+            is not None
+        )
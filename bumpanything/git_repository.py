@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+
+import os
+import os.path
+import re
+
+# The pattern for a single line of a Git config file (other than comments)
+CONFIG_SECTION_PATT = re.compile(
+    r'^\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]\s*(.*)$'
+)
+CONFIG_VARIABLE_PATT = re.compile(r"^\s*([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*))?$")
+
+# The pattern for ref names which are safe to create without further checks
+# (anything else is left to Git to validate)
+SIMPLE_REF_NAME_PATT = re.compile(r"^(?!.*(?:\.\.|//|@\{|\.lock(?:/|$)|/\.))[\w.+/-]+$")
+
+# The prefixes of refs which belong to each worktree, rather than being shared
+# by every worktree of the repository
+PER_WORKTREE_REF_PREFIXES = ("refs/worktree/", "refs/bisect/", "refs/rewritten/")
+
+# The patterns for the parents of a commit, and the target of a tag object
+COMMIT_PARENT_PATT = re.compile(rb"^parent ([0-9a-f]{40})$", re.MULTILINE)
+TAG_OBJECT_PATT = re.compile(rb"^object ([0-9a-f]{40})$", re.MULTILINE)
+
+
+# Parse a single (possibly quoted) Git config value
+def parse_config_value(value):
+    if value is None:
+        # A variable with no value is a boolean true
+        return "true"
+    parsed_chars = []
+    is_quoted = False
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char == '"':
+            is_quoted = not is_quoted
+        elif char == "\\" and i + 1 < len(value):
+            i += 1
+            parsed_chars.append(
+                {"n": "\n", "t": "\t", "b": "\b"}.get(value[i], value[i])
+            )
+        elif char in "#;" and not is_quoted:
+            break
+        else:
+            parsed_chars.append(char)
+        i += 1
+    return "".join(parsed_chars).strip()
+
+
+# Read the Git config file at the given path into the given dictionary, keyed
+# by the full (normalized) variable name, e.g. "user.name"
+def read_config_file(config_path, config):
+    try:
+        with open(config_path, "r", errors="replace") as config_file:
+            config_lines = config_file.readlines()
+    except OSError:
+        return config
+    section_name = None
+    for line in config_lines:
+        if not line.strip() or line.lstrip()[:1] in "#;":
+            continue
+        section_match = CONFIG_SECTION_PATT.match(line)
+        if section_match:
+            section, subsection, line = section_match.groups()
+            section_name = section.lower()
+            if subsection is not None:
+                section_name += "." + subsection
+            if not line.strip():
+                continue
+        variable_match = CONFIG_VARIABLE_PATT.match(line)
+        if variable_match and section_name:
+            name, value = variable_match.groups()
+            config["{}.{}".format(section_name, name.lower())] = parse_config_value(
+                value
+            )
+    return config
+
+
+# Return True if the given config value is a Git boolean true
+def is_config_true(value):
+    return str(value).lower() in ("true", "yes", "on", "1")
+
+
+# Return True if the given directory is a Git directory (a repository's .git
+# directory, a bare repository, or the Git directory of a linked worktree)
+def is_git_dir(dir_path):
+    return os.path.isfile(os.path.join(dir_path, "HEAD")) and (
+        os.path.isdir(os.path.join(dir_path, "objects"))
+        or os.path.isfile(os.path.join(dir_path, "commondir"))
+    )
+
+
+# Return the Git directory which the given .git file (as used by linked
+# worktrees and submodules) points to, or None if it is not a valid gitfile
+def read_git_file(git_file_path):
+    try:
+        with open(git_file_path, "r") as git_file:
+            git_file_contents = git_file.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if not git_file_contents.startswith("gitdir: "):
+        return None
+    return os.path.normpath(
+        os.path.join(
+            os.path.dirname(git_file_path), git_file_contents[len("gitdir: ") :]
+        )
+    )
+
+
+# Return the directory holding the objects and refs shared by every worktree
+# of the repository with the given Git directory
+def read_common_dir(git_dir_path):
+    try:
+        with open(os.path.join(git_dir_path, "commondir"), "r") as common_dir_file:
+            common_dir_path = common_dir_file.read().strip()
+    except OSError:
+        return git_dir_path
+    return os.path.normpath(os.path.join(git_dir_path, common_dir_path))
+
+
+# Return a signature of the file with the given stat result which changes
+# whenever the file is rewritten
+def get_stat_signature(file_stat):
+    return (file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+
+
+# A Git repository, for which refs and config can be read and written without
+# spawning Git
+class Repository(object):
+    def __init__(self, git_dir_path, work_tree_path, common_dir_path=None):
+        self.git_dir_path = git_dir_path
+        # The work tree is None for a bare repository
+        self.work_tree_path = work_tree_path
+        self.common_dir_path = common_dir_path or read_common_dir(git_dir_path)
+        self.config = None
+        self.config_signature = None
+        self.packed_refs = {}
+        self.peeled_object_ids = {}
+        self.are_packed_refs_peeled = False
+        self.packed_refs_signature = None
+
+    # Find the repository containing the current directory (or return None if
+    # there is none), honoring $GIT_DIR and $GIT_WORK_TREE as Git does; .git
+    # files (as used by linked worktrees) are followed, and a bare repository
+    # (or a Git directory) has no work tree
+    @classmethod
+    def discover(cls):
+        git_dir_path = os.environ.get("GIT_DIR")
+        if git_dir_path:
+            git_dir_path = os.path.abspath(git_dir_path)
+            if not is_git_dir(git_dir_path):
+                return None
+            repository = cls(git_dir_path, None)
+            work_tree_path = os.environ.get("GIT_WORK_TREE")
+            if work_tree_path:
+                repository.work_tree_path = os.path.abspath(work_tree_path)
+            elif not is_config_true(repository.get_config().get("core.bare")):
+                # Without a work tree given, Git treats the current directory
+                # as the root of the work tree
+                repository.work_tree_path = os.getcwd()
+            return repository
+        current_dir_path = os.getcwd()
+        while True:
+            dot_git_path = os.path.join(current_dir_path, ".git")
+            if os.path.isdir(dot_git_path):
+                if is_git_dir(dot_git_path):
+                    return cls(dot_git_path, current_dir_path)
+            elif os.path.isfile(dot_git_path):
+                git_dir_path = read_git_file(dot_git_path)
+                if git_dir_path and is_git_dir(git_dir_path):
+                    return cls(git_dir_path, current_dir_path)
+            elif is_git_dir(current_dir_path):
+                return cls(current_dir_path, None)
+            parent_dir_path = os.path.dirname(current_dir_path)
+            if parent_dir_path == current_dir_path:
+                return None
+            current_dir_path = parent_dir_path
+
+    def get_path(self, *path_parts):
+        return os.path.join(self.git_dir_path, *path_parts)
+
+    def get_common_path(self, *path_parts):
+        return os.path.join(self.common_dir_path, *path_parts)
+
+    # Return the path of the loose file for the given ref; HEAD (and the like)
+    # belongs to each worktree, while most refs are shared by all of them
+    def get_ref_path(self, ref_name):
+        if not ref_name.startswith("refs/") or ref_name.startswith(
+            PER_WORKTREE_REF_PREFIXES
+        ):
+            return self.get_path(ref_name)
+        return self.get_common_path(ref_name)
+
+    # Return True if the repository still exists on disk
+    def is_valid(self):
+        return os.path.isfile(self.get_path("HEAD"))
+
+    # Return the merged system, global and repository config; it is only read
+    # again if the repository's own config file has changed since
+    def get_config(self):
+        try:
+            config_signature = get_stat_signature(os.stat(self.get_path("config")))
+        except OSError:
+            config_signature = None
+        if self.config is not None and config_signature == self.config_signature:
+            return self.config
+        config = {}
+        if not os.environ.get("GIT_CONFIG_NOSYSTEM"):
+            read_config_file("/etc/gitconfig", config)
+        home_dir_path = os.path.expanduser("~")
+        xdg_config_dir_path = os.environ.get("XDG_CONFIG_HOME") or os.path.join(
+            home_dir_path, ".config"
+        )
+        read_config_file(os.path.join(xdg_config_dir_path, "git", "config"), config)
+        read_config_file(
+            os.environ.get("GIT_CONFIG_GLOBAL")
+            or os.path.join(home_dir_path, ".gitconfig"),
+            config,
+        )
+        read_config_file(self.get_path("config"), config)
+        self.config = config
+        self.config_signature = config_signature
+        return config
+
+    # Raise a ValueError if the repository uses any extension (such as the
+    # reftable ref storage, or SHA-256 object IDs), since its refs and objects
+    # could then not be read correctly; Git itself must be used instead
+    def check_format(self):
+        config = self.get_config()
+        if config.get("core.repositoryformatversion", "0") not in ("0", "1") or any(
+            name.startswith("extensions.") for name in config.keys()
+        ):
+            raise ValueError("unsupported repository format")
+
+    # Read the given ref, returning a tuple of (symbolic_target, object_id),
+    # where exactly one of the two is set; returns (None, None) if the ref does
+    # not exist
+    def read_ref(self, ref_name):
+        self.check_format()
+        try:
+            with open(self.get_ref_path(ref_name), "r") as ref_file:
+                ref_value = ref_file.read().strip()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return (None, self.read_packed_refs().get(ref_name))
+        if ref_value.startswith("ref: "):
+            return (ref_value[len("ref: ") :], None)
+        return (None, ref_value)
+
+    # Return a dictionary of every ref in the packed-refs file; the file is
+    # only parsed again if it has changed since it was last read
+    def read_packed_refs(self):
+        packed_refs_path = self.get_common_path("packed-refs")
+        try:
+            packed_refs_signature = get_stat_signature(os.stat(packed_refs_path))
+        except FileNotFoundError:
+            packed_refs_signature = None
+        if packed_refs_signature == self.packed_refs_signature:
+            return self.packed_refs
+        packed_refs = {}
+        peeled_object_ids = {}
+        are_packed_refs_peeled = False
+        ref_name = None
+        try:
+            with open(packed_refs_path, "r") as packed_refs_file:
+                for line in packed_refs_file:
+                    if line.startswith("#"):
+                        # With this trait, every annotated tag is followed by
+                        # the object it points to
+                        are_packed_refs_peeled = (
+                            are_packed_refs_peeled or "fully-peeled" in line.split()
+                        )
+                        continue
+                    if line.startswith("^"):
+                        # The object an annotated tag (the ref before it)
+                        # points to
+                        if ref_name:
+                            peeled_object_ids[ref_name] = line[1:].strip()
+                        continue
+                    object_id, _, ref_name = line.strip().partition(" ")
+                    packed_refs[ref_name] = object_id
+        except FileNotFoundError:
+            pass
+        self.packed_refs = packed_refs
+        self.peeled_object_ids = peeled_object_ids
+        self.are_packed_refs_peeled = are_packed_refs_peeled
+        self.packed_refs_signature = packed_refs_signature
+        return packed_refs
+
+    # Return True if the given ref exists
+    def ref_exists(self, ref_name):
+        symbolic_target, object_id = self.read_ref(ref_name)
+        return bool(symbolic_target or object_id)
+
+    # Return the object ID of the commit HEAD points to (or None for an unborn
+    # branch)
+    def get_head(self):
+        return self.resolve_ref("HEAD")[1]
+
+    # Yield the name of every ref beginning with the given prefix (such as
+    # "refs/tags/"), whether it is loose or packed
+    def iterate_ref_names(self, ref_prefix):
+        self.check_format()
+        loose_ref_names = set()
+        refs_dir_path = self.get_common_path(ref_prefix)
+        for dir_path, _, file_names in os.walk(refs_dir_path):
+            rel_dir_path = os.path.relpath(dir_path, self.common_dir_path)
+            for file_name in file_names:
+                if file_name.endswith(".lock"):
+                    continue
+                ref_name = "/".join((*rel_dir_path.split(os.sep), file_name))
+                loose_ref_names.add(ref_name)
+                yield ref_name
+        for ref_name in self.read_packed_refs():
+            if ref_name.startswith(ref_prefix) and ref_name not in loose_ref_names:
+                yield ref_name
+
+    # Return the ID of the commit the given ref ultimately points to, peeling
+    # any annotated tags with the given ObjectStore
+    def peel_ref(self, ref_name, object_store):
+        ref_name, object_id = self.resolve_ref(ref_name)
+        if not object_id:
+            return None
+        # Packed refs may record the object each annotated tag points to
+        if self.read_packed_refs().get(ref_name) == object_id:
+            if ref_name in self.peeled_object_ids:
+                return self.peeled_object_ids[ref_name]
+            if self.are_packed_refs_peeled:
+                return object_id
+        object_type, object_data = object_store.read_object(object_id)
+        while object_type == b"tag":
+            object_id = TAG_OBJECT_PATT.search(object_data).group(1).decode()
+            object_type, object_data = object_store.read_object(object_id)
+        return object_id
+
+    # Return the name of the tag matching the given glob pattern which is
+    # nearest to HEAD in its history (much like `git describe --tags
+    # --abbrev=0 --match`), or None if no such tag is reachable; the history
+    # is searched breadth-first, and only until a tag is found, so this raises
+    # KeyError if a commit cannot be read (e.g. in a shallow clone), and
+    # ValueError if several tags match the first tagged commit
+    def find_latest_tag(self, tag_pattern):
+        from collections import deque
+        from fnmatch import fnmatchcase
+
+        from bumpanything.git_objects import ObjectStore
+
+        tag_ref_names = [
+            ref_name
+            for ref_name in self.iterate_ref_names("refs/tags/")
+            if fnmatchcase(ref_name[len("refs/tags/") :], tag_pattern)
+        ]
+        head_id = self.get_head()
+        if not tag_ref_names or not head_id:
+            return None
+        object_store = ObjectStore(self.get_common_path("objects"))
+        try:
+            tag_names_by_commit = {}
+            for ref_name in tag_ref_names:
+                tag_names_by_commit.setdefault(
+                    self.peel_ref(ref_name, object_store), []
+                ).append(ref_name[len("refs/tags/") :])
+            pending_commit_ids = deque([head_id])
+            seen_commit_ids = {head_id}
+            while pending_commit_ids:
+                commit_id = pending_commit_ids.popleft()
+                if commit_id in tag_names_by_commit:
+                    tag_names = tag_names_by_commit[commit_id]
+                    if len(tag_names) > 1:
+                        # Git breaks the tie between the tags of a commit by
+                        # their type and date, which are left to it to compare
+                        raise ValueError("several tags match at {}".format(commit_id))
+                    return tag_names[0]
+                _, commit_data = object_store.read_object(commit_id)
+                commit_header = commit_data.partition(b"\n\n")[0]
+                for parent_id in COMMIT_PARENT_PATT.findall(commit_header):
+                    parent_id = parent_id.decode()
+                    if parent_id not in seen_commit_ids:
+                        seen_commit_ids.add(parent_id)
+                        pending_commit_ids.append(parent_id)
+            return None
+        finally:
+            object_store.close()
+
+    # Follow the given ref through any symbolic refs, returning a tuple of
+    # (ref_name, object_id), where ref_name is the name of the ref which
+    # ultimately holds the object ID (which is None for an unborn branch)
+    def resolve_ref(self, ref_name):
+        for _ in range(5):
+            symbolic_target, object_id = self.read_ref(ref_name)
+            if not symbolic_target:
+                return (ref_name, object_id)
+            ref_name = symbolic_target
+        raise ValueError("symbolic ref loop at {}".format(ref_name))
+
+    # Update the given ref to point to the given object ID, provided it
+    # currently points to the given old ID (or does not exist, if the old ID
+    # is None); returns False if the ref could not be updated
+    def update_ref(self, ref_name, object_id, old_object_id):
+        if not SIMPLE_REF_NAME_PATT.match(ref_name):
+            return False
+        ref_path = self.get_ref_path(ref_name)
+        lock_path = ref_path + ".lock"
+        try:
+            os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+            lock_fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except OSError:
+            return False
+        try:
+            with os.fdopen(lock_fd, "w") as lock_file:
+                lock_file.write(object_id + "\n")
+            if self.read_ref(ref_name)[1] != old_object_id:
+                os.remove(lock_path)
+                return False
+            os.replace(lock_path, ref_path)
+        except BaseException:
+            if os.path.exists(lock_path):
+                os.remove(lock_path)
+            raise
+        return True
+
+    # Append an entry to the reflog of the given ref (if reflogs are enabled)
+    def append_reflog(self, ref_name, old_object_id, object_id, identity, message):
+        log_all_ref_updates = self.get_config().get("core.logallrefupdates")
+        if log_all_ref_updates is not None and not is_config_true(log_all_ref_updates):
+            if log_all_ref_updates.lower() != "always":
+                return
+        log_path = self.get_path("logs", ref_name)
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, "a") as log_file:
+            log_file.write(
+                "{} {} {}\t{}\n".format(
+                    old_object_id or "0" * 40, object_id, identity, message
+                )
+            )
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+import contextlib
+import threading
+import time
+
+# The functions which receive a TimingEvent whenever a measured phase (or a
+# file within one) ends; nothing is measured while there are none
+hooks = []
+
+# The measurements in progress on each thread, innermost last
+thread_state = threading.local()
+
+# The measurements in progress on the thread which started the outermost
+# measurement; work done on other (worker) threads is attributed to the
+# innermost of these
+root_measurements = None
+
+# Guards the counters of measurements shared between threads
+counter_lock = threading.Lock()
+
+
+# Register the given function to be called with a TimingEvent whenever a
+# measured phase (or file) ends; this is the entry point for build tools which
+# embed bump-anything
+def add_hook(hook):
+    hooks.append(hook)
+
+
+def remove_hook(hook):
+    hooks.remove(hook)
+
+
+# A measurement in progress
+class Measurement(object):
+    __slots__ = (
+        "phase",
+        "file_path",
+        "parent",
+        "start_wall_time",
+        "start_cpu_time",
+        "bytes_read",
+        "bytes_written",
+        "subprocess_count",
+    )
+
+    def __init__(self, phase, file_path, parent):
+        self.phase = phase
+        self.file_path = file_path
+        self.parent = parent
+        self.start_wall_time = time.perf_counter()
+        self.start_cpu_time = time.process_time()
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.subprocess_count = 0
+
+
+def get_measurement_stack():
+    if not hasattr(thread_state, "measurements"):
+        thread_state.measurements = []
+    return thread_state.measurements
+
+
+# Return the innermost measurement in progress on the current thread (or, on a
+# worker thread, on the thread which started measuring)
+def get_current_measurement():
+    measurements = get_measurement_stack()
+    if measurements:
+        return measurements[-1]
+    if root_measurements:
+        return root_measurements[-1]
+    return None
+
+
+# Measure the wall time, CPU time (of the whole process), bytes read and
+# written, and subprocesses spawned within the given phase (or file within the
+# current phase), reporting a TimingEvent to every hook once it ends
+@contextlib.contextmanager
+def measure(phase, file_path=None):
+    global root_measurements
+    if not hooks:
+        yield
+        return
+    measurements = get_measurement_stack()
+    measurement = Measurement(phase, file_path, get_current_measurement())
+    is_root = root_measurements is None
+    if is_root:
+        root_measurements = measurements
+    measurements.append(measurement)
+    try:
+        yield
+    finally:
+        measurements.pop()
+        if is_root:
+            root_measurements = None
+        from bumpanything.timing_event import TimingEvent
+
+        event = TimingEvent(
+            phase=phase,
+            file_path=file_path,
+            wall_time=time.perf_counter() - measurement.start_wall_time,
+            cpu_time=time.process_time() - measurement.start_cpu_time,
+            bytes_read=measurement.bytes_read,
+            bytes_written=measurement.bytes_written,
+            subprocess_count=measurement.subprocess_count,
+        )
+        for hook in hooks[:]:
+            hook(event)
+
+
+# Add the given amounts to the counters of the current measurement and every
+# measurement enclosing it
+def add_to_counters(bytes_read=0, bytes_written=0, subprocess_count=0):
+    if not hooks:
+        return
+    measurement = get_current_measurement()
+    with counter_lock:
+        while measurement:
+            measurement.bytes_read += bytes_read
+            measurement.bytes_written += bytes_written
+            measurement.subprocess_count += subprocess_count
+            measurement = measurement.parent
+
+
+def count_bytes_read(byte_count):
+    add_to_counters(bytes_read=byte_count)
+
+
+def count_bytes_written(byte_count):
+    add_to_counters(bytes_written=byte_count)
+
+
+def count_subprocess():
+    add_to_counters(subprocess_count=1)
+
+
+# Summarize the given timing events by phase, returning a list of
+# dictionaries in the order each phase first ended; file events only
+# contribute to the file count of their phase, since the phase itself already
+# includes them
+def summarize_timing_events(timing_events):
+    phase_summaries = {}
+    for event in timing_events:
+        phase_summary = phase_summaries.setdefault(
+            event.phase,
+            {
+                "phase": event.phase,
+                "files": 0,
+                "wall_time": 0.0,
+                "cpu_time": 0.0,
+                "bytes_read": 0,
+                "bytes_written": 0,
+                "subprocess_count": 0,
+            },
+        )
+        if event.file_path is not None:
+            phase_summary["files"] += 1
+            continue
+        phase_summary["wall_time"] += event.wall_time
+        phase_summary["cpu_time"] += event.cpu_time
+        phase_summary["bytes_read"] += event.bytes_read
+        phase_summary["bytes_written"] += event.bytes_written
+        phase_summary["subprocess_count"] += event.subprocess_count
+    return list(phase_summaries.values())
+
+
+# Format the given timing events as either a table of phases or as JSON
+# (which also includes every file event)
+def format_timing_events(timing_events, timings_format="table"):
+    phase_summaries = summarize_timing_events(timing_events)
+    if timings_format == "json":
+        import json
+        from dataclasses import asdict
+
+        return json.dumps(
+            {
+                "phases": phase_summaries,
+                "files": [
+                    asdict(event)
+                    for event in timing_events
+                    if event.file_path is not None
+                ],
+            },
+            indent=2,
+        )
+    table_rows = [
+        ("phase", "files", "wall ms", "cpu ms", "read", "written", "subprocesses")
+    ]
+    table_rows.extend(
+        (
+            phase_summary["phase"],
+            str(phase_summary["files"]),
+            "{:.1f}".format(phase_summary["wall_time"] * 1000),
+            "{:.1f}".format(phase_summary["cpu_time"] * 1000),
+            str(phase_summary["bytes_read"]),
+            str(phase_summary["bytes_written"]),
+            str(phase_summary["subprocess_count"]),
+        )
+        for phase_summary in phase_summaries
+    )
+    column_widths = [max(len(row[i]) for row in table_rows) for i in range(7)]
+    return "\n".join(
+        "  ".join(
+            # Left-align the phase names, and right-align the numbers
+            cell.ljust(width) if i == 0 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, column_widths))
+        )
+        for row in table_rows
+    )
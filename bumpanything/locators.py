@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import os.path
+import re
+
+# Each locator below finds the region of a file which declares its version,
+# returning a tuple of (region_start, region_end), or None if the region could
+# not be found (in which case the whole file should be scanned instead); a
+# locator only reads as far into the file as it needs to, so the work done
+# per file is bounded by the size of the header rather than of the file
+
+# A JSON member name, along with the colon following it
+JSON_MEMBER_NAME_REGEX = re.compile(rb'\s*"((?:[^"\\]|\\.)*)"\s*:\s*')
+# A JSON scalar value; bare (unquoted) values are accepted leniently, since
+# the version itself is sometimes written without quotes
+JSON_SCALAR_REGEX = re.compile(rb'"(?:[^"\\]|\\.)*"|[^\s,{}\[\]]+')
+# Everything up to the next bracket outside of a string
+JSON_NON_BRACKETS_REGEX = re.compile(rb'[^"{}\[\]]*(?:"(?:[^"\\]|\\.)*"[^"{}\[\]]*)*')
+JSON_MEMBER_SEPARATOR_REGEX = re.compile(rb"\s*,")
+JSON_OBJECT_START_REGEX = re.compile(rb"(?:\xef\xbb\xbf)?\s*\{")
+
+# A TOML table header (or array of tables header), ignoring any comment
+TOML_TABLE_HEADER_REGEX = re.compile(
+    rb"^[ \t]*(\[\[?)[ \t]*([^\[\]\r\n]+?)[ \t]*\]\]?[ \t]*(?:#[^\r\n]*)?\r?$",
+    flags=re.MULTILINE,
+)
+TOML_VERSION_KEY_REGEX = re.compile(
+    rb"^[ \t]*[\"']?version[\"']?[ \t]*=[^\r\n]*", flags=re.MULTILINE
+)
+# The tables which declare the version of a Rust or Python package
+TOML_PACKAGE_TABLE_NAMES = frozenset((b"project", b"package", b"tool.poetry"))
+
+# WordPress only reads file headers from the first 8 KB of a theme's style.css
+# or a plugin's main file
+WORDPRESS_HEADER_SIZE = 8 * 1024
+
+
+# Return the position just past the JSON value starting at the given position
+# (or None if it is not a valid value); nested objects and arrays are skipped
+# over by only looking at brackets, rather than by parsing every member
+def skip_json_value(data, pos):
+    if data[pos : pos + 1] not in (b"{", b"["):
+        scalar_match = JSON_SCALAR_REGEX.match(data, pos)
+        return scalar_match.end() if scalar_match else None
+    depth = 0
+    while True:
+        pos = JSON_NON_BRACKETS_REGEX.match(data, pos).end()
+        bracket = data[pos : pos + 1]
+        if not bracket or bracket == b'"':
+            # The data ended (or a string was left unterminated)
+            return None
+        depth += 1 if bracket in (b"{", b"[") else -1
+        pos += 1
+        if depth == 0:
+            return pos
+
+
+# Find the top-level "version" member of a JSON document, stopping as soon as
+# it is found (so nested objects like "dependencies" which come after it are
+# never read)
+def locate_json_version(data):
+    object_start_match = JSON_OBJECT_START_REGEX.match(data)
+    if not object_start_match:
+        return None
+    pos = object_start_match.end()
+    while True:
+        member_name_match = JSON_MEMBER_NAME_REGEX.match(data, pos)
+        if not member_name_match:
+            return None
+        value_start = member_name_match.end()
+        if member_name_match.group(1).lower() == b"version":
+            value_match = JSON_SCALAR_REGEX.match(data, value_start)
+            if not value_match:
+                return None
+            return (member_name_match.start(1) - 1, value_match.end())
+        pos = skip_json_value(data, value_start)
+        if pos is None:
+            return None
+        separator_match = JSON_MEMBER_SEPARATOR_REGEX.match(data, pos)
+        if not separator_match:
+            # The end of the top-level object (or something malformed)
+            return None
+        pos = separator_match.end()
+
+
+# Find the version key within the [project], [package] or [tool.poetry] table
+# of a TOML document, skipping over every other table
+def locate_toml_version(data):
+    pos = 0
+    table_name = None
+    while True:
+        table_header_match = TOML_TABLE_HEADER_REGEX.search(data, pos)
+        table_end = table_header_match.start() if table_header_match else len(data)
+        if table_name in TOML_PACKAGE_TABLE_NAMES:
+            version_key_match = TOML_VERSION_KEY_REGEX.search(data, pos, table_end)
+            if version_key_match:
+                return version_key_match.span()
+        if not table_header_match:
+            return None
+        if table_header_match.group(1) == b"[[":
+            # An array of tables never declares the package version
+            table_name = None
+        else:
+            table_name = re.sub(rb"\s*\.\s*", b".", table_header_match.group(2))
+        pos = table_header_match.end()
+
+
+# Find the header comment of a WordPress theme stylesheet or plugin file
+def locate_wordpress_header(data):
+    comment_start = data.find(b"/*", 0, WORDPRESS_HEADER_SIZE)
+    if comment_start == -1:
+        return None
+    comment_end = data.find(b"*/", comment_start + 2, WORDPRESS_HEADER_SIZE)
+    if comment_end == -1:
+        return None
+    return (comment_start, comment_end + 2)
+
+
+# The locator to use for each auto-detectable file name (see
+# get_auto_detectable_file_names()); files with any other name are scanned
+# with the version pattern alone
+LOCATORS_BY_FILE_NAME = {
+    "package.json": locate_json_version,
+    "package-lock.json": locate_json_version,
+    "pyproject.toml": locate_toml_version,
+    "Cargo.toml": locate_toml_version,
+    "style.css": locate_wordpress_header,
+}
+
+
+# Return the locator for the file at the given path (or None if there is
+# none); a PHP file named after its directory is a WordPress plugin
+def get_locator(file_path):
+    file_name = os.path.basename(file_path)
+    if file_name in LOCATORS_BY_FILE_NAME:
+        return LOCATORS_BY_FILE_NAME[file_name]
+    if file_name == "{}.php".format(
+        os.path.basename(os.path.dirname(os.path.abspath(file_path)))
+    ):
+        return locate_wordpress_header
+    return None
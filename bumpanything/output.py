@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+import io
+import sys
+
+# The formats in which --output can report each changed file
+OUTPUT_FORMATS = ("text", "jsonl")
+
+# The number of characters of output to buffer before writing them all at
+# once, so that reporting many thousands of files does not cost a write (and,
+# on a console, a flush) for every one of them
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+
+# A writer which reports each changed file (or dependency) on stdout, as a line
+# of text or of JSON, buffering the lines to write them in batches; with quiet
+# set, nothing is reported at all
+class ResultWriter(object):
+    def __init__(self, output_format="text", is_quiet=False):
+        self.output_format = output_format
+        self.is_quiet = is_quiet
+        self.buffered_lines = []
+        self.buffered_size = 0
+
+    # Return the stream to which informational messages (such as those about
+    # committing and tagging) should be written, keeping them out of the
+    # stream of JSON results
+    def get_message_stream(self):
+        if self.is_quiet:
+            return io.StringIO()
+        if self.output_format == "jsonl":
+            return sys.stderr
+        return sys.stdout
+
+    # Write the given informational message, after any results written before
+    # it
+    def write_message(self, message):
+        self.flush()
+        print(message, file=self.get_message_stream())
+
+    # Write the given text (which should end with a newline) to stdout once
+    # enough has been buffered
+    def write(self, text):
+        if self.is_quiet:
+            return
+        self.buffered_lines.append(text)
+        self.buffered_size += len(text)
+        if self.buffered_size >= OUTPUT_BUFFER_SIZE:
+            self.flush()
+
+    def write_record(self, record):
+        import json
+
+        self.write(json.dumps(record) + "\n")
+
+    # Report the given FileResult (or planned VersionChange)
+    def write_file_result(self, file_result):
+        if self.output_format == "jsonl":
+            self.write_record(
+                {
+                    "file_path": file_result.file_path,
+                    "current_version": file_result.current_version,
+                    "new_version": file_result.new_version,
+                }
+            )
+        else:
+            self.write(
+                "{}: {} -> {}\n".format(
+                    file_result.file_path,
+                    file_result.current_version,
+                    file_result.new_version,
+                )
+            )
+
+    # Report the given DependencyChange
+    def write_dependency_change(self, dependency_change):
+        if self.output_format == "jsonl":
+            self.write_record(
+                {
+                    "file_path": dependency_change.file_path,
+                    "dependency_name": dependency_change.dependency_name,
+                    "current_version": dependency_change.current_version,
+                    "new_version": dependency_change.new_version,
+                }
+            )
+        else:
+            self.write(
+                "{}: {} dependency {} -> {}\n".format(
+                    dependency_change.file_path,
+                    dependency_change.dependency_name,
+                    dependency_change.current_version,
+                    dependency_change.new_version,
+                )
+            )
+
+    # Report the addition of the given release notes for the given new version
+    # to the changelog at the given path
+    def write_release_notes(self, changelog_path, new_version, release_notes):
+        if self.output_format == "jsonl":
+            self.write_record(
+                {
+                    "file_path": changelog_path,
+                    "new_version": new_version,
+                    "release_notes": release_notes,
+                }
+            )
+        else:
+            self.write(
+                "{}: added release notes for {}\n".format(changelog_path, new_version)
+            )
+
+    # Write everything buffered so far to stdout
+    def flush(self):
+        if not self.buffered_lines:
+            return
+        sys.stdout.write("".join(self.buffered_lines))
+        sys.stdout.flush()
+        self.buffered_lines.clear()
+        self.buffered_size = 0
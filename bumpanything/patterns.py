@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+import fnmatch
+import mmap
+import os
+import os.path
+import re
+import sys
+from functools import lru_cache
+
+import bumpanything.instrumentation as instrumentation
+
+# The name of the file (in the current directory) whose [tool.bump-anything]
+# table configures the extra patterns to search particular files for
+CONFIG_FILE_NAME = "pyproject.toml"
+
+# The ways in which the versions matched within a file can be replaced
+REPLACE_MODES = ("first", "all")
+
+# The named groups (and references to them) within a pattern, which are
+# renamed so that several patterns can be combined into one
+GROUP_NAME_REGEX = re.compile(r"(?<!\\)(\(\?P<|\(\?P=|\(\?\()([A-Za-z_]\w*)")
+# Numbered backreferences, which would refer to the wrong groups once patterns
+# are combined
+NUMBERED_BACKREFERENCE_REGEX = re.compile(r"(?<!\\)(?:\\\\)*\\(?:[1-9]|g<\d)|\(\?\(\d")
+# Inline flags which apply to the whole of a pattern (and so must be scoped to
+# it once it is combined with others)
+GLOBAL_FLAGS_REGEX = re.compile(r"^\(\?([aiLmsux]+)\)")
+# The lines of a TOML file which can begin the [tool.bump-anything] table: its
+# header (or that of one of its subtables, such as [[tool.bump-anything.files]]),
+# or a bump-anything key under [tool] (or at the top level, as a dotted key)
+CONFIG_TABLE_REGEX = re.compile(
+    rb"""
+    ^[ \t]*(?:
+        \[\[?[ \t]*tool[ \t]*\.[ \t]*
+        |(?:tool[ \t]*\.[ \t]*)?
+    )
+    (?:bump-anything|"bump-anything"|'bump-anything')[ \t]*[.=\]]
+    """,
+    flags=re.MULTILINE | re.VERBOSE,
+)
+
+# The scanner rules which have already been loaded, keyed by the path of the
+# config file, along with its signature when it was read; this is only enabled
+# (by setting it to a dictionary) in long-running processes, such as the
+# daemon, so that an unchanged config need not be parsed again
+loaded_configs = None
+
+
+# Rewrite the given pattern so that its named groups (and references to them)
+# have the given suffix, and any global flags are scoped to the pattern itself
+def get_scoped_pattern(pattern, group_name_suffix):
+    if NUMBERED_BACKREFERENCE_REGEX.search(pattern):
+        raise ValueError(
+            "pattern {!r} uses numbered backreferences (use named ones)".format(pattern)
+        )
+    pattern = GROUP_NAME_REGEX.sub(
+        lambda match: match.group(1) + match.group(2) + group_name_suffix, pattern
+    )
+    global_flags_match = GLOBAL_FLAGS_REGEX.match(pattern)
+    if global_flags_match:
+        return "(?{}:{})".format(
+            global_flags_match.group(1), pattern[global_flags_match.end() :]
+        )
+    return "(?:{})".format(pattern)
+
+
+# Searches a file for any of several version patterns, all of which are
+# combined into a single alternation so that the file is only scanned once, no
+# matter how many patterns there are; every pattern must capture the version
+# in a group named "version"
+class VersionScanner(object):
+    def __init__(self, patterns, replace_all=False):
+        scoped_patterns = []
+        self.version_group_names = []
+        for pattern_index, pattern in enumerate(patterns):
+            try:
+                group_names = re.compile(pattern.encode()).groupindex
+            except re.error as error:
+                raise ValueError("pattern {!r} is invalid: {}".format(pattern, error))
+            if "version" not in group_names:
+                raise ValueError(
+                    "pattern {!r} has no group named 'version'".format(pattern)
+                )
+            group_name_suffix = "__{}".format(pattern_index)
+            scoped_patterns.append(get_scoped_pattern(pattern, group_name_suffix))
+            self.version_group_names.append("version" + group_name_suffix)
+        self.regex = re.compile("|".join(scoped_patterns).encode())
+        self.replace_all = replace_all
+
+    # Return the span of the version captured by the given match, whichever of
+    # the patterns it matched
+    def get_version_span(self, version_match):
+        for group_name in self.version_group_names:
+            version_start, version_end = version_match.span(group_name)
+            if version_start != -1:
+                return (version_start, version_end)
+
+    # Search the given binary file object for the version, returning a tuple
+    # of (version_start, version_end, current_version), or None if the file
+    # contains no version; when replacing all matches, the tuple also includes
+    # the start of every other match of the same version
+    def find_version(self, file):
+        if not os.fstat(file.fileno()).st_size:
+            # Empty files cannot be memory-mapped (and have no version anyway)
+            return None
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as file_map:
+            return self.find_version_in_data(file_map)
+
+    # Search the given data (such as a memory-mapped file) for the version (see
+    # find_version()); no match outlives the call, so the data can be unmapped
+    # as soon as it returns
+    def find_version_in_data(self, data):
+        version_matches = self.regex.finditer(data)
+        first_match = next(version_matches, None)
+        if not first_match:
+            instrumentation.count_bytes_read(len(data))
+            return None
+        version_start, version_end = self.get_version_span(first_match)
+        current_version = data[version_start:version_end]
+        if not self.replace_all:
+            instrumentation.count_bytes_read(first_match.end())
+            return (version_start, version_end, current_version.decode())
+        other_version_starts = []
+        for version_match in version_matches:
+            other_start, other_end = self.get_version_span(version_match)
+            # Only other occurrences of the same version are replaced, so that
+            # unrelated versions matched by the same patterns (such as those
+            # of dependencies) are left alone
+            if data[other_start:other_end] == current_version:
+                other_version_starts.append(other_start)
+        instrumentation.count_bytes_read(len(data))
+        return (
+            version_start,
+            version_end,
+            current_version.decode(),
+            other_version_starts,
+        )
+
+
+# Return the scanner for the given patterns; the compiled form of each
+# distinct combination of patterns is shared by every file it applies to
+@lru_cache(maxsize=None)
+def get_scanner(patterns, replace_all=False):
+    return VersionScanner(patterns, replace_all=replace_all)
+
+
+# Return True if the given glob matches the given path (relative to the
+# directory containing the config); a leading **/ also matches files at the
+# top level
+def does_glob_match(glob, relative_path):
+    if fnmatch.fnmatchcase(relative_path, glob):
+        return True
+    return glob.startswith("**/") and fnmatch.fnmatchcase(relative_path, glob[3:])
+
+
+# Read the [tool.bump-anything] table of the given TOML config file (if it has
+# one), returning None if the file has no such table
+def read_config(config_path):
+    try:
+        with open(config_path, "rb") as config_file:
+            config_data = config_file.read()
+    except FileNotFoundError:
+        return None
+    # Avoid parsing the many pyproject.toml files which do not configure
+    # bump-anything at all (even if they mention it elsewhere)
+    if not CONFIG_TABLE_REGEX.search(config_data):
+        return None
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+    try:
+        config = tomllib.loads(config_data.decode())
+    except (UnicodeDecodeError, tomllib.TOMLDecodeError) as error:
+        raise ValueError("{} could not be parsed: {}".format(config_path, error))
+    return config.get("tool", {}).get("bump-anything")
+
+
+# Return a list of (glob, scanner) pairs according to the file entries of the
+# given config (see read_config()); the default pattern is included in every
+# scanner unless an entry opts out of it
+def get_scanner_rules(config, default_pattern):
+    scanner_rules = []
+    for file_entry in config.get("files", []):
+        if not isinstance(file_entry.get("glob"), str):
+            raise ValueError("every file entry must have a glob")
+        patterns = file_entry.get("patterns", [])
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if file_entry.get("default-pattern", True):
+            patterns = [*patterns, default_pattern]
+        replace_mode = file_entry.get("replace", "first")
+        if replace_mode not in REPLACE_MODES:
+            raise ValueError(
+                "replace must be one of {} (not {!r})".format(
+                    ", ".join(REPLACE_MODES), replace_mode
+                )
+            )
+        scanner_rules.append(
+            (
+                file_entry["glob"],
+                get_scanner(tuple(patterns), replace_all=replace_mode == "all"),
+            )
+        )
+    return scanner_rules
+
+
+# Load the scanner rules (see get_scanner_rules()) configured in the given
+# config file, or an empty list if there are none
+def load_scanner_rules(config_path, default_pattern):
+    config_path = os.path.abspath(config_path)
+    try:
+        import bumpanything.cache as cache
+
+        config_signature = cache.get_file_signature(os.stat(config_path))
+    except OSError:
+        return []
+    if loaded_configs is not None and config_path in loaded_configs:
+        scanner_rules, loaded_signature = loaded_configs[config_path]
+        if loaded_signature == config_signature:
+            return scanner_rules
+    config = read_config(config_path)
+    scanner_rules = get_scanner_rules(config, default_pattern) if config else []
+    if loaded_configs is not None:
+        loaded_configs[config_path] = (scanner_rules, config_signature)
+    return scanner_rules
+
+
+# Return the scanner of the first of the given rules whose glob matches the
+# file at the given path, or None if no rule applies to the file
+def get_file_scanner(scanner_rules, file_path, config_dir_path=os.curdir):
+    if not scanner_rules:
+        return None
+    relative_path = os.path.relpath(file_path, config_dir_path).replace(os.sep, "/")
+    for glob, scanner in scanner_rules:
+        if does_glob_match(glob, relative_path):
+            return scanner
+    return None
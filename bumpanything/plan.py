@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import json
+from dataclasses import asdict
+
+from bumpanything.version_change import VersionChange
+
+# The version of the format used for saved plans
+PLAN_FORMAT_VERSION = 1
+
+# The maximum number of bytes of surrounding context to show on either side of
+# a version when rendering a diff (so that minified files stay readable)
+MAX_DIFF_CONTEXT_SIZE = 200
+
+
+# Write the given version changes to the plan file at the given path
+def save_plan(plan_path, version_changes):
+    with open(plan_path, "w") as plan_file:
+        json.dump(
+            {
+                "format": PLAN_FORMAT_VERSION,
+                "changes": [asdict(change) for change in version_changes],
+            },
+            plan_file,
+            indent=2,
+        )
+        plan_file.write("\n")
+
+
+# Read the version changes from the plan file at the given path, raising a
+# ValueError if it is not a valid plan
+def load_plan(plan_path):
+    with open(plan_path, "r") as plan_file:
+        plan = json.load(plan_file)
+    if not isinstance(plan, dict) or plan.get("format") != PLAN_FORMAT_VERSION:
+        raise ValueError("unsupported plan format")
+    try:
+        return [VersionChange(**change) for change in plan["changes"]]
+    except (KeyError, TypeError) as error:
+        raise ValueError("malformed plan") from error
+
+
+# Return True if the bytes at the span recorded by the given version change
+# still hold its current version (i.e. the file has not changed in a way that
+# would invalidate the plan)
+def is_version_change_current(version_change):
+    version_length = version_change.version_end - version_change.version_start
+    try:
+        with open(version_change.file_path, "rb") as file:
+            for version_start in (
+                version_change.version_start,
+                *version_change.other_version_starts,
+            ):
+                file.seek(version_start)
+                if file.read(version_length) != version_change.current_version.encode():
+                    return False
+    except OSError:
+        return False
+    return True
+
+
+# Count the number of lines before the given byte offset in the given file
+def count_lines_before(file, offset):
+    file.seek(0)
+    line_count = 0
+    while offset > 0:
+        chunk = file.read(min(offset, 1024 * 1024))
+        if not chunk:
+            break
+        line_count += chunk.count(b"\n")
+        offset -= len(chunk)
+    return line_count
+
+
+# Render the hunk of a unified diff for the line (with the given number)
+# containing the given splices (each a tuple of (start, end, current_text,
+# new_text), in order) within the given (open, binary) file
+def get_line_hunk(file, line_number, splices):
+    first_splice_start = splices[0][0]
+    last_splice_end = splices[-1][1]
+    context_start = max(0, first_splice_start - MAX_DIFF_CONTEXT_SIZE)
+    file.seek(context_start)
+    context = file.read(last_splice_end - context_start + MAX_DIFF_CONTEXT_SIZE)
+    line_start = context.rfind(b"\n", 0, first_splice_start - context_start) + 1
+    line_end = context.find(b"\n", last_splice_end - context_start)
+    if line_end == -1:
+        line_end = len(context)
+    current_line_parts = []
+    new_line_parts = []
+    offset = line_start
+    for splice_start, splice_end, current_text, new_text in splices:
+        unchanged_text = context[offset : splice_start - context_start].decode(
+            errors="replace"
+        )
+        current_line_parts.extend((unchanged_text, current_text))
+        new_line_parts.extend((unchanged_text, new_text))
+        offset = splice_end - context_start
+    after = context[offset:line_end].decode(errors="replace")
+    return "".join(
+        (
+            "@@ -{0} +{0} @@\n".format(line_number),
+            "-{}{}\n".format("".join(current_line_parts), after),
+            "+{}{}\n".format("".join(new_line_parts), after),
+        )
+    )
+
+
+# Render the given splices to the file at the given path as a unified diff,
+# with a hunk for each line they change
+def get_file_diff(file_path, splices):
+    splices_by_line = {}
+    with open(file_path, "rb") as file:
+        for splice in sorted(splices):
+            line_number = count_lines_before(file, splice[0]) + 1
+            splices_by_line.setdefault(line_number, []).append(splice)
+        hunks = [
+            get_line_hunk(file, line_number, line_splices)
+            for line_number, line_splices in splices_by_line.items()
+        ]
+    return "".join(
+        (
+            "--- a/{}\n".format(file_path),
+            "+++ b/{}\n".format(file_path),
+            *hunks,
+        )
+    )
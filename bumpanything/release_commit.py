@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+# A commit included in the release notes (see changelog.py), as parsed from
+# its message according to the Conventional Commits format; commits which do
+# not follow the format have no type (or scope), and are described by the
+# first line of their message
+@dataclass
+class ReleaseCommit(object):
+    commit_id: str
+    commit_type: Optional[str]
+    scope: Optional[str]
+    description: str
+    is_breaking: bool = False
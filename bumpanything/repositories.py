@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import os.path
+import sys
+from argparse import Namespace
+
+from bumpanything.repository_result import RepositoryResult
+
+
+# Return the paths (relative to the current directory) of the submodules of
+# the Git repository containing the current directory, as listed in its
+# .gitmodules file, or None if the current directory is not in a repository
+def get_submodule_paths():
+    import bumpanything.git as git
+    from bumpanything.git_repository import read_config_file
+
+    repository_root = git.get_repository_root()
+    if not repository_root:
+        return None
+    submodules_config = read_config_file(
+        os.path.join(repository_root, ".gitmodules"), {}
+    )
+    return [
+        os.path.relpath(os.path.join(repository_root, submodule_path))
+        for name, submodule_path in submodules_config.items()
+        if name.startswith("submodule.") and name.endswith(".path")
+    ]
+
+
+# Return a copy of the given CLI arguments for bumping a single repository
+# (from within it), as if `bump` were run there on its own
+def get_repository_args(args):
+    repository_args = Namespace(**vars(args))
+    repository_args.repos = False
+    repository_args.submodules = False
+    repository_args.file_paths = []
+    repository_args.files_from = None
+    # Each repository already has a worker of its own
+    repository_args.jobs = 1
+    repository_args.timings = None
+    repository_args.profile = None
+    return repository_args
+
+
+# Bump (and commit and tag) the repository at the given path, as described by
+# the given CLI arguments (see get_repository_args()), capturing everything it
+# prints; any failure is recorded in the returned RepositoryResult rather than
+# raised, so that it cannot affect any other repository; this changes the
+# current directory for the duration, so must not be run in more than one
+# thread at once (though it is safe to run in any process)
+def release_repository(repo_path, repository_args):
+    from contextlib import redirect_stderr, redirect_stdout
+
+    import bumpanything.__main__ as bump
+
+    output = io.StringIO()
+    is_success = False
+    file_results = None
+    original_dir_path = os.getcwd()
+    with redirect_stdout(output), redirect_stderr(output):
+        try:
+            os.chdir(repo_path)
+            file_results = bump.run_with_cache(repository_args)
+            is_success = True
+        except OSError as error:
+            print("{}: {}".format(repo_path, error.strerror))
+        except SystemExit as error:
+            if isinstance(error.code, str):
+                print(error.code)
+            # As with the interpreter, exiting with no status (or 0) succeeds
+            is_success = error.code in (None, 0)
+        except Exception:
+            import traceback
+
+            traceback.print_exc()
+        finally:
+            os.chdir(original_dir_path)
+    return RepositoryResult(
+        repo_path=repo_path,
+        is_success=is_success,
+        new_version=file_results[0].new_version if file_results else None,
+        output=output.getvalue(),
+    )
+
+
+# Release each of the repositories at the given paths (see
+# release_repository()) on a pool of the given number of worker processes,
+# yielding the RepositoryResult of each in the same order as the paths; since
+# each release changes the current directory, they are run in separate
+# processes rather than threads
+def release_repositories(repo_paths, args, jobs=1):
+    import bumpanything.executor as executor
+
+    repo_paths = list(repo_paths)
+    repository_args = get_repository_args(args)
+    yield from executor.iterate_in_order(
+        release_repository,
+        repo_paths,
+        [repository_args] * len(repo_paths),
+        jobs=min(jobs, len(repo_paths)),
+        executor_type="process",
+    )
+
+
+# Write the given RepositoryResult, headed by the path of its repository, to
+# the given stream
+def write_repository_result(repository_result, stream=None):
+    stream = stream or sys.stdout
+    stream.write(
+        "==> {}\n{}".format(repository_result.repo_path, repository_result.output)
+    )
+    stream.flush()
+
+
+# Return a summary of the given results, naming every repository which failed
+def format_summary(repository_results):
+    failed_repo_paths = [
+        repository_result.repo_path
+        for repository_result in repository_results
+        if not repository_result.is_success
+    ]
+    summary = "{} of {} repositories succeeded".format(
+        len(repository_results) - len(failed_repo_paths), len(repository_results)
+    )
+    if failed_repo_paths:
+        summary += "; failed: {}".format(", ".join(failed_repo_paths))
+    return summary
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+# The outcome of bumping (and committing and tagging) a single repository
+# among many (see repositories.py), along with everything it printed
+@dataclass
+class RepositoryResult(object):
+    repo_path: str
+    is_success: bool
+    new_version: Optional[str]
+    output: str
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+# The measurements for a single phase of a bump (e.g. "plan"), or for a single
+# file within a phase (if file_path is set); times are in seconds
+@dataclass
+class TimingEvent(object):
+    phase: str
+    file_path: Optional[str]
+    wall_time: float
+    cpu_time: float
+    bytes_read: int
+    bytes_written: int
+    subprocess_count: int
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import os.path
+import sys
+
+import bumpanything.file_io as file_io
+import bumpanything.instrumentation as instrumentation
+
+# The name of the journal (in the Git directory of the repository, so that it is
+# never part of the work tree) which records an in-progress transaction, so
+# that an interrupted run can be rolled back by the next one
+JOURNAL_FILE_NAME = "bump-anything-journal"
+
+# The suffix added to the path of the cache of a project outside of any
+# repository (see cache.get_user_cache_path()) to form the path of its journal
+USER_JOURNAL_SUFFIX = ".journal"
+
+
+# Flush the file at the given path to disk
+def fsync_path(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened (or synced) on some platforms
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# A set of version changes to one or more files which are applied together;
+# same-length versions are patched in place (with the original bytes recorded
+# in the journal for undoing), while all other files are written to temporary
+# files (kept alongside the journal where possible) which atomically replace
+# the originals (with the originals preserved as hard-linked backups until the
+# transaction completes); new files are likewise written to temporary files,
+# which are moved into place
+class Transaction(object):
+    def __init__(self, journal_path):
+        self.journal_path = os.path.abspath(journal_path)
+        self.entries = []
+
+    # Return the directory in which to write the temporary file (and backup)
+    # for a file in the given directory; this is the directory of the journal,
+    # so that nothing is left in the work tree if the process is interrupted,
+    # unless it is on another file system (where the file could no longer be
+    # replaced atomically)
+    def get_temp_dir_path(self, file_dir_path):
+        journal_dir_path = os.path.dirname(self.journal_path)
+        try:
+            os.makedirs(journal_dir_path, exist_ok=True)
+            if os.stat(journal_dir_path).st_dev == os.stat(file_dir_path).st_dev:
+                return journal_dir_path
+        except OSError:
+            pass
+        return file_dir_path
+
+    # Stage the replacement of the bytes between version_start and version_end
+    # (and at any other given starts) in the given file with the new version;
+    # nothing is visible until the transaction is committed
+    def write_version(
+        self,
+        file_path,
+        version_start,
+        version_end,
+        current_version,
+        new_version,
+        other_version_starts=(),
+    ):
+        self.write_splices(
+            file_path,
+            [
+                (splice_start, splice_end, current_version, new_version)
+                for splice_start, splice_end, _ in file_io.get_version_splices(
+                    version_start, version_end, new_version, other_version_starts
+                )
+            ],
+        )
+
+    # Stage the given splices to the given file, each of which is a tuple of
+    # (start, end, current_text, new_text); if every replacement is the same
+    # length as the text it replaces, each is patched in place, otherwise the
+    # file is rewritten once with all of them; nothing is visible until the
+    # transaction is committed
+    def write_splices(self, file_path, splices):
+        file_path = os.path.abspath(file_path)
+        if all(
+            len(new_text.encode()) == splice_end - splice_start
+            for splice_start, splice_end, _, new_text in splices
+        ):
+            self.entries.extend(
+                {
+                    "type": "patch",
+                    "path": file_path,
+                    "start": splice_start,
+                    "old": current_text,
+                    "new": new_text,
+                }
+                for splice_start, _, current_text, new_text in splices
+            )
+            return
+        import tempfile
+
+        file_dir_path, file_name = os.path.split(file_path)
+        temp_fd, temp_file_path = tempfile.mkstemp(
+            dir=self.get_temp_dir_path(file_dir_path),
+            prefix=".{}.".format(file_name),
+            suffix=".tmp",
+        )
+        # Register the entry first so that the temporary file is cleaned up
+        # even if writing it fails
+        self.entries.append(
+            {
+                "type": "replace",
+                "path": file_path,
+                "temp": temp_file_path,
+                "backup": "{}.bump-backup".format(temp_file_path[: -len(".tmp")]),
+            }
+        )
+        with os.fdopen(temp_fd, "wb") as temp_file:
+            file_io.write_spliced_file(
+                file_path,
+                temp_file,
+                [
+                    (splice_start, splice_end, new_text)
+                    for splice_start, splice_end, _, new_text in splices
+                ],
+            )
+        os.chmod(temp_file_path, os.stat(file_path).st_mode & 0o7777)
+
+    # Stage the creation of a new file at the given path with the given
+    # contents; nothing is visible until the transaction is committed
+    def write_new_file(self, file_path, contents):
+        import tempfile
+
+        file_path = os.path.abspath(file_path)
+        file_dir_path, file_name = os.path.split(file_path)
+        temp_fd, temp_file_path = tempfile.mkstemp(
+            dir=self.get_temp_dir_path(file_dir_path),
+            prefix=".{}.".format(file_name),
+            suffix=".tmp",
+        )
+        self.entries.append(
+            {"type": "create", "path": file_path, "temp": temp_file_path}
+        )
+        with os.fdopen(temp_fd, "wb") as temp_file:
+            temp_file.write(contents.encode())
+            instrumentation.count_bytes_written(len(contents.encode()))
+        # Temporary files are only readable by their owner, unlike new files
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_file_path, 0o666 & ~umask)
+
+    # Flush every staged temporary file to disk in a single batch
+    def sync_temp_files(self):
+        for entry in self.entries:
+            if entry["type"] != "patch":
+                fsync_path(entry["temp"])
+
+    # Durably record the staged changes so that they can be rolled back if the
+    # process is interrupted while applying them
+    def write_journal(self):
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, "w") as journal_file:
+            json.dump(self.entries, journal_file)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        fsync_path(os.path.dirname(self.journal_path))
+
+    # Apply every staged change to its file; patched files are only flushed to
+    # disk once they have all been written, in a single batch
+    def apply(self):
+        for entry in self.entries:
+            if entry["type"] == "patch":
+                new_data = entry["new"].encode()
+                with open(entry["path"], "r+b") as file:
+                    file.seek(entry["start"])
+                    file.write(new_data)
+                instrumentation.count_bytes_written(len(new_data))
+            elif entry["type"] == "create":
+                os.replace(entry["temp"], entry["path"])
+            else:
+                # Keep the original contents reachable until the transaction
+                # is complete; a hard link avoids copying the file
+                try:
+                    os.link(entry["path"], entry["backup"])
+                except OSError:
+                    import shutil
+
+                    shutil.copy2(entry["path"], entry["backup"])
+                os.replace(entry["temp"], entry["path"])
+        for patched_path in dict.fromkeys(
+            entry["path"] for entry in self.entries if entry["type"] == "patch"
+        ):
+            fsync_path(patched_path)
+        # The backups (alongside the temporary files) must be as durable as the
+        # replacements which they allow to be undone
+        for dir_path in sorted(
+            set(
+                os.path.dirname(path)
+                for entry in self.entries
+                for path in (entry["path"], entry.get("temp", entry["path"]))
+            )
+        ):
+            fsync_path(dir_path)
+
+    # Mark the transaction as complete by removing the journal and backups
+    def finish(self):
+        os.remove(self.journal_path)
+        for entry in self.entries:
+            if entry["type"] == "replace":
+                remove_if_exists(entry["backup"])
+
+    # Apply all staged changes durably and atomically
+    def commit(self):
+        if not self.entries:
+            return
+        try:
+            self.sync_temp_files()
+            self.write_journal()
+            self.apply()
+        except BaseException:
+            self.rollback()
+            raise
+        self.finish()
+
+    # Undo any staged or applied changes
+    def rollback(self):
+        for entry in reversed(self.entries):
+            rollback_entry(entry)
+        remove_if_exists(self.journal_path)
+
+
+# Remove the file at the given path, if it exists
+def remove_if_exists(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Undo the given journal entry, whether or not it has been applied yet
+def rollback_entry(entry):
+    if entry["type"] == "patch":
+        try:
+            with open(entry["path"], "r+b") as file:
+                file.seek(entry["start"])
+                file.write(entry["old"].encode())
+        except FileNotFoundError:
+            pass
+    elif entry["type"] == "create":
+        if os.path.exists(entry["temp"]):
+            remove_if_exists(entry["temp"])
+        else:
+            # The new file has already been moved into place
+            remove_if_exists(entry["path"])
+    elif os.path.exists(entry["temp"]):
+        # The original file has not been replaced yet
+        remove_if_exists(entry["temp"])
+        remove_if_exists(entry["backup"])
+    elif os.path.exists(entry["backup"]):
+        os.replace(entry["backup"], entry["path"])
+
+
+# Roll back the transaction recorded in the journal at the given path, if a
+# previous run was interrupted before completing it
+def recover(journal_path):
+    try:
+        with open(journal_path, "r") as journal_file:
+            entries = json.load(journal_file)
+    except FileNotFoundError:
+        return False
+    except ValueError:
+        # The journal itself was only partially written, so none of its
+        # changes can have been applied
+        entries = []
+    for entry in reversed(entries):
+        rollback_entry(entry)
+    os.remove(journal_path)
+    print(
+        "Rolled back interrupted changes to {} file(s)".format(len(entries)),
+        file=sys.stderr,
+    )
+    return True
@@ -0,0 +1,16 @@
+from dataclasses import dataclass, field
+
+
+# A planned change to the version within a particular file; each change
+# records the exact byte span of the current version so that it can be applied
+# later without scanning the file again; if every occurrence of the version is
+# to be replaced, the starts of the occurrences after the first are recorded
+# too
+@dataclass
+class VersionChange(object):
+    file_path: str
+    version_start: int
+    version_end: int
+    current_version: str
+    new_version: str
+    other_version_starts: list = field(default_factory=list)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+import re
+
+# The literal key which every match of VERSION_PATT (see __main__.py) contains,
+# in the case-folded form it is searched for
+VERSION_KEY = "version"
+
+# The number of bytes (or characters) of the contents which are case-folded at
+# a time while searching for the key; the contents are never folded as a whole,
+# since they may be a memory-mapped file much larger than memory
+KEY_CHUNK_SIZE = 64 * 1024
+
+# The characters which match the letters of the key when ignoring case, but
+# which str.lower() would not fold to them (or would fold to more than one
+# character); applying this first makes the folded contents line up exactly
+# with the original ones
+KEY_FOLD_TABLE = str.maketrans({"ſ": "s", "ı": "i", "İ": "i"})
+
+# The parts of VERSION_PATT which follow the key (and its closing quote, if
+# any), up to the start of the version, and the version itself; each is only
+# ever matched at a single position, where neither can backtrack more than
+# linearly
+SEPARATOR_PATT = r"(?P<key_quote>[\"\']?)\s*[=:]\s*(?P<value_quote>[\"\']?)"
+VERSION_VALUE_PATT = r"\d+\.\d+\.\d+[a-z0-9\-\+\.]*"
+
+
+# A match found by a VersionSearcher; it offers the same methods as the match
+# objects returned when searching with VERSION_PATT itself, though only for
+# the whole match and the "version" group
+class VersionMatch(object):
+    __slots__ = ("data", "match_start", "match_end", "version_start", "version_end")
+
+    def __init__(self, data, match_start, match_end, version_start, version_end):
+        self.data = data
+        self.match_start = match_start
+        self.match_end = match_end
+        self.version_start = version_start
+        self.version_end = version_end
+
+    def span(self, group=0):
+        if group == "version":
+            return (self.version_start, self.version_end)
+        if group != 0:
+            raise IndexError("no such group: {!r}".format(group))
+        return (self.match_start, self.match_end)
+
+    def start(self, group=0):
+        return self.span(group)[0]
+
+    def end(self, group=0):
+        return self.span(group)[1]
+
+    def group(self, group=0):
+        group_start, group_end = self.span(group)
+        return self.data[group_start:group_end]
+
+
+# Searches contents for the first match of VERSION_PATT in time linear to the
+# size of the contents, no matter what they contain; the regular expression
+# itself is retried at every position of the contents (and can backtrack
+# quadratically over a long version which is never closed), whereas this only
+# jumps between occurrences of the literal key (found with str.find() or
+# bytes.find()), and then checks the syntax which surrounds each of them with
+# anchored patterns which cannot backtrack; if a byte budget is given, no more
+# than that many bytes (or characters) of the contents are ever examined, and
+# contents whose version does not end within them are treated as having none
+class VersionSearcher(object):
+    def __init__(self, contents_type=str, byte_budget=None):
+        def compile_pattern(pattern):
+            if contents_type is bytes:
+                pattern = pattern.encode()
+            return re.compile(pattern, flags=re.IGNORECASE)
+
+        self.contents_type = contents_type
+        self.byte_budget = byte_budget
+        self.key = VERSION_KEY.encode() if contents_type is bytes else VERSION_KEY
+        self.separator_regex = compile_pattern(SEPARATOR_PATT)
+        self.version_regex = compile_pattern(VERSION_VALUE_PATT)
+        self.whitespace_regex = compile_pattern(r"\s*")
+
+    # Yield the start of every occurrence of the key (ignoring case) between
+    # the given positions of the given contents, in order
+    def iterate_key_starts(self, data, pos, endpos):
+        for chunk_start in range(pos, endpos, KEY_CHUNK_SIZE):
+            chunk_end = min(chunk_start + KEY_CHUNK_SIZE, endpos)
+            # Each chunk overlaps the next by just enough that occurrences of
+            # the key which straddle the two are still found (within the
+            # chunk in which they start)
+            chunk = data[chunk_start : min(chunk_end + len(self.key) - 1, endpos)]
+            if self.contents_type is str:
+                chunk = chunk.translate(KEY_FOLD_TABLE)
+            chunk = chunk.lower()
+            key_start = chunk.find(self.key)
+            while key_start != -1 and chunk_start + key_start < chunk_end:
+                yield chunk_start + key_start
+                key_start = chunk.find(self.key, key_start + len(self.key))
+
+    # Match the rest of VERSION_PATT around the occurrence of the key at the
+    # given position of the given contents, returning a VersionMatch, or None
+    # if the syntax around the key does not match
+    def match_around_key(self, data, key_start, pos, limit):
+        separator_match = self.separator_regex.match(
+            data, key_start + len(self.key), limit
+        )
+        if not separator_match:
+            return None
+        match_start = key_start
+        key_quote = separator_match.group("key_quote")
+        # A quote after the key must be matched by the same quote before it
+        if key_quote:
+            match_start -= 1
+            if match_start < pos or data[match_start:key_start] != key_quote:
+                return None
+        version_start = separator_match.end()
+        version_match = self.version_regex.match(data, version_start, limit)
+        if not version_match:
+            return None
+        version_end = version_match.end()
+        match_end = version_end
+        # The version is never backtracked into to find its closing quote,
+        # since the quote cannot be any of the characters of the version
+        value_quote = separator_match.group("value_quote")
+        if value_quote:
+            if match_end >= limit or data[match_end : match_end + 1] != value_quote:
+                return None
+            match_end += 1
+        match_end = self.whitespace_regex.match(data, match_end, limit).end()
+        return VersionMatch(data, match_start, match_end, version_start, version_end)
+
+    # Search the given contents (a str, bytes or any other buffer, such as a
+    # memory map) between the given positions for the first match of
+    # VERSION_PATT, exactly as the compiled pattern's search() method would,
+    # returning a VersionMatch, or None if there is no match (or the first
+    # match does not end within the byte budget)
+    def search(self, data, pos=0, endpos=None):
+        endpos = len(data) if endpos is None else min(endpos, len(data))
+        limit = endpos
+        if self.byte_budget is not None:
+            limit = min(endpos, pos + self.byte_budget)
+        for key_start in self.iterate_key_starts(data, pos, limit):
+            version_match = self.match_around_key(data, key_start, pos, limit)
+            if not version_match:
+                continue
+            # A match which reaches the end of the budget may have been cut
+            # short by it, and so cannot be trusted
+            if version_match.end() == limit < endpos:
+                return None
+            return version_match
+        return None
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+import re
+from functools import lru_cache
+
+# The pattern for a valid semantic version (per https://semver.org), with the
+# prerelease and build metadata captured as a whole
+SEMVER_REGEX = re.compile(
+    r"""
+    ^
+    (0|[1-9]\d*)
+    \.(0|[1-9]\d*)
+    \.(0|[1-9]\d*)
+    (?:-(
+        (?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)
+        (?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*
+    ))?
+    (?:\+(
+        [0-9a-zA-Z-]+
+        (?:\.[0-9a-zA-Z-]+)*
+    ))?
+    \Z
+    """,
+    flags=re.VERBOSE | re.ASCII,
+)
+
+# The prerelease to use when bumping the prerelease of a version which does not
+# have one
+DEFAULT_PRERELEASE = "rc.1"
+
+# The last run of digits within a prerelease, which is the part of it that is
+# incremented
+LAST_NUMBER_REGEX = re.compile(r"(\d+)\D*\Z", flags=re.ASCII)
+
+# The maximum number of distinct (version, increment type) pairs whose bumped
+# version is remembered; bulk bumps tend to share a handful of versions
+MAX_MEMOIZED_BUMPS = 1024
+
+
+# A parsed semantic version; the bump methods return a new version rather than
+# modifying this one
+class SemanticVersion(object):
+    __slots__ = ("major", "minor", "patch", "prerelease", "build")
+
+    def __init__(self, major, minor=0, patch=0, prerelease=None, build=None):
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.prerelease = prerelease
+        self.build = build
+
+    # Parse the given version string, raising a ValueError if it is not a
+    # valid semantic version
+    @classmethod
+    def parse(cls, version):
+        version_match = SEMVER_REGEX.match(version)
+        if not version_match:
+            raise ValueError("{} is not valid SemVer string".format(version))
+        major, minor, patch, prerelease, build = version_match.groups()
+        return cls(int(major), int(minor), int(patch), prerelease, build)
+
+    def __str__(self):
+        version = "{}.{}.{}".format(self.major, self.minor, self.patch)
+        if self.prerelease:
+            version += "-{}".format(self.prerelease)
+        if self.build:
+            version += "+{}".format(self.build)
+        return version
+
+    def bump_major(self):
+        return SemanticVersion(self.major + 1)
+
+    def bump_minor(self):
+        return SemanticVersion(self.major, self.minor + 1)
+
+    def bump_patch(self):
+        return SemanticVersion(self.major, self.minor, self.patch + 1)
+
+    # Increment the last number anywhere within the prerelease (keeping any
+    # leading zeros it has room for), as semver 3.0 does; a prerelease with no
+    # number at all (e.g. "beta") is left as it is
+    def bump_prerelease(self):
+        if self.prerelease is None:
+            prerelease = DEFAULT_PRERELEASE
+        else:
+            prerelease = self.prerelease
+            number_match = LAST_NUMBER_REGEX.search(prerelease)
+            if number_match:
+                next_number = str(int(number_match.group(1)) + 1)
+                number_start, number_end = number_match.span(1)
+                prerelease = (
+                    prerelease[: max(number_end - len(next_number), number_start)]
+                    + next_number
+                    + prerelease[number_end:]
+                )
+        return SemanticVersion(self.major, self.minor, self.patch, prerelease)
+
+
+# Return True if the given string is a valid semantic version
+def is_valid_version(version):
+    return SEMVER_REGEX.match(version) is not None
+
+
+# Increment the given part (major, minor, patch or prerelease) of the given
+# version string, returning the new version string
+@lru_cache(maxsize=MAX_MEMOIZED_BUMPS)
+def bump_version(version, increment_type):
+    return str(getattr(SemanticVersion.parse(version), f"bump_{increment_type}")())
+
+
+# Increment the given part of every one of the given version strings,
+# returning the new version strings in the same order
+def bump_versions(versions, increment_type):
+    return [bump_version(version, increment_type) for version in versions]
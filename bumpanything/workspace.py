@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+
+import os
+import os.path
+import re
+
+# The names of directories which never contain manifests worth bumping, and
+# which are therefore never descended into
+PRUNED_DIR_NAMES = frozenset(
+    (
+        ".git",
+        ".hg",
+        ".svn",
+        "node_modules",
+    )
+)
+
+# The names of files whose presence marks a directory as a virtual environment
+# (for venv/virtualenv and conda, respectively)
+VIRTUALENV_MARKER_NAMES = frozenset(("pyvenv.cfg", "conda-meta"))
+
+# The characters which make a path a glob pattern
+GLOB_MAGIC_REGEX = re.compile(r"[*?\[]")
+
+# The number of bytes of a list of paths (see iterate_listed_paths()) to read
+# at a time
+PATH_LIST_CHUNK_SIZE = 64 * 1024
+
+# The results of previous searches, keyed by root directory and file names;
+# this is only enabled (by setting it to a dictionary) in long-running
+# processes, such as the daemon (see find_manifest_paths_cached())
+discovery_cache = None
+
+
+# Translate a single .gitignore pattern into a compiled regular expression,
+# returning a tuple of (regex, is_negated, is_dir_only, is_anchored); returns
+# None for blank lines and comments
+def compile_gitignore_pattern(pattern):
+    pattern = pattern.rstrip("\n").rstrip("\r")
+    if not pattern.strip() or pattern.startswith("#"):
+        return None
+    # Trailing spaces are ignored unless escaped
+    if not pattern.endswith("\\ "):
+        pattern = pattern.rstrip(" ")
+    is_negated = pattern.startswith("!")
+    if is_negated:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\"):
+        pattern = pattern[1:]
+    is_dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    # A pattern containing a slash (other than a trailing one) is relative to
+    # the directory containing the .gitignore file
+    is_anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    regex_parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex_parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex_parts.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex_parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex_parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex_parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2 :]:
+            class_end = pattern.index("]", i + 2)
+            class_body = pattern[i + 1 : class_end].replace("\\", "\\\\")
+            if class_body.startswith("!"):
+                class_body = "^" + class_body[1:]
+            regex_parts.append("[{}]".format(class_body))
+            i = class_end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            regex_parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            regex_parts.append(re.escape(pattern[i]))
+            i += 1
+    return (
+        re.compile("".join(regex_parts) + r"\Z"),
+        is_negated,
+        is_dir_only,
+        is_anchored,
+    )
+
+
+# Read and compile the rules in the .gitignore file at the given path
+def read_gitignore_rules(gitignore_path):
+    try:
+        with open(gitignore_path, "r", errors="replace") as gitignore_file:
+            compiled_patterns = (
+                compile_gitignore_pattern(line) for line in gitignore_file
+            )
+            return [rule for rule in compiled_patterns if rule]
+    except OSError:
+        return []
+
+
+# Determine whether the entry at the given path (relative to the workspace
+# root) is ignored by any of the given rule sets, where each rule set is a
+# tuple of (base_rel_dir_path, rules) collected from the root down; as with
+# Git, the last matching rule wins
+def is_ignored(rel_path, is_dir, rule_sets):
+    is_path_ignored = False
+    base_name = rel_path.rpartition("/")[2]
+    for base_rel_dir_path, rules in rule_sets:
+        if base_rel_dir_path:
+            path_from_base = rel_path[len(base_rel_dir_path) + 1 :]
+        else:
+            path_from_base = rel_path
+        for regex, is_negated, is_dir_only, is_anchored in rules:
+            if is_dir_only and not is_dir:
+                continue
+            if regex.match(path_from_base if is_anchored else base_name):
+                is_path_ignored = not is_negated
+    return is_path_ignored
+
+
+# Walk the directory tree under the given root exactly once, returning the
+# paths (relative to the root) of every manifest whose name appears in the
+# given collection of file names; a WordPress plugin file named after its
+# containing directory (i.e. <dirname>.php) is also matched in every directory;
+# VCS metadata, node_modules, virtual environments, and anything ignored via
+# .gitignore are pruned along the way; if a list of dependencies is given, the
+# path and signature of every directory and .gitignore file read is appended
+# to it
+def find_manifest_paths(root_dir_path, file_names, dependencies=None):
+    # Precompute a lookup table so that every directory entry can be matched
+    # with a single set membership test, preserving the order of the given
+    # names for deterministic output within each directory
+    file_name_order = {file_name: i for i, file_name in enumerate(file_names)}
+    manifest_paths = []
+    # Each stack item is (abs_dir_path, rel_dir_path, rule_sets)
+    dir_stack = [(os.path.abspath(root_dir_path), "", ())]
+    while dir_stack:
+        abs_dir_path, rel_dir_path, rule_sets = dir_stack.pop()
+        if dependencies is not None:
+            # The directory is stat'd before it is read so that any change
+            # made while reading it invalidates the results
+            dependencies.append((abs_dir_path, get_path_signature(abs_dir_path)))
+        try:
+            with os.scandir(abs_dir_path) as dir_entries:
+                entries = sorted(dir_entries, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        entry_names = {entry.name for entry in entries}
+        if not entry_names.isdisjoint(VIRTUALENV_MARKER_NAMES):
+            continue
+        if ".gitignore" in entry_names:
+            gitignore_path = os.path.join(abs_dir_path, ".gitignore")
+            if dependencies is not None:
+                dependencies.append(
+                    (gitignore_path, get_path_signature(gitignore_path))
+                )
+            rules = read_gitignore_rules(gitignore_path)
+            if rules:
+                rule_sets = (*rule_sets, (rel_dir_path, rules))
+        plugin_file_name = "{}.php".format(os.path.basename(abs_dir_path))
+        matched_names = []
+        sub_dirs = []
+        for entry in entries:
+            entry_rel_path = (
+                "{}/{}".format(rel_dir_path, entry.name) if rel_dir_path else entry.name
+            )
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in PRUNED_DIR_NAMES and not (
+                    rule_sets and is_ignored(entry_rel_path, True, rule_sets)
+                ):
+                    sub_dirs.append((entry.path, entry_rel_path, rule_sets))
+            elif entry.name in file_name_order or entry.name == plugin_file_name:
+                if entry.is_file() and not (
+                    rule_sets and is_ignored(entry_rel_path, False, rule_sets)
+                ):
+                    matched_names.append(entry.name)
+        matched_names.sort(key=lambda name: file_name_order.get(name, len(file_names)))
+        manifest_paths.extend(
+            os.path.join(rel_dir_path, name) if rel_dir_path else name
+            for name in matched_names
+        )
+        # Push in reverse so that subdirectories are visited in sorted order
+        dir_stack.extend(reversed(sub_dirs))
+    return manifest_paths
+
+
+# Return the parts of the stat result for the given path which change whenever
+# it is modified (for a directory, whenever an entry is added, removed or
+# renamed), or None if the path does not exist
+def get_path_signature(path):
+    try:
+        path_stat = os.stat(path)
+    except OSError:
+        return None
+    return (path_stat.st_mtime_ns, path_stat.st_size, path_stat.st_ino)
+
+
+# Same as find_manifest_paths(), but if the discovery cache is enabled (by
+# setting it to a dictionary), reuse the results of a previous search as long
+# as none of the directories or .gitignore files it read have changed since
+def find_manifest_paths_cached(root_dir_path, file_names):
+    if discovery_cache is None:
+        return find_manifest_paths(root_dir_path, file_names)
+    cache_key = (os.path.abspath(root_dir_path), tuple(file_names))
+    cached_search = discovery_cache.get(cache_key)
+    if cached_search and all(
+        get_path_signature(path) == path_signature
+        for path, path_signature in cached_search[0]
+    ):
+        return list(cached_search[1])
+    dependencies = []
+    manifest_paths = find_manifest_paths(root_dir_path, file_names, dependencies)
+    discovery_cache[cache_key] = (dependencies, list(manifest_paths))
+    return manifest_paths
+
+
+# Return the given path relative to the current directory, with forward
+# slashes ("" for the current directory itself)
+def get_rel_path(path):
+    rel_path = os.path.relpath(path)
+    return "" if rel_path == os.curdir else rel_path.replace(os.sep, "/")
+
+
+# Return True if the given path lies within the given directory (where both are
+# relative to the current directory, with forward slashes, and "" denotes the
+# current directory itself)
+def is_path_within(path, dir_path):
+    return not dir_path or path == dir_path or path.startswith(dir_path + "/")
+
+
+# Return the paths of the manifests with any of the given file names (or named
+# after their directory, as with find_manifest_paths()) directly within the
+# given directory, which is relative to the current directory, with forward
+# slashes ("" for the current directory itself); directories which a workspace
+# search would prune are never considered
+def list_dir_manifest_paths(rel_dir_path, file_names):
+    dir_names = rel_dir_path.split("/") if rel_dir_path else []
+    if not PRUNED_DIR_NAMES.isdisjoint(dir_names):
+        return []
+    plugin_file_name = "{}.php".format(
+        dir_names[-1] if dir_names else os.path.basename(os.getcwd())
+    )
+    return [
+        os.path.join(*dir_names, file_name)
+        for file_name in (*file_names, plugin_file_name)
+        if os.path.isfile(os.path.join(*dir_names, file_name))
+    ]
+
+
+# Return the paths of the manifests which own any of the given changed paths
+# (relative to the current directory, with forward slashes), where a path is
+# owned by the manifests of the nearest directory containing it which has any;
+# get_dir_manifest_paths() is given the path of a directory (as with
+# list_dir_manifest_paths()) and must return the manifests within it; it is
+# called at most once per directory, since the owner found for a directory is
+# recorded for every directory passed on the way up to it
+def find_owning_manifest_paths(changed_paths, get_dir_manifest_paths):
+    dir_manifest_paths = {}
+    # The owning directory of each directory visited so far (or None if no
+    # directory above it has any manifests)
+    owner_dir_paths = {}
+    for changed_path in changed_paths:
+        dir_path = changed_path.rpartition("/")[0]
+        passed_dir_paths = []
+        while dir_path not in owner_dir_paths:
+            passed_dir_paths.append(dir_path)
+            dir_manifest_paths[dir_path] = get_dir_manifest_paths(dir_path)
+            if dir_manifest_paths[dir_path]:
+                owner_dir_path = dir_path
+                break
+            if not dir_path:
+                owner_dir_path = None
+                break
+            dir_path = dir_path.rpartition("/")[0]
+        else:
+            owner_dir_path = owner_dir_paths[dir_path]
+        for passed_dir_path in passed_dir_paths:
+            owner_dir_paths[passed_dir_path] = owner_dir_path
+    # List the owners in the same (depth-first) order as a workspace search
+    return [
+        manifest_path
+        for owner_dir_path in sorted(
+            set(owner_dir_paths.values()) - {None},
+            key=lambda dir_path: dir_path.split("/") if dir_path else [],
+        )
+        for manifest_path in dir_manifest_paths[owner_dir_path]
+    ]
+
+
+# Return True if the given path is a glob pattern (rather than the path of a
+# file whose name merely contains glob characters)
+def is_glob_pattern(path):
+    return bool(GLOB_MAGIC_REGEX.search(path)) and not os.path.exists(path)
+
+
+# Translate a single segment of a glob pattern (i.e. one containing no
+# slashes) into a compiled regular expression; as in the shell, wildcards
+# never match a leading dot
+def compile_glob_segment(segment):
+    regex_parts = []
+    i = 0
+    while i < len(segment):
+        if segment[i] == "*":
+            regex_parts.append("[^/]*")
+        elif segment[i] == "?":
+            regex_parts.append("[^/]")
+        elif segment[i] == "[" and "]" in segment[i + 2 :]:
+            class_end = segment.index("]", i + 2)
+            class_body = segment[i + 1 : class_end].replace("\\", "\\\\")
+            if class_body.startswith("!"):
+                class_body = "^" + class_body[1:]
+            regex_parts.append("[{}]".format(class_body))
+            i = class_end
+        else:
+            regex_parts.append(re.escape(segment[i]))
+        i += 1
+    if not segment.startswith("."):
+        regex_parts.insert(0, "(?!\\.)")
+    return re.compile("".join(regex_parts) + r"\Z")
+
+
+# Expand the given glob pattern (where "**" matches any number of
+# directories) into the paths of the files it matches, in the same
+# depth-first order as a workspace search; every directory below the literal
+# part of the pattern which a workspace search would prune (see
+# find_manifest_paths()) is pruned here too, so each directory is read at most
+# once, and only if the pattern could match something within it
+def find_glob_paths(pattern):
+    segments = pattern.replace(os.sep, "/").split("/")
+    literal_segment_count = 0
+    while literal_segment_count < len(segments) - 1 and not GLOB_MAGIC_REGEX.search(
+        segments[literal_segment_count]
+    ):
+        literal_segment_count += 1
+    base_dir_path = "/".join(segments[:literal_segment_count])
+    if literal_segment_count and not base_dir_path:
+        # The pattern is absolute, and its literal part is the root directory
+        base_dir_path = "/"
+    segment_regexes = [
+        None if segment == "**" else compile_glob_segment(segment)
+        for segment in segments[literal_segment_count:]
+    ]
+    last_segment_index = len(segment_regexes) - 1
+
+    # Return the given set of segment indices, along with every index which a
+    # "**" can match no directories to reach
+    def get_segment_closure(segment_indices):
+        closure = set(segment_indices)
+        for segment_index in sorted(segment_indices):
+            while (
+                segment_index < last_segment_index
+                and segment_regexes[segment_index] is None
+            ):
+                segment_index += 1
+                closure.add(segment_index)
+        return closure
+
+    # Within the current directory, the .gitignore files above the literal
+    # part of the pattern apply too
+    rule_sets = ()
+    rel_base_dir_path = ""
+    base_dir_names = [
+        dir_name
+        for dir_name in segments[:literal_segment_count]
+        if dir_name != os.curdir
+    ]
+    if not os.path.isabs(base_dir_path) and os.pardir not in base_dir_names:
+        for i in range(len(base_dir_names)):
+            rules = read_gitignore_rules(
+                os.path.join(*base_dir_names[:i], ".gitignore")
+            )
+            if rules:
+                rule_sets = (*rule_sets, ("/".join(base_dir_names[:i]), rules))
+        rel_base_dir_path = "/".join(base_dir_names)
+    glob_paths = []
+    # Each stack item is (dir_path, rel_dir_path, segment_indices, rule_sets),
+    # where the segment indices are those the entries of the directory must
+    # match
+    dir_stack = [(base_dir_path or os.curdir, rel_base_dir_path, {0}, rule_sets)]
+    while dir_stack:
+        dir_path, rel_dir_path, segment_indices, rule_sets = dir_stack.pop()
+        try:
+            with os.scandir(dir_path) as dir_entries:
+                entries = sorted(dir_entries, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        entry_names = {entry.name for entry in entries}
+        if rel_dir_path != rel_base_dir_path and not entry_names.isdisjoint(
+            VIRTUALENV_MARKER_NAMES
+        ):
+            continue
+        if ".gitignore" in entry_names:
+            rules = read_gitignore_rules(os.path.join(dir_path, ".gitignore"))
+            if rules:
+                rule_sets = (*rule_sets, (rel_dir_path, rules))
+        segment_indices = get_segment_closure(segment_indices)
+        sub_dirs = []
+        for entry in entries:
+            entry_rel_path = (
+                "{}/{}".format(rel_dir_path, entry.name) if rel_dir_path else entry.name
+            )
+            matched_indices = set()
+            for segment_index in segment_indices:
+                segment_regex = segment_regexes[segment_index]
+                if segment_regex is None:
+                    # "**" only descends into directories which are not hidden
+                    if not entry.name.startswith("."):
+                        matched_indices.add(segment_index)
+                elif segment_regex.match(entry.name):
+                    matched_indices.add(segment_index + 1)
+            if not matched_indices:
+                continue
+            # Symlinked directories are not followed, as with a workspace search
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if not is_dir and not entry.is_file():
+                continue
+            if rule_sets and is_ignored(entry_rel_path, is_dir, rule_sets):
+                continue
+            if is_dir:
+                matched_indices.discard(last_segment_index + 1)
+                if matched_indices and entry.name not in PRUNED_DIR_NAMES:
+                    sub_dirs.append(
+                        (entry.path, entry_rel_path, matched_indices, rule_sets)
+                    )
+            elif last_segment_index + 1 in matched_indices or (
+                segment_regexes[last_segment_index] is None
+                and last_segment_index in matched_indices
+            ):
+                glob_paths.append(entry.path if base_dir_path else entry_rel_path)
+        # Push in reverse so that subdirectories are visited in sorted order
+        dir_stack.extend(reversed(sub_dirs))
+    return glob_paths
+
+
+# Yield each path listed in the given binary file (such as stdin), which may
+# be separated by NUL characters (as from `find -print0`) or by newlines; the
+# separator is chosen from the first chunk read, and the file is read one
+# chunk at a time, so the list is never held in memory as a whole
+def iterate_listed_paths(list_file):
+    separator = None
+    pending_data = b""
+    for chunk in iter(lambda: list_file.read(PATH_LIST_CHUNK_SIZE), b""):
+        if separator is None:
+            separator = b"\0" if b"\0" in chunk else b"\n"
+        *listed_paths, pending_data = (pending_data + chunk).split(separator)
+        for listed_path in listed_paths:
+            if separator == b"\n":
+                listed_path = listed_path.rstrip(b"\r")
+            if listed_path:
+                yield os.fsdecode(listed_path)
+    if pending_data.rstrip(b"\r\n"):
+        yield os.fsdecode(
+            pending_data.rstrip(b"\r") if separator == b"\n" else pending_data
+        )
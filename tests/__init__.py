@@ -11,7 +11,9 @@ from tests.conftest import test_dir_path
 
 
 def create_mock_file(mock_file_name, file_contents):
-    with open(os.path.join(test_dir_path, mock_file_name), "w") as mock_file:
+    mock_file_path = os.path.join(test_dir_path, mock_file_name)
+    os.makedirs(os.path.dirname(mock_file_path), exist_ok=True)
+    with open(mock_file_path, "w") as mock_file:
         mock_file.write(file_contents)
 
 
@@ -10,10 +10,12 @@ import pytest
 temp_dir_path = tempfile.gettempdir()
 temp_subdir_name = "bump-test"
 test_dir_path = os.path.join(temp_dir_path, temp_subdir_name)
+# The user cache directory used by the tests, kept apart from the workspace
+test_cache_dir_path = os.path.join(temp_dir_path, "bump-test-cache")
 
 
 @pytest.fixture(autouse=True)
-def test_workspace():
+def test_workspace(monkeypatch):
     """
     Create a temporary workspace for running tests and clean it up when done.
     """
@@ -22,9 +24,11 @@ def test_workspace():
     except shutil.Error:
         pass
     os.chdir(test_dir_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", test_cache_dir_path)
     yield
     os.chdir(temp_dir_path)
     try:
         shutil.rmtree(test_dir_path)
     except OSError:
         pass
+    shutil.rmtree(test_cache_dir_path, ignore_errors=True)
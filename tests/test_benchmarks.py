@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+import os.path
+
+import benchmarks.suite as suite
+
+
+def test_run_benchmarks():
+    """should time each requested benchmark against a scaled-down workload"""
+    benchmark_names = [
+        "bump_version_for_files.workspace",
+        "handle_git_operations.native",
+        "search_version.unclosed_version",
+    ]
+    metrics = suite.run_benchmarks(
+        benchmark_names=benchmark_names, scale=0.001, repeat_count=1
+    )
+    assert sorted(metrics.keys()) == benchmark_names
+    assert all(metric_value > 0 for metric_value in metrics.values())
+
+
+def test_baseline_round_trip():
+    """should save and load baselines"""
+    baseline_path = os.path.abspath("baseline.json")
+    suite.save_baseline(baseline_path, {"main.workspace": 1.5}, scale=0.5)
+    assert suite.load_baseline(baseline_path) == ({"main.workspace": 1.5}, 0.5)
+
+
+def test_regressed_metric_names():
+    """should only flag metrics which exceed their baseline past the tolerance"""
+    baseline_metrics = {"a": 1.0, "b": 1.0, "c": 1.0}
+    metrics = {"a": 1.1, "b": 1.3, "c": 0.5, "d": 9.0}
+    assert suite.get_regressed_metric_names(
+        metrics, baseline_metrics, tolerance=0.2
+    ) == ["b"]
@@ -96,3 +96,75 @@ def test_no_change(capsys, cli_args, old_version, new_version):
         captured = capsys.readouterr()
         assert "No files updated" in captured.out
         assert file_contents == read_mock_file(file_name)
+
+
+def test_bump_capitalized_version_key(capsys):
+    """should bump a capitalized version key, like in a WordPress theme header"""
+    file_name = "style.css"
+    file_contents = """/*
+    Theme Name: Foo
+    Version: 1.2.3
+    */
+    """
+    with use_cli_args("patch", file_name):
+        create_mock_file(file_name, file_contents)
+        bump.main()
+        captured = capsys.readouterr()
+        assert f"{file_name}: 1.2.3 -> 1.2.4" in captured.out
+        assert "Version: 1.2.4\n" in read_mock_file(file_name)
+
+
+def test_replace_version_in_file_contents():
+    """should only replace the first version in the file contents"""
+    assert bump.replace_version_in_file_contents(
+        'version = "1.2.3"\nversion = "1.2.3"\n', "minor"
+    ) == ("1.2.3", "1.3.0", 'version = "1.3.0"\nversion = "1.2.3"\n')
+    assert bump.replace_version_in_file_contents("no version", "minor") == (
+        None,
+        None,
+        None,
+    )
+
+
+@pytest.mark.parametrize(
+    ("jobs", "executor_type"),
+    [
+        ("1", "thread"),
+        ("4", "thread"),
+        ("3", "process"),
+    ],
+)
+def test_bump_parallel(capsys, jobs, executor_type):
+    """should bump files in parallel, reporting results in input order"""
+    file_names = [f"foo{i}.toml" for i in range(10)]
+    for file_name in file_names:
+        create_mock_file(file_name, 'version = "1.2.3"\n')
+    create_mock_file("bar.toml", "no version\n")
+    with use_cli_args(
+        "minor",
+        *file_names[:5],
+        "bar.toml",
+        "missing.toml",
+        *file_names[5:],
+        "--no-commit",
+        "--jobs",
+        jobs,
+        "--executor",
+        executor_type,
+    ):
+        bump.main()
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == [
+        f"{file_name}: 1.2.3 -> 1.3.0" for file_name in file_names
+    ]
+    assert "missing.toml: file not found" in captured.err
+    for file_name in file_names:
+        assert read_mock_file(file_name) == 'version = "1.3.0"\n'
+
+
+def test_invalid_jobs(capsys):
+    """should reject a non-positive number of jobs"""
+    with use_cli_args("minor", "--jobs", "0"):
+        with pytest.raises(SystemExit):
+            bump.main()
+    assert "must be a positive integer" in capsys.readouterr().err
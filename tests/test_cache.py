@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import os
+from unittest.mock import patch
+
+import bumpanything.__main__ as bump
+import bumpanything.cache as cache
+import bumpanything.file_io as file_io
+from tests import (
+    create_mock_file,
+    init_git_repo,
+    read_mock_file,
+    run_git_command,
+    use_cli_args,
+)
+
+
+def test_cached_location_skips_scan(capsys):
+    """should trust the cached version location instead of rescanning"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("patch", "foo.toml", "--no-commit"):
+        bump.main()
+    assert os.path.exists(bump.get_cache_location()[0])
+    with use_cli_args("patch", "foo.toml", "--no-commit"):
+        with patch(
+            "bumpanything.file_io.find_version_in_file",
+            wraps=file_io.find_version_in_file,
+        ) as find_mock:
+            bump.main()
+    assert not find_mock.called
+    assert "foo.toml: 1.2.4 -> 1.2.5" in capsys.readouterr().out
+    assert read_mock_file("foo.toml") == 'version = "1.2.5"\n'
+
+
+def test_stale_cache_entry_rescans(capsys):
+    """should rescan a file which has changed since it was cached"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("patch", "foo.toml", "--no-commit"):
+        bump.main()
+    create_mock_file("foo.toml", 'name = "foo"\nversion = "2.0.0"\n')
+    with use_cli_args("patch", "foo.toml", "--no-commit"):
+        bump.main()
+    assert "foo.toml: 2.0.0 -> 2.0.1" in capsys.readouterr().out
+    assert read_mock_file("foo.toml") == 'name = "foo"\nversion = "2.0.1"\n'
+
+
+def test_no_cache(capsys):
+    """should neither read nor write the cache when --no-cache is passed"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("patch", "foo.toml", "--no-commit", "--no-cache"):
+        bump.main()
+    assert not os.path.exists(bump.get_cache_location()[0])
+
+
+def test_lru_eviction():
+    """should evict the least recently used entries beyond the size bound"""
+    version_cache = cache.VersionCache(cache.CACHE_FILE_NAME, max_entries=2)
+    version_cache.set("a", (1, 2, 3), (0, 5, "1.2.3"))
+    version_cache.set("b", (1, 2, 3), (0, 5, "1.2.3"))
+    version_cache.get("a")
+    version_cache.set("c", (1, 2, 3), (0, 5, "1.2.3"))
+    version_cache.save()
+    version_cache = cache.VersionCache.load(cache.CACHE_FILE_NAME, max_entries=2)
+    assert list(version_cache.entries.keys()) == ["a", "c"]
+
+
+def test_corrupt_cache_ignored(capsys):
+    """should ignore a cache file which cannot be parsed"""
+    create_mock_file(bump.get_cache_location()[0], "{not json")
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("patch", "foo.toml", "--no-commit"):
+        bump.main()
+    assert "foo.toml: 1.2.3 -> 1.2.4" in capsys.readouterr().out
+
+
+def test_cache_in_git_dir(capsys):
+    """should keep the cache within the Git directory, outside the work tree"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    init_git_repo()
+    with use_cli_args("patch", "foo.toml", "--no-commit"):
+        bump.main()
+    assert os.path.exists(os.path.join(".git", cache.CACHE_FILE_NAME))
+    assert run_git_command("status", "--porcelain") == " M foo.toml\n"
+
+
+def test_cache_outside_git_repository():
+    """should keep the cache in the user's cache directory outside a repository"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("patch", "foo.toml", "--no-commit"):
+        bump.main()
+    assert os.listdir(".") == ["foo.toml"]
+    cache_path = cache.get_user_cache_path(os.curdir)
+    assert cache_path.startswith(os.environ["XDG_CACHE_HOME"])
+    assert list(cache.VersionCache.load(cache_path, os.curdir).entries) == ["foo.toml"]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.workspace as workspace
+from tests import (
+    create_mock_file,
+    init_git_repo,
+    read_mock_file,
+    run_git_command,
+    use_cli_args,
+)
+
+PACKAGE_JSON_CONTENTS = """{
+    "name": "foo",
+    "version": "1.2.3"
+}"""
+
+
+def create_monorepo():
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("README.md", "# Foo\n")
+    create_mock_file("packages/a/package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("packages/a/src/index.js", "a();\n")
+    create_mock_file("packages/b/Cargo.toml", 'version = "1.2.3"\n')
+    create_mock_file("packages/b/src/lib.rs", "fn b() {}\n")
+    init_git_repo()
+    run_git_command("tag", "v1.2.3")
+
+
+def test_workspace_changed_since_last_tag(capsys):
+    """should only bump the manifests owning files changed since the last tag"""
+    create_monorepo()
+    create_mock_file("packages/a/src/index.js", "a(1);\n")
+    with use_cli_args(
+        "patch", "--workspace", "--changed-since-last-tag", "--no-commit"
+    ):
+        bump.main()
+    assert capsys.readouterr().out == "packages/a/package.json: 1.2.3 -> 1.2.4\n"
+    assert '"version": "1.2.3"' in read_mock_file("package.json")
+    assert 'version = "1.2.3"' in read_mock_file("packages/b/Cargo.toml")
+
+
+def test_workspace_changed_since_ref(capsys):
+    """should attribute changed files to the nearest manifest above them"""
+    create_monorepo()
+    create_mock_file("README.md", "# Bar\n")
+    create_mock_file("packages/b/src/lib.rs", "fn b() { 1 }\n")
+    with use_cli_args("patch", "--workspace", "--changed-since", "HEAD", "--no-commit"):
+        bump.main()
+    assert capsys.readouterr().out == (
+        "package.json: 1.2.3 -> 1.2.4\npackages/b/Cargo.toml: 1.2.3 -> 1.2.4\n"
+    )
+
+
+def test_workspace_roots_changed_since(capsys):
+    """should ignore changes owned by manifests outside the given roots"""
+    create_monorepo()
+    create_mock_file("README.md", "# Bar\n")
+    create_mock_file("packages/a/src/index.js", "a(1);\n")
+    with use_cli_args(
+        "patch",
+        "packages/b",
+        "--workspace",
+        "--changed-since",
+        "v1.2.3",
+        "--no-commit",
+    ):
+        bump.main()
+    assert capsys.readouterr().out == "No files updated\n"
+
+
+def test_file_paths_changed_since(capsys):
+    """should only bump the given files owning changed files"""
+    create_monorepo()
+    create_mock_file("packages/b/src/lib.rs", "fn b() { 1 }\n")
+    with use_cli_args(
+        "patch",
+        "package.json",
+        "packages/b/Cargo.toml",
+        "--changed-since",
+        "HEAD",
+        "--no-commit",
+    ):
+        bump.main()
+    assert capsys.readouterr().out == "packages/b/Cargo.toml: 1.2.3 -> 1.2.4\n"
+
+
+def test_changed_since_last_custom_tag(capsys):
+    """should find the latest tag matching the tag name template"""
+    create_monorepo()
+    create_mock_file("packages/a/src/index.js", "a(1);\n")
+    run_git_command("commit", "-am", "Change a")
+    run_git_command("tag", "release/1.2.3")
+    create_mock_file("packages/b/src/lib.rs", "fn b() { 1 }\n")
+    with use_cli_args(
+        "patch",
+        "--workspace",
+        "--changed-since-last-tag",
+        "--tag-name",
+        "release/{new_version}",
+        "--no-commit",
+    ):
+        bump.main()
+    assert capsys.readouterr().out == "packages/b/Cargo.toml: 1.2.3 -> 1.2.4\n"
+
+
+def test_changed_since_last_tag_without_tag():
+    """should abort if no tag matches the tag name template"""
+    create_monorepo()
+    with use_cli_args(
+        "patch",
+        "--workspace",
+        "--changed-since-last-tag",
+        "--tag-name",
+        "release/{new_version}",
+        "--no-commit",
+    ):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert "no tag matching release/* was found" in str(exit_info.value.code)
+
+
+def test_changed_since_unknown_ref():
+    """should abort if the changes since the ref cannot be found"""
+    create_monorepo()
+    with use_cli_args("patch", "--changed-since", "nonexistent", "--no-commit"):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert "changes since nonexistent could not be found" in str(exit_info.value.code)
+
+
+def test_find_owning_manifest_paths():
+    """should list each directory's manifests at most once per directory"""
+    manifest_dir_index = {
+        "": ["package.json"],
+        "a": ["a/package.json", "a/setup.py"],
+        "a/b": ["a/b/Cargo.toml"],
+    }
+    visited_dir_paths = []
+
+    def get_dir_manifest_paths(rel_dir_path):
+        visited_dir_paths.append(rel_dir_path)
+        return manifest_dir_index.get(rel_dir_path, [])
+
+    assert workspace.find_owning_manifest_paths(
+        ["a/b/c/d.rs", "a/x/y.py", "a/b/c/e.rs", "a/x/z/w.py", "c.md"],
+        get_dir_manifest_paths,
+    ) == ["package.json", "a/package.json", "a/setup.py", "a/b/Cargo.toml"]
+    assert sorted(visited_dir_paths) == ["", "a", "a/b", "a/b/c", "a/x", "a/x/z"]
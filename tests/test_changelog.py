@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+import datetime
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.changelog as changelog
+from tests import (
+    create_mock_file,
+    init_git_repo,
+    read_mock_file,
+    run_git_command,
+    use_cli_args,
+)
+
+RELEASE_DATE = datetime.date.today().isoformat()
+
+
+def commit_change(file_name, message):
+    create_mock_file(file_name, message)
+    run_git_command("add", file_name)
+    run_git_command("commit", "-m", message)
+    return run_git_command("rev-parse", "--short=7", "HEAD").strip()
+
+
+def create_released_repo():
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    init_git_repo()
+    commit_change("old.txt", "feat: released before")
+    run_git_command("tag", "v1.2.3")
+
+
+@pytest.mark.parametrize(
+    ("message", "commit_metadata"),
+    [
+        ("feat(parser)!: support arrays\n", ["feat", "parser", "support arrays", True]),
+        ("Fix: handle empty files", ["fix", None, "handle empty files", False]),
+        (
+            "perf: scan faster\n\nBREAKING CHANGE: drops Python 3.8\n",
+            ["perf", None, "scan faster", True],
+        ),
+        (
+            "Update README\n\nfeat: not a subject\n",
+            [None, None, "Update README", False],
+        ),
+    ],
+)
+def test_parse_commit_message(message, commit_metadata):
+    """should parse the type, scope and description of conventional commits"""
+    assert changelog.parse_commit_message(message) == commit_metadata
+
+
+def test_release_with_changelog(capsys):
+    """should prepend grouped release notes to the changelog in the release commit"""
+    create_released_repo()
+    create_mock_file("CHANGELOG.md", "# Changelog\n\n## 1.2.3\n")
+    run_git_command("add", "CHANGELOG.md")
+    run_git_command("commit", "-m", "docs: add changelog")
+    docs_id = run_git_command("rev-parse", "--short=7", "HEAD").strip()
+    fix_id = commit_change("a.txt", "fix(cli): handle empty files")
+    feat_id = commit_change("b.txt", "feat: add --changelog")
+    other_id = commit_change("c.txt", "Tidy up")
+    breaking_id = commit_change("d.txt", "refactor!: drop the old API")
+    with use_cli_args("minor", "--changelog"):
+        bump.main()
+    assert read_mock_file("CHANGELOG.md") == (
+        "# Changelog\n\n"
+        "## 1.3.0 ({})\n\n"
+        "### BREAKING CHANGES\n\n"
+        "- drop the old API ({})\n\n"
+        "### Features\n\n"
+        "- add --changelog ({})\n\n"
+        "### Bug Fixes\n\n"
+        "- **cli:** handle empty files ({})\n\n"
+        "### Documentation\n\n"
+        "- add changelog ({})\n\n"
+        "### Other Changes\n\n"
+        "- Tidy up ({})\n\n"
+        "## 1.2.3\n"
+    ).format(
+        RELEASE_DATE,
+        breaking_id,
+        feat_id,
+        fix_id,
+        docs_id,
+        other_id,
+    )
+    assert "CHANGELOG.md: added release notes for 1.3.0\n" in capsys.readouterr().out
+    assert run_git_command("show", "--name-only", "--format=", "v1.3.0") == (
+        "CHANGELOG.md\npackage.json\n"
+    )
+
+
+def test_create_changelog():
+    """should create the changelog if there is none, from every commit if untagged"""
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    init_git_repo()
+    with use_cli_args("patch", "--changelog", "--no-commit"):
+        bump.main()
+    assert read_mock_file("CHANGELOG.md").startswith(
+        "## 1.2.4 ({})\n\n### Other Changes\n\n- Initial commit (".format(RELEASE_DATE)
+    )
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat("CHANGELOG.md").st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_changelog_dry_run(capsys):
+    """should show the release notes without writing the changelog"""
+    create_released_repo()
+    feat_id = commit_change("a.txt", "feat: add a")
+    with use_cli_args("patch", "--changelog", "--dry-run"):
+        bump.main()
+    assert capsys.readouterr().out.endswith(
+        "--- /dev/null\n"
+        "+++ b/CHANGELOG.md\n"
+        "@@ -0,0 +1,6 @@\n"
+        "+## 1.2.4 ({})\n"
+        "+\n"
+        "+### Features\n"
+        "+\n"
+        "+- add a ({})\n"
+        "+\n".format(RELEASE_DATE, feat_id)
+    )
+    assert not os.path.exists("CHANGELOG.md")
+
+
+def test_changelog_commit_cache():
+    """should parse each commit only once, however many releases include it"""
+    create_released_repo()
+    commit_change("a.txt", "feat: add a")
+    with patch(
+        "bumpanything.changelog.parse_commit_message",
+        wraps=changelog.parse_commit_message,
+    ) as parse_mock:
+        with use_cli_args("patch", "--changelog", "--no-commit"):
+            bump.main()
+        run_git_command("checkout", "--", "package.json")
+        os.remove("CHANGELOG.md")
+        with use_cli_args("minor", "--changelog", "--no-commit"):
+            bump.main()
+    assert parse_mock.call_count == 1
+    with open(bump.get_cache_location()[0]) as cache_file:
+        assert list(json.load(cache_file)["commits"].values()) == [
+            ["feat", None, "add a", False]
+        ]
+    assert "## 1.3.0" in read_mock_file("CHANGELOG.md")
+
+
+def test_changelog_outside_git_repository():
+    """should abort when not in a Git repository"""
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    with use_cli_args("patch", "--changelog", "--no-commit"):
+        with patch("bumpanything.git.get_repository", return_value=None):
+            with pytest.raises(SystemExit) as exit_info:
+                bump.main()
+    assert "within a Git repository" in str(exit_info.value.code)
+    assert read_mock_file("package.json") == '{"version": "1.2.3"}'
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+from unittest.mock import patch
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.git as git
+import bumpanything.instrumentation as instrumentation
+from tests import create_mock_file, init_git_repo, run_git_command, use_cli_args
+
+
+def create_staged_workspace():
+    create_mock_file("package.json", '{"name": "a", "version": "1.2.3"}')
+    create_mock_file("packages/b/package.json", '{"version": "1.2.3"}')
+    create_mock_file(
+        "packages/c/Cargo.toml",
+        '[dependencies.x]\nversion = "0.1.0"\n\n[package]\nversion = "1.2.3"\n',
+    )
+    init_git_repo()
+
+
+def test_check_staged_versions(capsys):
+    """should pass when every staged manifest shares the same version"""
+    create_staged_workspace()
+    with use_cli_args("--check", "--workspace"):
+        bump.main()
+    assert capsys.readouterr().out == "All staged versions are equal (1.2.3)\n"
+
+
+def test_check_staged_mismatch(capsys):
+    """should fail when the staged manifests disagree on the version"""
+    create_staged_workspace()
+    create_mock_file("packages/b/package.json", '{"version": "1.3.0"}')
+    run_git_command("add", "packages/b/package.json")
+    with use_cli_args("--check", "--workspace"):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert "not all staged versions are equal" in str(exit_info.value.code)
+    assert capsys.readouterr().err == (
+        "packages/b/package.json: 1.3.0 (expected 1.2.3)\n"
+    )
+
+
+def test_check_ignores_unstaged_changes(capsys):
+    """should read the staged contents of files rather than the working tree"""
+    create_staged_workspace()
+    create_mock_file("packages/b/package.json", '{"version": "1.3.0"}')
+    create_mock_file("untracked/package.json", '{"version": "2.0.0"}')
+    with use_cli_args(
+        "--check", "package.json", "packages/b/package.json", "untracked/package.json"
+    ):
+        bump.main()
+    assert capsys.readouterr().out == "All staged versions are equal (1.2.3)\n"
+
+
+def test_staged_contents_of_missing_paths_with_spaces():
+    """should report unstaged paths containing spaces as missing"""
+    create_staged_workspace()
+    create_mock_file("my package.json", '{"version": "2.0.0"}')
+    create_mock_file("my package 2.json", '{"version": "2.0.0"}')
+    assert list(
+        git.iterate_staged_file_contents(
+            ["my package.json", "package.json", "my package 2.json"]
+        )
+    ) == [
+        ("my package.json", None),
+        ("package.json", b'{"name": "a", "version": "1.2.3"}'),
+        ("my package 2.json", None),
+    ]
+
+
+def test_check_single_subprocess():
+    """should read every staged file through a single Git process"""
+    create_staged_workspace()
+    subprocess_counts = []
+
+    def record_event(event):
+        if event.phase == "check":
+            subprocess_counts.append(event.subprocess_count)
+
+    instrumentation.add_hook(record_event)
+    try:
+        with use_cli_args("--check", "--workspace", "--quiet"):
+            bump.main()
+    finally:
+        instrumentation.remove_hook(record_event)
+    assert subprocess_counts == [1]
+
+
+def test_check_outside_git_repository():
+    """should abort when not in a Git repository"""
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    with use_cli_args("--check"):
+        with patch("bumpanything.git.get_repository", return_value=None):
+            with pytest.raises(SystemExit) as exit_info:
+                bump.main()
+    assert "within a Git repository" in str(exit_info.value.code)
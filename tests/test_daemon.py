@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+import os
+import os.path
+import subprocess
+import sys
+import time
+
+import pytest
+
+import bumpanything.daemon as daemon
+from tests import create_mock_file, read_mock_file
+
+# The maximum time (in seconds) to wait for the daemon to start listening
+DAEMON_STARTUP_TIMEOUT = 10
+
+
+def get_env(**env_vars):
+    return dict(
+        os.environ,
+        PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        **env_vars,
+    )
+
+
+@pytest.fixture
+def socket_path():
+    """start a daemon listening on a socket in the test workspace"""
+    socket_path = os.path.abspath("bump.sock")
+    daemon_process = subprocess.Popen(
+        [sys.executable, "-m", "bumpanything", "--serve", socket_path],
+        stdout=subprocess.DEVNULL,
+        env=get_env(),
+    )
+    deadline = time.monotonic() + DAEMON_STARTUP_TIMEOUT
+    while not daemon.is_daemon_listening(socket_path):
+        assert daemon_process.poll() is None
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    yield socket_path
+    daemon_process.terminate()
+    daemon_process.wait()
+    assert not os.path.exists(socket_path)
+
+
+def run_bump(socket_path, *cli_args):
+    return subprocess.run(
+        [sys.executable, "-m", "bumpanything", *cli_args],
+        capture_output=True,
+        text=True,
+        env=get_env(BUMP_ANYTHING_SOCKET=socket_path),
+    )
+
+
+def test_forward_to_daemon(socket_path):
+    """should run the bump within the daemon, streaming back its output"""
+    create_mock_file("subdir/foo.toml", 'version = "1.2.3"\n')
+    result = run_bump(socket_path, "patch", "subdir/foo.toml", "--no-commit")
+    assert result.returncode == 0
+    assert result.stdout == "subdir/foo.toml: 1.2.3 -> 1.2.4\n"
+    assert read_mock_file("subdir/foo.toml") == 'version = "1.2.4"\n'
+    result = run_bump(socket_path, "minor", "subdir/foo.toml", "--no-commit")
+    assert result.stdout == "subdir/foo.toml: 1.2.4 -> 1.3.0\n"
+
+
+def test_forward_exit_status(socket_path):
+    """should exit with the same status and error output as a local run"""
+    result = run_bump(socket_path, "--jobs", "0", "patch")
+    assert result.returncode == 2
+    assert "must be a positive integer" in result.stderr
+
+
+def test_forward_workspace_changes(socket_path):
+    """should notice manifests added since the daemon last searched"""
+    create_mock_file("a/package.json", '{"version": "1.2.3"}')
+    result = run_bump(socket_path, "patch", "--workspace", "--no-commit")
+    assert result.stdout == "a/package.json: 1.2.3 -> 1.2.4\n"
+    create_mock_file("b/package.json", '{"version": "1.2.4"}')
+    result = run_bump(socket_path, "patch", "--workspace", "--no-commit")
+    assert result.stdout == (
+        "a/package.json: 1.2.4 -> 1.2.5\nb/package.json: 1.2.4 -> 1.2.5\n"
+    )
+
+
+def test_no_daemon_runs_locally():
+    """should run locally if no daemon is listening on the socket"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    result = run_bump(os.path.abspath("missing.sock"), "patch", "foo.toml", "-n")
+    assert result.returncode == 0
+    assert result.stdout == "foo.toml: 1.2.3 -> 1.2.4\n"
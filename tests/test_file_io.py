@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import os
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.file_io as file_io
+from tests import (
+    create_mock_file,
+    read_mock_file,
+    use_cli_args,
+)
+
+# Padding which pushes content past the head window that is read up front
+LARGE_PADDING = "x" * (file_io.HEAD_WINDOW_SIZE + 100)
+
+
+def test_patch_same_length_in_place(capsys):
+    """should overwrite only the version bytes when the length is unchanged"""
+    file_name = "package-lock.json"
+    create_mock_file(file_name, '{\n  "version": "1.2.3",\n  "x": "' + LARGE_PADDING)
+    inode = os.stat(file_name).st_ino
+    with use_cli_args("patch", file_name, "--no-commit"):
+        bump.main()
+    captured = capsys.readouterr()
+    assert f"{file_name}: 1.2.3 -> 1.2.4" in captured.out
+    assert read_mock_file(file_name).endswith(LARGE_PADDING)
+    assert '"version": "1.2.4"' in read_mock_file(file_name)
+    assert os.stat(file_name).st_ino == inode
+
+
+def test_splice_different_length(capsys):
+    """should stream a spliced copy when the version length changes"""
+    file_name = "package-lock.json"
+    create_mock_file(file_name, '{\n  "version": "9.2.3",\n  "x": "' + LARGE_PADDING)
+    os.chmod(file_name, 0o640)
+    with use_cli_args("major", file_name, "--no-commit"):
+        bump.main()
+    captured = capsys.readouterr()
+    assert f"{file_name}: 9.2.3 -> 10.0.0" in captured.out
+    assert read_mock_file(file_name) == (
+        '{\n  "version": "10.0.0",\n  "x": "' + LARGE_PADDING
+    )
+    assert os.stat(file_name).st_mode & 0o777 == 0o640
+    assert not [name for name in os.listdir(".") if name.endswith(".tmp")]
+
+
+def test_version_past_head_window():
+    """should find a version beyond the head window, and across its boundary"""
+    for padding_size in (
+        file_io.HEAD_WINDOW_SIZE + 100,
+        file_io.HEAD_WINDOW_SIZE - len("version = 1.2"),
+    ):
+        create_mock_file("foo.txt", "x" * padding_size + "\nversion = 1.2.3-beta.1\n")
+        version_start = padding_size + len("\nversion = ")
+        with open("foo.txt", "rb") as file:
+            version_location = file_io.find_version_in_file(
+                file, bump.get_version_regex(bytes)
+            )
+        assert version_location == (
+            version_start,
+            version_start + len("1.2.3-beta.1"),
+            "1.2.3-beta.1",
+        )
+
+
+def test_empty_file():
+    """should not find a version in an empty file"""
+    create_mock_file("foo.txt", "")
+    with open("foo.txt", "rb") as file:
+        assert file_io.find_version_in_file(file, bump.get_version_regex(bytes)) is None
+
+
+def test_overlapping_splices():
+    """should refuse to write splices which overlap one another"""
+    create_mock_file("foo.txt", 'version = "1.2.3"\n')
+    with open("bar.txt", "wb") as dest_file:
+        with pytest.raises(ValueError):
+            file_io.write_spliced_file(
+                "foo.txt", dest_file, [(11, 16, "1.2.4"), (11, 16, "1.3.0")]
+            )
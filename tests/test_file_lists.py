@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import io
+import sys
+from unittest.mock import patch
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.workspace as workspace
+from tests import create_mock_file, init_git_repo, run_git_command, use_cli_args
+
+
+def create_packages():
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    create_mock_file("packages/a/package.json", '{"version": "1.2.3"}')
+    create_mock_file("packages/b/deep/package.json", '{"version": "1.2.3"}')
+    create_mock_file("packages/b/node_modules/x/package.json", '{"version": "1.0.0"}')
+    create_mock_file("packages/.hidden/package.json", '{"version": "1.0.0"}')
+    create_mock_file("packages/ignored/package.json", '{"version": "1.0.0"}')
+    create_mock_file(".gitignore", "ignored/\n")
+
+
+@pytest.mark.parametrize(
+    ("pattern", "glob_paths"),
+    [
+        (
+            "**/package.json",
+            [
+                "package.json",
+                "packages/a/package.json",
+                "packages/b/deep/package.json",
+            ],
+        ),
+        ("packages/*/package.json", ["packages/a/package.json"]),
+        ("packages/**", ["packages/a/package.json", "packages/b/deep/package.json"]),
+        ("packages/[!a]/**/*.json", ["packages/b/deep/package.json"]),
+        ("packages/.hidden/*.json", ["packages/.hidden/package.json"]),
+    ],
+)
+def test_find_glob_paths(pattern, glob_paths):
+    """should expand a glob pattern, pruning ignored and hidden directories"""
+    create_packages()
+    assert workspace.find_glob_paths(pattern) == glob_paths
+
+
+def test_bump_glob_pattern(capsys):
+    """should expand glob patterns given as files in-process"""
+    create_packages()
+    with use_cli_args("patch", "packages/**/package.json", "--no-commit"):
+        bump.main()
+    assert capsys.readouterr().out == (
+        "packages/a/package.json: 1.2.3 -> 1.2.4\n"
+        "packages/b/deep/package.json: 1.2.3 -> 1.2.4\n"
+    )
+
+
+def test_bump_unmatched_glob_pattern(capsys):
+    """should report a glob pattern matching nothing as a missing file"""
+    with use_cli_args("patch", "missing/*.json", "--no-commit"):
+        bump.main()
+    assert capsys.readouterr().err == "missing/*.json: file not found\n"
+
+
+@pytest.mark.parametrize("separator", ["\n", "\0", "\r\n"])
+def test_files_from_stdin(capsys, separator):
+    """should bump every path listed on stdin in a single commit"""
+    create_packages()
+    init_git_repo()
+    listed_paths = separator.join(
+        ["packages/a/package.json", "packages/b/deep/package.json", ""]
+    )
+    with use_cli_args("minor", "--files-from", "-"):
+        with patch.object(
+            sys, "stdin", io.TextIOWrapper(io.BytesIO(listed_paths.encode()))
+        ):
+            bump.main()
+    assert "packages/b/deep/package.json: 1.2.3 -> 1.3.0" in capsys.readouterr().out
+    assert run_git_command("show", "--name-only", "--format=") == (
+        "packages/a/package.json\npackages/b/deep/package.json\n"
+    )
+
+
+def test_files_from_file(capsys):
+    """should read the paths to bump from the given file"""
+    create_packages()
+    create_mock_file("manifests.txt", "packages/a/package.json\n")
+    with use_cli_args("patch", "package.json", "--files-from", "manifests.txt", "-n"):
+        bump.main()
+    assert capsys.readouterr().out == (
+        "package.json: 1.2.3 -> 1.2.4\npackages/a/package.json: 1.2.3 -> 1.2.4\n"
+    )
+
+
+def test_files_from_missing_file():
+    """should abort if the list of paths cannot be read"""
+    with use_cli_args("patch", "--files-from", "missing.txt", "--no-commit"):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert "missing.txt could not be read" in str(exit_info.value.code)
+
+
+def test_iterate_listed_paths_chunks():
+    """should split paths which span chunks of the list"""
+    listed_paths = ["dir{}/package.json".format(i) for i in range(10000)]
+    assert (
+        list(
+            workspace.iterate_listed_paths(io.BytesIO("\0".join(listed_paths).encode()))
+        )
+        == listed_paths
+    )
+
+
+def test_files_from_stdin_not_forwarded():
+    """should not forward a run reading paths from stdin to the daemon"""
+    assert not bump.can_forward_to_daemon(["patch", "--files-from", "-"])
+    assert bump.can_forward_to_daemon(["patch", "--files-from", "list.txt"])
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import os
 from unittest.mock import patch
 
 import pytest
@@ -21,8 +22,6 @@ def test_version_mismatch(capsys):
     old_version_1 = "1.2.3"
     old_version_2 = "4.5.6"
     increment = "minor"
-    new_version_1 = "1.3.0"
-    new_version_2 = "4.6.0"
     file_contents_1 = f"""{{
         "name": "foo",
         "version": {old_version_1}
@@ -36,11 +35,13 @@ def test_version_mismatch(capsys):
         create_mock_file(file_name_1, file_contents_1)
         create_mock_file(file_name_2, file_contents_2)
         init_git_repo()
-        with pytest.raises(SystemExit):
+        with pytest.raises(SystemExit) as exit_info:
             bump.main()
+        assert exit_info.value.code == 1
         captured = capsys.readouterr()
-        assert f'"version": {new_version_1}\n' in read_mock_file(file_name_1)
-        assert f'"version": {new_version_2}\n' in read_mock_file(file_name_2)
+        # The mismatch should be caught before any file is modified
+        assert read_mock_file(file_name_1) == file_contents_1
+        assert read_mock_file(file_name_2) == file_contents_2
         assert "abort" in captured.err.lower()
 
 
@@ -125,7 +126,7 @@ def test_auto_commit_no_tag(capsys):
 
 
 def test_auto_commit_existing_tag(capsys):
-    """should auto-commit but not tag release due to existing tag"""
+    """should abort before bumping anything due to existing tag"""
     file_name = "package.json"
     old_version = "0.8.0"
     new_version = "1.0.0"
@@ -139,12 +140,13 @@ def test_auto_commit_existing_tag(capsys):
         init_git_repo()
         # Tag the initial commit created in init_git_repo()
         run_git_command("tag", f"v{new_version}")
-        bump.main()
-        assert (
-            f"Prepare v{new_version} release"
-            == run_git_command("show", "-s", "--format=%B").strip()
-        )
-        assert "fatal" in run_git_command("describe", "--tags", "--exact-match").strip()
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+        assert exit_info.value.code == 1
+        captured = capsys.readouterr()
+        assert f"tag v{new_version} already exists" in captured.err
+        assert read_mock_file(file_name) == file_contents
+        assert "Initial commit" == run_git_command("show", "-s", "--format=%B").strip()
 
 
 def test_commit_failure_aborts_git_operations(capsys):
@@ -163,8 +165,10 @@ def test_commit_failure_aborts_git_operations(capsys):
         with (
             patch("bumpanything.git.commit", return_value=False) as commit_mock,
             patch("bumpanything.git.tag") as tag_mock,
+            pytest.raises(SystemExit) as exit_info,
         ):
             bump.main()
+    assert exit_info.value.code == 1
     captured = capsys.readouterr()
     assert "Commit failed; aborting" in captured.out
     assert commit_mock.called
@@ -196,3 +200,173 @@ def test_no_commit(capsys, no_commit_flag):
         bump.main()
         assert "Initial commit" == run_git_command("show", "-s", "--format=%B").strip()
         assert "fatal" in run_git_command("describe", "--tags", "--exact-match").strip()
+
+
+def test_dry_run(capsys):
+    """should print a diff of the planned changes without modifying files"""
+    file_name = "package.json"
+    file_contents = """{
+    "name": "foo",
+    "version": "1.2.3"
+}"""
+    with use_cli_args("minor", "--dry-run"):
+        create_mock_file(file_name, file_contents)
+        init_git_repo()
+        bump.main()
+    captured = capsys.readouterr()
+    assert captured.out == "".join(
+        (
+            f"--- a/{file_name}\n",
+            f"+++ b/{file_name}\n",
+            "@@ -3 +3 @@\n",
+            '-    "version": "1.2.3"\n',
+            '+    "version": "1.3.0"\n',
+        )
+    )
+    assert read_mock_file(file_name) == file_contents
+    assert "Initial commit" == run_git_command("show", "-s", "--format=%B").strip()
+
+
+def test_save_and_apply_plan(capsys):
+    """should save a plan and later apply it without rescanning files"""
+    file_name = "package.json"
+    file_contents = '{"name": "foo", "version": "1.2.3"}'
+    create_mock_file(file_name, file_contents)
+    init_git_repo()
+    with use_cli_args("minor", "--save-plan", "plan.json"):
+        bump.main()
+    assert read_mock_file(file_name) == file_contents
+    with use_cli_args("--apply-plan", "plan.json"):
+        with patch(
+            "bumpanything.__main__.locate_version_in_file",
+            wraps=bump.locate_version_in_file,
+        ) as locate_mock:
+            bump.main()
+    assert not locate_mock.called
+    captured = capsys.readouterr()
+    assert f"{file_name}: 1.2.3 -> 1.3.0" in captured.out
+    assert read_mock_file(file_name) == '{"name": "foo", "version": "1.3.0"}'
+    assert "Prepare v1.3.0 release" == (
+        run_git_command("show", "-s", "--format=%B").strip()
+    )
+
+
+def test_apply_stale_plan(capsys):
+    """should refuse to apply a plan if its files have since changed"""
+    file_name = "package.json"
+    create_mock_file(file_name, '{"version": "1.2.3"}')
+    with use_cli_args("minor", "--save-plan", "plan.json", "--no-commit"):
+        bump.main()
+    create_mock_file(file_name, '{"version": "1.2.4"}')
+    with use_cli_args("--apply-plan", "plan.json", "--no-commit"):
+        with pytest.raises(SystemExit):
+            bump.main()
+    captured = capsys.readouterr()
+    assert "file has changed since the plan was made" in captured.err
+    assert read_mock_file(file_name) == '{"version": "1.2.4"}'
+
+
+@pytest.mark.parametrize(
+    "plan_contents", [None, "{", "[]", '{"format": 1, "changes": [{}]}']
+)
+def test_apply_invalid_plan(plan_contents, capsys):
+    """should abort cleanly if a plan is missing or malformed"""
+    if plan_contents is not None:
+        create_mock_file("plan.json", plan_contents)
+    with use_cli_args("--apply-plan", "plan.json", "--no-commit"):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert str(exit_info.value.code).startswith(
+        "Aborting because the plan could not be read"
+    )
+
+
+def test_plumbing_backend(capsys):
+    """should commit and tag via the plumbing backend"""
+    file_name_1 = "package.json"
+    file_name_2 = "packages/foo/package.json"
+    file_contents = '{"name": "foo", "version": "1.2.3"}'
+    create_mock_file(file_name_1, file_contents)
+    create_mock_file(file_name_2, file_contents)
+    create_mock_file("untracked.txt", "should not be committed")
+    init_git_repo()
+    create_mock_file("unstaged.txt", "should not be committed")
+    with use_cli_args("minor", "--workspace", "--git-backend", "plumbing"):
+        bump.main()
+    captured = capsys.readouterr()
+    assert f"Staging {file_name_1}, {file_name_2}" in captured.out
+    assert "Tagging commit as v1.3.0" in captured.out
+    assert (
+        "Prepare v1.3.0 release" == run_git_command("show", "-s", "--format=%B").strip()
+    )
+    assert "v1.3.0" == run_git_command("describe", "--tags", "--exact-match").strip()
+    assert run_git_command("show", "--name-only", "--format=").split() == [
+        file_name_1,
+        file_name_2,
+    ]
+    assert run_git_command("status", "--porcelain").split() == ["??", "unstaged.txt"]
+    assert "commit: Prepare v1.3.0 release" in run_git_command("reflog", "-1")
+
+
+@pytest.mark.parametrize("should_commit_first", [True, False])
+def test_plumbing_backend_sha256(should_commit_first):
+    """should commit and tag via the plumbing backend in a SHA-256 repository"""
+    run_git_command("init", "--object-format=sha256")
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    if should_commit_first:
+        init_git_repo()
+    else:
+        run_git_command("config", "user.name", "Test User")
+        run_git_command("config", "user.email", "user@example.com")
+    git_backend = bump.get_git_backend("plumbing")
+    create_mock_file("package.json", '{"version": "1.2.4"}')
+    assert git_backend.add(["package.json"])
+    assert git_backend.commit("Prepare v1.2.4 release")
+    assert git_backend.tag("v1.2.4")
+    assert len(run_git_command("rev-parse", "v1.2.4").strip()) == 64
+    assert "v1.2.4" == run_git_command("describe", "--tags", "--exact-match").strip()
+
+
+def test_plumbing_backend_cleans_up_message():
+    """should clean up the commit message as `git commit` does"""
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    init_git_repo()
+    git_backend = bump.get_git_backend("plumbing")
+    create_mock_file("package.json", '{"version": "1.2.4"}')
+    assert git_backend.add(["package.json"])
+    assert git_backend.commit("\nPrepare v1.2.4 release  \n\n")
+    assert run_git_command("cat-file", "commit", "HEAD").endswith(
+        "\n\nPrepare v1.2.4 release\n"
+    )
+
+
+def test_plumbing_backend_falls_back_for_hooks(capsys):
+    """should use `git commit` when a commit hook is installed"""
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    init_git_repo()
+    create_mock_file(".git/hooks/pre-commit", "#!/bin/sh\ntouch hook-ran\n")
+    os.chmod(".git/hooks/pre-commit", 0o755)
+    with use_cli_args("minor", "--git-backend", "plumbing"):
+        bump.main()
+    assert os.path.exists("hook-ran")
+    assert "v1.3.0" == run_git_command("describe", "--tags", "--exact-match").strip()
+
+
+@pytest.mark.parametrize("config_name", ["commit.gpgsign", "tag.gpgsign"])
+def test_plumbing_backend_falls_back_for_signing(config_name):
+    """should use `git commit` and `git tag` when either is signed"""
+    init_git_repo()
+    run_git_command("config", config_name, "true")
+    assert bump.get_git_backend("plumbing").is_using_fallback
+    run_git_command("config", config_name, "false")
+    assert not bump.get_git_backend("plumbing").is_using_fallback
+
+
+def test_plumbing_backend_nothing_to_commit():
+    """should fail to commit via the plumbing backend if nothing changed"""
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    init_git_repo()
+    git_backend = bump.get_git_backend("plumbing")
+    assert git_backend.add(["package.json"])
+    assert not git_backend.commit("Empty")
+    assert "Initial commit" == run_git_command("show", "-s", "--format=%B").strip()
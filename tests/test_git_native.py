@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.git_native as git_native
+from bumpanything.git_index import Index
+from bumpanything.git_objects import apply_delta
+from tests import (
+    create_mock_file,
+    init_git_repo,
+    run_git_command,
+    use_cli_args,
+)
+
+PACKAGE_JSON_CONTENTS = '{"name": "foo", "version": "1.2.3"}'
+
+
+def test_native_backend(capsys):
+    """should commit and tag without spawning Git"""
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("packages/foo/package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("packages/foo/src/index.js", "export default 1;\n")
+    create_mock_file("packages/bar/Cargo.toml", 'version = "1.2.3"\n')
+    init_git_repo()
+    # Pack the initial commit so that it must be read from a pack file
+    run_git_command("gc", "--quiet")
+    with use_cli_args("minor", "--workspace", "--git-backend", "native"):
+        with patch("bumpanything.git.run_git_command") as run_git_command_mock:
+            bump.main()
+    assert not run_git_command_mock.called
+    captured = capsys.readouterr()
+    assert "Tagging commit as v1.3.0" in captured.out
+    assert run_git_command("fsck", "--strict", "--no-progress") == ""
+    assert (
+        "Prepare v1.3.0 release" == run_git_command("show", "-s", "--format=%B").strip()
+    )
+    assert "Test User <user@example.com>" == (
+        run_git_command("show", "-s", "--format=%an <%ae>").strip()
+    )
+    assert "v1.3.0" == run_git_command("describe", "--tags", "--exact-match").strip()
+    assert run_git_command("show", "--name-only", "--format=").split() == [
+        "package.json",
+        "packages/bar/Cargo.toml",
+        "packages/foo/package.json",
+    ]
+    assert run_git_command("status", "--porcelain") == ""
+    assert "commit: Prepare v1.3.0 release" in run_git_command("reflog", "-1")
+    # The index should be in a state Git itself considers fully up-to-date
+    assert run_git_command("diff-index", "--cached", "HEAD") == ""
+    assert run_git_command("write-tree").strip() == (
+        run_git_command("rev-parse", "HEAD^{tree}").strip()
+    )
+
+
+def test_native_backend_new_file():
+    """should stage files which are not yet tracked"""
+    create_mock_file("README.md", "# Foo\n")
+    init_git_repo()
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    git_backend = git_native.GitNativeSession()
+    assert not git_backend.is_using_fallback
+    assert git_backend.add(["package.json"])
+    assert git_backend.commit("Add package.json")
+    assert run_git_command("fsck", "--strict", "--no-progress") == ""
+    assert run_git_command("status", "--porcelain") == ""
+    assert "package.json" in run_git_command("ls-files")
+
+
+def test_native_backend_nothing_to_commit():
+    """should fail to commit if nothing has changed"""
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    init_git_repo()
+    run_git_command("gc", "--quiet")
+    git_backend = git_native.GitNativeSession()
+    assert git_backend.add(["package.json"])
+    assert not git_backend.commit("Empty")
+    assert "Initial commit" == run_git_command("show", "-s", "--format=%B").strip()
+
+
+def test_native_backend_annotated_tag():
+    """should create annotated tag objects"""
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    init_git_repo()
+    git_backend = git_native.GitNativeSession()
+    assert git_backend.tag("v1.2.3", message="Release v1.2.3")
+    assert not git_backend.tag("v1.2.3", message="Release v1.2.3")
+    assert run_git_command("cat-file", "-t", "v1.2.3").strip() == "tag"
+    assert run_git_command("tag", "-l", "--format=%(contents)", "v1.2.3").strip() == (
+        "Release v1.2.3"
+    )
+    assert run_git_command("fsck", "--strict", "--no-progress") == ""
+
+
+def test_native_backend_falls_back_for_hooks(capsys):
+    """should use Git itself when a commit hook is installed"""
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    init_git_repo()
+    create_mock_file(".git/hooks/pre-commit", "#!/bin/sh\ntouch hook-ran\n")
+    os.chmod(".git/hooks/pre-commit", 0o755)
+    with use_cli_args("minor", "--git-backend", "native"):
+        bump.main()
+    assert os.path.exists("hook-ran")
+    assert "v1.3.0" == run_git_command("describe", "--tags", "--exact-match").strip()
+
+
+def test_native_backend_falls_back_for_relative_hooks_path(capsys):
+    """should find hooks in a relative hooks path from within a subdirectory"""
+    create_mock_file("packages/foo/package.json", PACKAGE_JSON_CONTENTS)
+    init_git_repo()
+    run_git_command("config", "core.hooksPath", "hooks")
+    create_mock_file("hooks/pre-commit", "#!/bin/sh\nexit 1\n")
+    os.chmod("hooks/pre-commit", 0o755)
+    os.chdir("packages/foo")
+    with use_cli_args("minor", "package.json", "--git-backend", "native"):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert exit_info.value.code == 1
+    assert "Commit failed; aborting" in capsys.readouterr().out
+    assert "Initial commit" == run_git_command("show", "-s", "--format=%s").strip()
+    assert run_git_command("tag", "--list") == ""
+
+
+@pytest.mark.parametrize(
+    ("attributes_path", "config_args"),
+    [
+        (None, ("core.autocrlf", "true")),
+        (".gitattributes", ()),
+        ("packages/.gitattributes", ()),
+        (".git/info/attributes", ()),
+    ],
+)
+def test_native_backend_falls_back_for_line_endings(attributes_path, config_args):
+    """should use Git itself when it would convert line endings"""
+    create_mock_file("packages/foo/package.json", '{\n"version": "1.2.3"\n}\n')
+    init_git_repo()
+    if attributes_path:
+        create_mock_file(attributes_path, "*.json text\n")
+    if config_args:
+        run_git_command("config", *config_args)
+    create_mock_file("packages/foo/package.json", '{\r\n"version": "1.2.3"\r\n}\r\n')
+    with use_cli_args(
+        "minor", "packages/foo/package.json", "--git-backend", "native", "--no-tag"
+    ):
+        bump.main()
+    assert "i/lf" in run_git_command("ls-files", "--eol", "packages/foo/package.json")
+    assert run_git_command("fsck", "--strict", "--no-progress") == ""
+
+
+def test_native_backend_falls_back_without_filemode():
+    """should use Git itself when it ignores the executable bit"""
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    init_git_repo()
+    run_git_command("config", "core.filemode", "false")
+    os.chmod("package.json", 0o755)
+    with use_cli_args("minor", "--git-backend", "native", "--no-tag"):
+        bump.main()
+    assert run_git_command("ls-files", "--stage", "package.json").startswith("100644")
+
+
+def test_index_set_entry():
+    """should keep the entries sorted by path as they are added and updated"""
+    index = Index()
+    file_stat = os.stat(".")
+    for path in (b"b", b"a/c", b"c", b"a", b"b"):
+        index.set_entry(path, "0" * 40, file_stat)
+    assert [entry.path for entry in index.entries] == [b"a", b"a/c", b"b", b"c"]
+    assert index.paths == [b"a", b"a/c", b"b", b"c"]
+
+
+def test_apply_delta():
+    """should apply copy and insert delta instructions"""
+    base = b"0123456789"
+    # Source size 10, result size 8: copy 4 bytes from offset 2, insert "ab",
+    # then copy 2 bytes from offset 0
+    delta = bytes((10, 8, 0x91, 2, 4, 2)) + b"ab" + bytes((0x90, 2))
+    assert apply_delta(base, delta) == b"2345ab01"
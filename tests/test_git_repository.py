@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import os
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.git as git
+from tests import create_mock_file, init_git_repo, read_mock_file, run_git_command
+
+
+def create_tagged_history():
+    create_mock_file("package.json", '{"version": "1.0.0"}')
+    init_git_repo()
+    run_git_command("tag", "v1.0.0")
+    run_git_command("checkout", "-q", "-b", "side")
+    run_git_command("commit", "-q", "--allow-empty", "-m", "Side")
+    run_git_command("tag", "v9.0.0")
+    run_git_command("checkout", "-q", "-")
+    run_git_command("commit", "-q", "--allow-empty", "-m", "Second")
+    run_git_command("tag", "-a", "-m", "Release", "v1.1.0")
+    run_git_command("commit", "-q", "--allow-empty", "-m", "Third")
+
+
+@pytest.mark.parametrize("should_pack_refs", [False, True])
+def test_read_refs_without_git(should_pack_refs):
+    """should read loose and packed refs without running Git"""
+    create_tagged_history()
+    if should_pack_refs:
+        run_git_command("pack-refs", "--all")
+    head_id = run_git_command("rev-parse", "HEAD").strip()
+    with patch("subprocess.run") as run_mock:
+        assert git.tag_exists("v1.1.0")
+        assert not git.tag_exists("v1.2.0")
+        assert git.get_latest_tag("v*") == "v1.1.0"
+        assert git.get_latest_tag("release/*") is None
+        assert git.get_head() == head_id
+    assert not run_mock.called
+
+
+def test_latest_tag_among_several_on_commit():
+    """should leave Git to choose between several tags on the nearest commit"""
+    create_tagged_history()
+    run_git_command("tag", "-a", "-m", "Release", "v1.2.0")
+    run_git_command("tag", "v1.9.0")
+    with patch("subprocess.run", wraps=subprocess.run) as run_mock:
+        assert git.get_latest_tag("v*") == "v1.2.0"
+    assert run_mock.called
+
+
+def test_fall_back_for_repository_extensions():
+    """should leave repositories which use any extension to Git"""
+    create_tagged_history()
+    run_git_command("config", "core.repositoryformatversion", "1")
+    run_git_command("config", "extensions.worktreeConfig", "true")
+    head_id = run_git_command("rev-parse", "HEAD").strip()
+    with patch("subprocess.run", wraps=subprocess.run) as run_mock:
+        assert git.tag_exists("v1.1.0")
+        assert git.get_head() == head_id
+        assert git.get_latest_tag("v*") == "v1.1.0"
+    assert run_mock.call_count == 3
+
+
+def test_discover_worktree():
+    """should follow the .git file of a linked worktree to its shared refs"""
+    create_tagged_history()
+    run_git_command("worktree", "add", "-q", "worktree", "v1.0.0")
+    os.chdir("worktree")
+    assert git.get_repository_root() == os.getcwd()
+    assert git.tag_exists("v1.1.0")
+    assert git.get_latest_tag("v*") == "v1.0.0"
+
+
+def test_discover_git_dir_env(monkeypatch):
+    """should find the repository named by $GIT_DIR"""
+    create_tagged_history()
+    os.rename(".git", "repo.git")
+    os.mkdir("work")
+    os.chdir("work")
+    monkeypatch.setenv("GIT_DIR", os.path.join(os.pardir, "repo.git"))
+    assert git.get_repository_root() == os.getcwd()
+    assert git.tag_exists("v1.0.0")
+
+
+def test_discover_bare_repository():
+    """should not treat a bare repository as a work tree to commit in"""
+    run_git_command("init", "-q", "--bare", "repo.git")
+    os.chdir("repo.git")
+    assert git.get_repository() is not None
+    assert not git.is_in_git_repository()
+
+
+def test_handle_git_operations_tag_collision(capsys):
+    """should abort before committing if the tag already exists"""
+    create_tagged_history()
+    create_mock_file("package.json", '{"version": "1.1.0"}')
+    with pytest.raises(SystemExit) as exit_info:
+        bump.handle_git_operations(
+            list(bump.bump_version_for_files(["package.json"], "minor")),
+            commit_message="Release",
+            tag_name="v1.0.0",
+            should_tag=True,
+        )
+    assert exit_info.value.code == 1
+    assert "tag v1.0.0 already exists" in capsys.readouterr().err
+    assert "Third" == run_git_command("show", "-s", "--format=%s").strip()
+    assert read_mock_file("package.json") == '{"version": "1.2.0"}'
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import json
+import os
+
+import bumpanything.__main__ as bump
+import bumpanything.instrumentation as instrumentation
+from tests import create_mock_file, use_cli_args
+
+
+def test_timing_hook():
+    """should report an event for each phase and file to registered hooks"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    create_mock_file("bar.toml", 'version = "1.2.3"\n')
+    timing_events = []
+    instrumentation.add_hook(timing_events.append)
+    try:
+        with use_cli_args("patch", "foo.toml", "bar.toml", "--no-commit"):
+            bump.main()
+    finally:
+        instrumentation.remove_hook(timing_events.append)
+    phase_events = {
+        event.phase: event for event in timing_events if event.file_path is None
+    }
+    assert list(phase_events.keys()) == ["cache", "discover", "plan", "apply"]
+    file_events = [
+        (event.phase, event.file_path)
+        for event in timing_events
+        if event.file_path is not None
+    ]
+    assert file_events == [
+        ("plan", "foo.toml"),
+        ("plan", "bar.toml"),
+        ("apply", "foo.toml"),
+        ("apply", "bar.toml"),
+    ]
+    assert phase_events["plan"].bytes_read == 2 * len('version = "1.2.3"\n')
+    assert phase_events["apply"].bytes_written == 2 * len("1.2.4")
+    assert all(event.wall_time >= 0 for event in timing_events)
+
+
+def test_timings_table(capsys):
+    """should print a table of phase timings to stderr"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("patch", "foo.toml", "--no-commit", "--timings"):
+        bump.main()
+    captured = capsys.readouterr()
+    assert "foo.toml: 1.2.3 -> 1.2.4" in captured.out
+    table_lines = captured.err.splitlines()
+    assert table_lines[0].split() == [
+        "phase",
+        "files",
+        "wall",
+        "ms",
+        "cpu",
+        "ms",
+        "read",
+        "written",
+        "subprocesses",
+    ]
+    assert table_lines[3].split()[:2] == ["plan", "1"]
+    assert not instrumentation.hooks
+
+
+def test_timings_json(capsys):
+    """should print phase and file timings as JSON to stderr"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("patch", "foo.toml", "--no-commit", "--timings", "json"):
+        bump.main()
+    timings = json.loads(capsys.readouterr().err)
+    assert [phase["phase"] for phase in timings["phases"]] == [
+        "cache",
+        "discover",
+        "plan",
+        "apply",
+    ]
+    assert timings["files"][0]["file_path"] == "foo.toml"
+
+
+def test_profile():
+    """should write a cProfile profile of the run to the given path"""
+    create_mock_file("foo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("patch", "foo.toml", "--no-commit", "--profile", "out.prof"):
+        bump.main()
+    assert os.path.getsize("out.prof") > 0
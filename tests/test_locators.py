@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.locators as locators
+from tests import create_mock_file, read_mock_file, use_cli_args
+
+
+@pytest.mark.parametrize(
+    ("file_name", "file_contents", "new_file_contents"),
+    [
+        # Only the top-level version of a JSON document is bumped, even if a
+        # nested one comes first
+        (
+            "package.json",
+            '{"name": "foo", "dependencies": {"bar": {"version": "9.9.9"}},'
+            ' "version": "1.2.3"}',
+            '{"name": "foo", "dependencies": {"bar": {"version": "9.9.9"}},'
+            ' "version": "1.2.4"}',
+        ),
+        # Strings containing brackets and escaped quotes are skipped over
+        (
+            "package-lock.json",
+            '{"a": ["}\\"{", {"b": "[version: 9.9.9]"}], "version": "1.2.3"}',
+            '{"a": ["}\\"{", {"b": "[version: 9.9.9]"}], "version": "1.2.4"}',
+        ),
+        # Only the version of the package table of a TOML document is bumped
+        (
+            "Cargo.toml",
+            '[workspace.package]\nversion = "9.9.9"\n\n'
+            '[[bin]]\nversion = "9.9.9"\n\n'
+            '[package]\nname = "foo"\nversion = "1.2.3"\n',
+            '[workspace.package]\nversion = "9.9.9"\n\n'
+            '[[bin]]\nversion = "9.9.9"\n\n'
+            '[package]\nname = "foo"\nversion = "1.2.4"\n',
+        ),
+        (
+            "pyproject.toml",
+            '[tool.bar]\nversion = "9.9.9"\n\n[tool . poetry]\nversion = "1.2.3"\n',
+            '[tool.bar]\nversion = "9.9.9"\n\n[tool . poetry]\nversion = "1.2.4"\n',
+        ),
+        # Only the header comment of a WordPress theme is searched
+        (
+            "style.css",
+            "/*\nTheme Name: Foo\nVersion: 1.2.3\n*/\n.version { x: 9.9.9; }\n",
+            "/*\nTheme Name: Foo\nVersion: 1.2.4\n*/\n.version { x: 9.9.9; }\n",
+        ),
+        # A version outside of where the locator looks is still found
+        (
+            "pyproject.toml",
+            '[tool.commitizen]\nversion = "1.2.3"\n',
+            '[tool.commitizen]\nversion = "1.2.4"\n',
+        ),
+    ],
+)
+def test_bump_with_locator(file_name, file_contents, new_file_contents):
+    """should bump the version found by the locator for the file type"""
+    create_mock_file(file_name, file_contents)
+    with use_cli_args("patch", file_name, "--no-commit"):
+        bump.main()
+    assert read_mock_file(file_name) == new_file_contents
+
+
+def test_bump_wordpress_plugin(capsys):
+    """should bump the version in the header of a WordPress plugin"""
+    create_mock_file(
+        "foo/foo.php",
+        "<?php\n/**\n * Plugin Name: Foo\n * Version: 1.2.3\n */\n"
+        "$version = '9.9.9';\n",
+    )
+    with use_cli_args("patch", "foo/foo.php", "--no-commit"):
+        bump.main()
+    assert " * Version: 1.2.4\n" in read_mock_file("foo/foo.php")
+    assert "$version = '9.9.9';\n" in read_mock_file("foo/foo.php")
+
+
+@pytest.mark.parametrize(
+    ("data", "region"),
+    [
+        (b'{"version": "1.2.3"}', (1, 19)),
+        (b'\xef\xbb\xbf {\n  "version": 1.2.3\n}', (8, 24)),
+        (b'{"name": "foo"}', None),
+        (b'{"name": "foo" "version": "1.2.3"}', None),
+        (b'{"name": {"unterminated": "}', None),
+        (b'["version", "1.2.3"]', None),
+    ],
+)
+def test_locate_json_version(data, region):
+    """should find the top-level version member of a JSON document"""
+    assert locators.locate_json_version(data) == region
+
+
+def test_get_locator():
+    """should choose the locator by file name"""
+    assert locators.get_locator("a/package.json") is locators.locate_json_version
+    assert locators.get_locator("Cargo.toml") is locators.locate_toml_version
+    assert locators.get_locator("foo/foo.php") is locators.locate_wordpress_header
+    assert locators.get_locator("foo/bar.php") is None
+    assert locators.get_locator("setup.py") is None
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+import bumpanything.__main__ as bump
+from tests import create_mock_file, init_git_repo, read_mock_file, use_cli_args
+
+
+def test_output_jsonl(capsys):
+    """should report each changed file and dependency as a line of JSON"""
+    create_mock_file("a/package.json", '{"name": "a", "version": "1.2.3"}')
+    create_mock_file(
+        "b/package.json",
+        '{"name": "b", "version": "1.2.3", "dependencies": {"a": "^1.2.3"}}',
+    )
+    with use_cli_args(
+        "patch", "a/package.json", "--propagate", "--output", "jsonl", "--no-commit"
+    ):
+        bump.main()
+    assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == [
+        {
+            "file_path": "a/package.json",
+            "current_version": "1.2.3",
+            "new_version": "1.2.4",
+        },
+        {
+            "file_path": "b/package.json",
+            "dependency_name": "a",
+            "current_version": "1.2.3",
+            "new_version": "1.2.4",
+        },
+    ]
+
+
+def test_output_jsonl_git(capsys):
+    """should keep messages about committing out of the JSON output"""
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    init_git_repo()
+    with use_cli_args("minor", "--output", "jsonl"):
+        bump.main()
+    captured = capsys.readouterr()
+    assert json.loads(captured.out)["new_version"] == "1.3.0"
+    assert "Staging package.json" in captured.err
+    assert "Tagging commit as v1.3.0" in captured.err
+
+
+def test_output_jsonl_dry_run(capsys):
+    """should report the planned changes as JSON without making them"""
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    with use_cli_args("major", "--dry-run", "--output", "jsonl", "--no-commit"):
+        bump.main()
+    assert json.loads(capsys.readouterr().out)["new_version"] == "2.0.0"
+    assert read_mock_file("package.json") == '{"version": "1.2.3"}'
+
+
+def test_quiet(capsys):
+    """should bump files without reporting anything"""
+    create_mock_file("package.json", '{"version": "1.2.3"}')
+    init_git_repo()
+    with use_cli_args("patch", "--quiet"):
+        bump.main()
+    assert capsys.readouterr().out == ""
+    assert read_mock_file("package.json") == '{"version": "1.2.4"}'
+
+
+def test_version_mismatch_stops_scanning(capsys):
+    """should stop scanning files at the first mismatched version"""
+    for file_name in ("a.json", "b.json", "c.json", "d.json"):
+        create_mock_file(file_name, '{"version": "1.2.3"}')
+    create_mock_file("b.json", '{"version": "2.0.0"}')
+    init_git_repo()
+    with use_cli_args("patch", "a.json", "b.json", "c.json", "d.json"):
+        with patch(
+            "bumpanything.__main__.locate_version_in_file",
+            wraps=bump.locate_version_in_file,
+        ) as locate_mock:
+            with pytest.raises(SystemExit) as exit_info:
+                bump.main()
+    assert exit_info.value.code == 1
+    assert [call.args[0] for call in locate_mock.call_args_list] == [
+        "a.json",
+        "b.json",
+    ]
+    assert "not all bumped versions are equal" in capsys.readouterr().err
+    assert read_mock_file("a.json") == '{"version": "1.2.3"}'
+
+
+def test_bump_version_for_files_results(capsys):
+    """should return an iterator of slotted results without printing them"""
+    create_mock_file("a.json", '{"version": "1.2.3"}')
+    create_mock_file("b.json", '{"version": "4.5.6"}')
+    file_results = bump.bump_version_for_files(["a.json", "b.json"], "minor")
+    assert read_mock_file("b.json") == '{"version": "4.6.0"}'
+    file_result = next(file_results)
+    assert (file_result.file_path, file_result.new_version) == ("a.json", "1.3.0")
+    assert not hasattr(file_result, "__dict__")
+    assert [file_result.file_path for file_result in file_results] == ["b.json"]
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+import sys
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.patterns as patterns
+from tests import create_mock_file, read_mock_file, use_cli_args
+
+
+def create_config(*file_entries):
+    create_mock_file("pyproject.toml", "".join(file_entries))
+
+
+def test_bump_with_configured_pattern():
+    """should bump a version matched by a pattern configured for the file"""
+    create_config(
+        "[[tool.bump-anything.files]]\n",
+        "glob = 'src/*/__init__.py'\n",
+        'patterns = [\'__version__ = "(?P<version>[^"]+)"\']\n',
+    )
+    create_mock_file("src/foo/__init__.py", '__version__ = "1.2.3"\n')
+    with use_cli_args("minor", "src/foo/__init__.py", "--no-commit"):
+        bump.main()
+    assert read_mock_file("src/foo/__init__.py") == '__version__ = "1.3.0"\n'
+
+
+def test_bump_first_match_of_any_pattern():
+    """should bump only the earliest match of any of the configured patterns"""
+    create_config(
+        "[[tool.bump-anything.files]]\n",
+        "glob = '**/pom.xml'\n",
+        "patterns = ['<version>(?P<version>[^<]+)</version>']\n",
+    )
+    create_mock_file(
+        "app/pom.xml",
+        "<version>1.2.3</version>\nversion = 1.2.3\n<version>1.2.3</version>",
+    )
+    with use_cli_args("patch", "app/pom.xml", "--no-commit"):
+        bump.main()
+    assert read_mock_file("app/pom.xml") == (
+        "<version>1.2.4</version>\nversion = 1.2.3\n<version>1.2.3</version>"
+    )
+
+
+@pytest.mark.parametrize(
+    ("version_specifier", "new_version"), [("patch", "1.2.10"), ("1.2.8", "1.2.8")]
+)
+def test_bump_all_matches(version_specifier, new_version):
+    """should bump every occurrence of the version in all-matches mode"""
+    create_config(
+        "[[tool.bump-anything.files]]\n",
+        "glob = '**/Chart.yaml'\n",
+        'patterns = [\'(?m)^appVersion: "(?P<version>[^"]+)"\']\n',
+        "replace = 'all'\n",
+    )
+    create_mock_file(
+        "Chart.yaml",
+        'version: 1.2.9\nappVersion: "1.2.9"\ndependencies:\n  - version: 4.5.6\n',
+    )
+    with use_cli_args(version_specifier, "Chart.yaml", "--no-commit"):
+        bump.main()
+    assert read_mock_file("Chart.yaml") == (
+        'version: {0}\nappVersion: "{0}"\ndependencies:\n  - version: 4.5.6\n'.format(
+            new_version
+        )
+    )
+
+
+def test_bump_without_default_pattern():
+    """should not match the default pattern if the config opts out of it"""
+    create_config(
+        "[[tool.bump-anything.files]]\n",
+        "glob = 'VERSION.txt'\n",
+        "patterns = '(?m)^(?P<version>\\d+\\.\\d+\\.\\d+)$'\n",
+        "default-pattern = false\n",
+    )
+    create_mock_file("VERSION.txt", "version = 9.9.9\n1.2.3\n")
+    with use_cli_args("patch", "VERSION.txt", "--no-commit"):
+        bump.main()
+    assert read_mock_file("VERSION.txt") == "version = 9.9.9\n1.2.4\n"
+
+
+def test_dry_run_all_matches(capsys):
+    """should print a hunk for every occurrence to be bumped"""
+    create_config(
+        "[[tool.bump-anything.files]]\n",
+        "glob = 'a.txt'\n",
+        "replace = 'all'\n",
+    )
+    create_mock_file("a.txt", "version: 1.2.3\nfoo\nversion: 1.2.3\n")
+    with use_cli_args("patch", "a.txt", "--dry-run", "--no-commit"):
+        bump.main()
+    assert capsys.readouterr().out == (
+        "--- a/a.txt\n+++ b/a.txt\n"
+        "@@ -1 +1 @@\n-version: 1.2.3\n+version: 1.2.4\n"
+        "@@ -3 +3 @@\n-version: 1.2.3\n+version: 1.2.4\n"
+    )
+    assert read_mock_file("a.txt") == "version: 1.2.3\nfoo\nversion: 1.2.3\n"
+
+
+def test_dry_run_matches_on_same_line(capsys):
+    """should print a single hunk for a line with several occurrences"""
+    create_config(
+        "[[tool.bump-anything.files]]\n",
+        "glob = 'a.txt'\n",
+        "replace = 'all'\n",
+    )
+    create_mock_file("a.txt", "version: 1.2.3, version: 1.2.3\n")
+    with use_cli_args("patch", "a.txt", "--dry-run", "--no-commit"):
+        bump.main()
+    assert capsys.readouterr().out == (
+        "--- a/a.txt\n+++ b/a.txt\n"
+        "@@ -1 +1 @@\n"
+        "-version: 1.2.3, version: 1.2.3\n"
+        "+version: 1.2.4, version: 1.2.4\n"
+    )
+
+
+def test_unconfigured_file_uses_default_pattern():
+    """should search files matched by no glob for the default pattern alone"""
+    create_config(
+        "[[tool.bump-anything.files]]\n",
+        "glob = '*.xml'\n",
+        "patterns = ['<version>(?P<version>[^<]+)</version>']\n",
+    )
+    create_mock_file("a.txt", "<version>9.9.9</version>\nversion: 1.2.3\n")
+    with use_cli_args("patch", "a.txt", "--no-commit"):
+        bump.main()
+    assert read_mock_file("a.txt") == "<version>9.9.9</version>\nversion: 1.2.4\n"
+
+
+@pytest.mark.parametrize(
+    "file_entry",
+    [
+        "glob = 'a.txt'\npatterns = ['__version__ = (?P<v>.+)']\n",
+        "glob = 'a.txt'\npatterns = ['(?P<version>[']\n",
+        "glob = 'a.txt'\npatterns = ['(.)(?P<version>.+)\\1']\n",
+        "glob = 'a.txt'\nreplace = 'every'\n",
+        "patterns = []\n",
+    ],
+)
+def test_invalid_config(file_entry):
+    """should abort if the config is invalid"""
+    create_config("[[tool.bump-anything.files]]\n", file_entry)
+    create_mock_file("a.txt", "version: 1.2.3\n")
+    with use_cli_args("patch", "a.txt", "--no-commit"):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert "config is invalid" in str(exit_info.value.code)
+    assert read_mock_file("a.txt") == "version: 1.2.3\n"
+
+
+def test_combined_patterns_compiled_once():
+    """should share one compiled scanner between all files using its patterns"""
+    scanner_rules = patterns.get_scanner_rules(
+        {
+            "files": [
+                {"glob": "a/*.txt", "patterns": ["v(?P<version>.+)"]},
+                {"glob": "b/*.txt", "patterns": ["v(?P<version>.+)"]},
+            ]
+        },
+        bump.VERSION_PATT,
+    )
+    scanner = patterns.get_file_scanner(scanner_rules, "a/foo.txt")
+    assert patterns.get_file_scanner(scanner_rules, "b/bar.txt") is scanner
+    assert patterns.get_file_scanner(scanner_rules, "c/baz.txt") is None
+    # The patterns are combined into a single regular expression
+    assert scanner.regex.groupindex.keys() >= {"version__0", "version__1"}
+
+
+@pytest.mark.parametrize(
+    "config_contents",
+    [
+        '[project]\ndescription = "Released with bump-anything"\n',
+        "[project.urls]\nbump-anything-docs = 'https://example.com'\n",
+        "[tool.bump-anything-extras]\nfoo = 1\n",
+    ],
+)
+def test_config_mentioning_bump_anything(monkeypatch, config_contents):
+    """should not parse a config which merely mentions bump-anything"""
+    monkeypatch.setitem(sys.modules, "tomllib", None)
+    monkeypatch.setitem(sys.modules, "tomli", None)
+    create_mock_file("pyproject.toml", config_contents)
+    assert patterns.read_config("pyproject.toml") is None
+
+
+@pytest.mark.parametrize(
+    "config_contents",
+    [
+        "[tool.bump-anything]\nfiles = []\n",
+        "[[ tool . 'bump-anything' . files ]]\nglob = 'a.txt'\n",
+        "[tool]\nbump-anything = { files = [] }\n",
+        "tool.bump-anything.files = []\n",
+    ],
+)
+def test_config_with_table(config_contents):
+    """should read the [tool.bump-anything] table however it is written"""
+    create_mock_file("pyproject.toml", config_contents)
+    assert "files" in patterns.read_config("pyproject.toml")
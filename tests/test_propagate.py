@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.dependencies as dependencies
+from tests import (
+    create_mock_file,
+    init_git_repo,
+    read_mock_file,
+    run_git_command,
+    use_cli_args,
+)
+
+
+def create_npm_workspace():
+    create_mock_file(
+        "packages/a/package.json", '{\n  "name": "a",\n  "version": "1.2.3"\n}\n'
+    )
+    create_mock_file(
+        "packages/b/package.json",
+        "{\n"
+        '  "name": "b",\n'
+        '  "version": "1.2.3",\n'
+        '  "dependencies": {"a": "^1.2.3", "left-pad": "^1.2.3"},\n'
+        '  "devDependencies": {"a": "~1.2", "c": ">=1.0.0 <2.0.0"},\n'
+        '  "peerDependencies": {"a": "workspace:*"}\n'
+        "}\n",
+    )
+
+
+def test_propagate_to_dependents(capsys):
+    """should rewrite the ranges with which other manifests depend on a bump"""
+    create_npm_workspace()
+    with use_cli_args("minor", "packages/a/package.json", "--propagate", "--no-commit"):
+        bump.main()
+    assert capsys.readouterr().out == (
+        "packages/a/package.json: 1.2.3 -> 1.3.0\n"
+        "packages/b/package.json: a dependency 1.2.3 -> 1.3.0\n"
+        "packages/b/package.json: a dependency 1.2 -> 1.3\n"
+    )
+    assert read_mock_file("packages/b/package.json") == (
+        "{\n"
+        '  "name": "b",\n'
+        '  "version": "1.2.3",\n'
+        '  "dependencies": {"a": "^1.3.0", "left-pad": "^1.2.3"},\n'
+        '  "devDependencies": {"a": "~1.3", "c": ">=1.0.0 <2.0.0"},\n'
+        '  "peerDependencies": {"a": "workspace:*"}\n'
+        "}\n"
+    )
+
+
+def test_propagate_to_bumped_dependents():
+    """should write a dependent which is itself bumped with all of its changes"""
+    create_npm_workspace()
+    with use_cli_args("patch", "--workspace", "--propagate", "--no-commit"):
+        bump.main()
+    assert read_mock_file("packages/b/package.json").startswith(
+        "{\n"
+        '  "name": "b",\n'
+        '  "version": "1.2.4",\n'
+        '  "dependencies": {"a": "^1.2.4", "left-pad": "^1.2.3"},\n'
+    )
+
+
+def test_propagate_python_dependents():
+    """should rewrite PEP 508 and Poetry dependencies on a Python package"""
+    create_mock_file(
+        "c/pyproject.toml", '[project]\nname = "C_Lib"\nversion = "1.2.3"\n'
+    )
+    create_mock_file(
+        "d/pyproject.toml",
+        "[project]\n"
+        'name = "d"\n'
+        "dependencies = [\n"
+        "    \"c.lib[extra] ~= 1.2.3 ; python_version >= '3.9'\",  # comment\n"
+        '    "requests>=2",\n'
+        "]\n\n"
+        "[project.optional-dependencies]\n"
+        "test = ['c-lib==1.2.3']\n",
+    )
+    create_mock_file(
+        "e/pyproject.toml",
+        '[tool.poetry]\nname = "e"\n\n'
+        "[tool.poetry.group.dev.dependencies]\n"
+        'c-lib = { version = "^1.2", optional = true }\n',
+    )
+    with use_cli_args("major", "c/pyproject.toml", "--propagate", "--no-commit"):
+        bump.main()
+    assert read_mock_file("d/pyproject.toml") == (
+        "[project]\n"
+        'name = "d"\n'
+        "dependencies = [\n"
+        "    \"c.lib[extra] ~= 2.0.0 ; python_version >= '3.9'\",  # comment\n"
+        '    "requests>=2",\n'
+        "]\n\n"
+        "[project.optional-dependencies]\n"
+        "test = ['c-lib==2.0.0']\n"
+    )
+    assert 'c-lib = { version = "^2.0", optional = true }' in read_mock_file(
+        "e/pyproject.toml"
+    )
+
+
+def test_propagate_cargo_dependents():
+    """should rewrite inline and table dependencies on a crate"""
+    create_mock_file("x/Cargo.toml", '[package]\nname = "x"\nversion = "1.2.3"\n')
+    create_mock_file(
+        "y/Cargo.toml",
+        '[package]\nname = "y"\nversion = "0.1.0"\n\n'
+        '[dependencies]\nx = { path = "../x", version = "1.2" }\n\n'
+        "[target.'cfg(unix)'.dev-dependencies]\n"
+        'renamed = { package = "x", version = "=1.2.3" }\n\n'
+        '[build-dependencies.x]\npath = "../x"\nversion = "1.2.3"\n',
+    )
+    with use_cli_args("minor", "x/Cargo.toml", "--propagate", "--no-commit"):
+        bump.main()
+    assert read_mock_file("y/Cargo.toml") == (
+        '[package]\nname = "y"\nversion = "0.1.0"\n\n'
+        '[dependencies]\nx = { path = "../x", version = "1.3" }\n\n'
+        "[target.'cfg(unix)'.dev-dependencies]\n"
+        'renamed = { package = "x", version = "=1.3.0" }\n\n'
+        '[build-dependencies.x]\npath = "../x"\nversion = "1.3.0"\n'
+    )
+
+
+def test_propagate_to_inherited_cargo_version():
+    """should not replace a dependency found as the dependent's own version twice"""
+    create_mock_file("Cargo.toml", '[workspace]\nmembers = ["a", "b"]\n')
+    create_mock_file("a/Cargo.toml", '[package]\nname = "a"\nversion = "1.9.9"\n')
+    create_mock_file(
+        "b/Cargo.toml",
+        '[package]\nname = "b"\nversion.workspace = true\n\n'
+        '[dependencies]\na = { version = "1.9.9", path = "../a" }\n',
+    )
+    with use_cli_args("minor", "--workspace", "--propagate", "--no-commit"):
+        bump.main()
+    assert read_mock_file("b/Cargo.toml").endswith(
+        'a = { version = "1.10.0", path = "../a" }\n'
+    )
+
+
+def test_propagate_dry_run(capsys):
+    """should print the diff of each dependent without modifying it"""
+    create_npm_workspace()
+    with use_cli_args(
+        "minor", "packages/a/package.json", "--propagate", "--dry-run", "--no-commit"
+    ):
+        bump.main()
+    assert capsys.readouterr().out == (
+        "--- a/packages/a/package.json\n"
+        "+++ b/packages/a/package.json\n"
+        "@@ -3 +3 @@\n"
+        '-  "version": "1.2.3"\n'
+        '+  "version": "1.3.0"\n'
+        "--- a/packages/b/package.json\n"
+        "+++ b/packages/b/package.json\n"
+        "@@ -4 +4 @@\n"
+        '-  "dependencies": {"a": "^1.2.3", "left-pad": "^1.2.3"},\n'
+        '+  "dependencies": {"a": "^1.3.0", "left-pad": "^1.2.3"},\n'
+        "@@ -5 +5 @@\n"
+        '-  "devDependencies": {"a": "~1.2", "c": ">=1.0.0 <2.0.0"},\n'
+        '+  "devDependencies": {"a": "~1.3", "c": ">=1.0.0 <2.0.0"},\n'
+    )
+    assert '"a": "^1.2.3"' in read_mock_file("packages/b/package.json")
+
+
+def test_propagate_commits_dependents():
+    """should commit the dependents along with the bumped files"""
+    create_npm_workspace()
+    init_git_repo()
+    with use_cli_args("minor", "packages/a/package.json", "--propagate"):
+        bump.main()
+    assert run_git_command("show", "--name-only", "--format=") == (
+        "packages/a/package.json\npackages/b/package.json\n"
+    )
+
+
+def test_propagate_with_plan():
+    """should refuse to propagate when saving or applying a plan"""
+    with use_cli_args("minor", "--propagate", "--save-plan", "plan.json"):
+        with pytest.raises(SystemExit):
+            bump.main()
+
+
+def test_propagate_topological_order():
+    """should order changes so that each dependent follows its dependencies"""
+    create_mock_file("a/package.json", '{"name": "a", "version": "1.0.0"}')
+    create_mock_file(
+        "b/package.json",
+        '{"name": "b", "version": "1.0.0", "dependencies": {"a": "1.0.0"}}',
+    )
+    create_mock_file(
+        "c/package.json",
+        '{"name": "c", "version": "1.0.0", "dependencies": {"b": "1.0.0"}}',
+    )
+    version_changes = list(
+        bump.iterate_version_changes(
+            ["c/package.json", "b/package.json", "a/package.json"], "patch"
+        )
+    )
+    dependency_changes = dependencies.plan_dependency_changes(
+        ["a/package.json", "b/package.json", "c/package.json"], version_changes
+    )
+    assert [
+        (dependency_change.file_path, dependency_change.dependency_name)
+        for dependency_change in dependency_changes
+    ] == [("b/package.json", "a"), ("c/package.json", "b")]
+
+
+@pytest.mark.parametrize(
+    ("current_version", "new_version", "new_range_version"),
+    [
+        ("1.2.3", "1.3.0", "1.3.0"),
+        ("1.2", "2.0.0", "2.0"),
+        ("1", "2.0.0-rc.1", "2"),
+        ("1.2.3-beta.1", "1.2.3", "1.2.3"),
+    ],
+)
+def test_get_new_range_version(current_version, new_version, new_range_version):
+    """should keep the precision of the version within a range"""
+    assert (
+        dependencies.get_new_range_version(current_version, new_version)
+        == new_range_version
+    )
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.repositories as repositories
+from tests import (
+    create_mock_file,
+    init_git_repo,
+    read_mock_file,
+    run_git_command,
+    use_cli_args,
+)
+
+
+def create_repo(repo_path, version="1.2.3"):
+    create_mock_file(
+        os.path.join(repo_path, "package.json"), '{{"version": "{}"}}'.format(version)
+    )
+    os.chdir(repo_path)
+    init_git_repo()
+    os.chdir(os.pardir)
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_release_repos(capsys, jobs):
+    """should bump, commit and tag each repository, grouping their output"""
+    create_repo("a")
+    create_repo("b", version="4.5.6")
+    with use_cli_args("patch", "a", "b", "--repos", "--jobs", jobs):
+        bump.main()
+    output = capsys.readouterr().out
+    assert output.startswith("==> a\npackage.json: 1.2.3 -> 1.2.4\n")
+    assert "==> b\npackage.json: 4.5.6 -> 4.5.7\n" in output
+    assert output.index("Tagging commit as v1.2.4") < output.index("==> b")
+    assert output.endswith("Tagging commit as v4.5.7\n2 of 2 repositories succeeded\n")
+    os.chdir("b")
+    assert run_git_command("describe", "--tags").strip() == "v4.5.7"
+
+
+def test_release_repos_failure(capsys):
+    """should release the other repositories when one of them fails"""
+    create_repo("a")
+    create_repo("b")
+    os.chdir("a")
+    run_git_command("tag", "v1.2.4")
+    os.chdir(os.pardir)
+    with use_cli_args("patch", "a", "missing", "b", "--repos", "--jobs", "2"):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert exit_info.value.code == 1
+    output = capsys.readouterr().out
+    assert "==> a\nAborting because tag v1.2.4 already exists\n" in output
+    assert output.endswith("1 of 3 repositories succeeded; failed: a, missing\n")
+    assert read_mock_file("a/package.json") == '{"version": "1.2.3"}'
+    assert read_mock_file("b/package.json") == '{"version": "1.2.4"}'
+
+
+@pytest.mark.parametrize(
+    ("exit_code", "is_success"), [(None, True), (0, True), (2, False)]
+)
+def test_release_repo_exit_status(exit_code, is_success):
+    """should only count a release which exits with a non-zero status as failed"""
+    create_repo("a")
+    with patch(
+        "bumpanything.__main__.run_with_cache", side_effect=SystemExit(exit_code)
+    ):
+        repository_result = repositories.release_repository("a", None)
+    assert repository_result.is_success == is_success
+
+
+def test_release_repos_commit_failure(capsys):
+    """should count a repository whose commit fails as having failed"""
+    create_repo("a")
+    create_repo("b")
+    create_mock_file("a/.git/hooks/pre-commit", "#!/bin/sh\nexit 1\n")
+    os.chmod("a/.git/hooks/pre-commit", 0o755)
+    with use_cli_args("patch", "a", "b", "--repos"):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert exit_info.value.code == 1
+    output = capsys.readouterr().out
+    assert "==> a\npackage.json: 1.2.3 -> 1.2.4\n" in output
+    assert "Commit failed; aborting\n==> b" in output
+    assert output.endswith("1 of 2 repositories succeeded; failed: a\n")
+    os.chdir("a")
+    assert run_git_command("tag", "--list") == ""
+
+
+def test_release_repos_tag_failure(capsys):
+    """should count a repository whose tag fails as having failed"""
+    create_repo("a")
+    create_repo("b")
+    # Git cannot create a tag whose ref is locked
+    create_mock_file("a/.git/refs/tags/v1.2.4.lock", "")
+    with use_cli_args("patch", "a", "b", "--repos"):
+        with pytest.raises(SystemExit) as exit_info:
+            bump.main()
+    assert exit_info.value.code == 1
+    output = capsys.readouterr().out
+    assert "Tagging commit as v1.2.4 failed\n==> b" in output
+    assert output.endswith("1 of 2 repositories succeeded; failed: a\n")
+
+
+def test_release_submodules(capsys):
+    """should release every submodule of the current repository"""
+    create_repo("sub", version="0.1.0")
+    create_mock_file("super/README.md", "# Super\n")
+    os.chdir("super")
+    init_git_repo()
+    run_git_command(
+        "-c", "protocol.file.allow=always", "submodule", "add", "../sub", "libs/sub"
+    )
+    run_git_command("-C", "libs/sub", "config", "user.name", "Test User")
+    run_git_command("-C", "libs/sub", "config", "user.email", "user@example.com")
+    with use_cli_args("minor", "--submodules", "--no-tag"):
+        bump.main()
+    output = capsys.readouterr().out
+    assert output.startswith("==> libs/sub\npackage.json: 0.1.0 -> 0.2.0\n")
+    assert output.endswith("1 of 1 repositories succeeded\n")
+    assert read_mock_file("super/libs/sub/package.json") == '{"version": "0.2.0"}'
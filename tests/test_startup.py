@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import os
+import os.path
+import subprocess
+import sys
+
+# The maximum time (in milliseconds) which the `bump` command may spend
+# importing modules beyond those which a bare interpreter imports anyway; it
+# can be raised for slow machines via the environment variable below
+DEFAULT_IMPORT_TIME_BUDGET_MS = 75
+IMPORT_TIME_BUDGET_ENV_VAR_NAME = "BUMP_IMPORT_TIME_BUDGET_MS"
+
+# The number of times to run each command, keeping the fastest run in order
+# to smooth out noise from other processes
+IMPORT_TIME_RUN_COUNT = 3
+
+# Modules which are slow to import and which are not needed for a plain bump
+# that requires no parallelism, Git, or saved plans
+LAZY_MODULE_NAMES = (
+    "semver",
+    "concurrent.futures",
+    "subprocess",
+    "bumpanything.git",
+    "bumpanything.git_native",
+    "bumpanything.git_plumbing",
+    "bumpanything.plan",
+    "bumpanything.workspace",
+)
+
+
+# Run Python with the given arguments and -X importtime, returning a
+# dictionary mapping each top-level import to its cumulative import time (in
+# microseconds)
+def get_import_times(*python_args):
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    import_times = {}
+    for _ in range(IMPORT_TIME_RUN_COUNT):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", *python_args],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        run_import_times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative_time, module_name = line.split("|")
+            if not cumulative_time.strip().isdigit():
+                continue
+            # Nested imports are indented, and are already counted in the
+            # cumulative time of their top-level import
+            if module_name.startswith("  "):
+                run_import_times.setdefault(module_name.strip(), 0)
+                continue
+            run_import_times[module_name.strip()] = int(cumulative_time)
+        for module_name, import_time in run_import_times.items():
+            import_times[module_name] = min(
+                import_times.get(module_name, import_time), import_time
+            )
+    return import_times
+
+
+def get_bump_import_times():
+    return get_import_times(
+        "-m", "bumpanything", "patch", "missing.txt", "--no-commit", "--no-cache"
+    )
+
+
+def test_import_time_budget():
+    """should import the bump command within the import time budget"""
+    baseline_module_names = set(get_import_times("-c", "pass"))
+    bump_import_times = get_bump_import_times()
+    assert "bumpanything" in bump_import_times
+    import_time_ms = (
+        sum(
+            import_time
+            for module_name, import_time in bump_import_times.items()
+            if module_name not in baseline_module_names
+        )
+        / 1000
+    )
+    import_time_budget_ms = float(
+        os.environ.get(IMPORT_TIME_BUDGET_ENV_VAR_NAME, DEFAULT_IMPORT_TIME_BUDGET_MS)
+    )
+    assert import_time_ms <= import_time_budget_ms
+
+
+def test_slow_modules_imported_lazily():
+    """should not import modules which a plain bump does not need"""
+    bump_module_names = set(get_bump_import_times())
+    assert not bump_module_names.intersection(LAZY_MODULE_NAMES)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+import bumpanything.__main__ as bump
+import bumpanything.transaction as transaction
+from tests import (
+    create_mock_file,
+    init_git_repo,
+    read_mock_file,
+    run_git_command,
+    use_cli_args,
+)
+
+FILE_CONTENTS_1 = 'version = "1.2.3"\n'
+FILE_CONTENTS_2 = '{"version": "9.9.9"}\n'
+
+
+def stage_versions():
+    create_mock_file("a.toml", FILE_CONTENTS_1)
+    create_mock_file("sub/b.json", FILE_CONTENTS_2)
+    bump_transaction = transaction.Transaction(bump.get_journal_path())
+    bump_transaction.write_version("a.toml", 11, 16, "1.2.3", "1.2.4")
+    bump_transaction.write_version("sub/b.json", 13, 18, "9.9.9", "10.0.0")
+    return bump_transaction
+
+
+def test_commit():
+    """should apply all staged changes and clean up after itself"""
+    bump_transaction = stage_versions()
+    assert read_mock_file("a.toml") == FILE_CONTENTS_1
+    bump_transaction.commit()
+    assert read_mock_file("a.toml") == 'version = "1.2.4"\n'
+    assert read_mock_file("sub/b.json") == '{"version": "10.0.0"}\n'
+    assert not os.path.exists(bump.get_journal_path())
+    assert os.listdir("sub") == ["b.json"]
+
+
+def test_commit_syncs_patches_together():
+    """should flush patched files to disk only once all have been written"""
+    create_mock_file("a.toml", FILE_CONTENTS_1)
+    create_mock_file("c.toml", FILE_CONTENTS_1)
+    bump_transaction = transaction.Transaction(bump.get_journal_path())
+    bump_transaction.write_version("a.toml", 11, 16, "1.2.3", "1.2.4")
+    bump_transaction.write_version("c.toml", 11, 16, "1.2.3", "1.2.4")
+    synced_contents = {}
+
+    def record_sync(path):
+        if path.endswith(".toml"):
+            synced_contents[os.path.basename(path)] = (
+                read_mock_file("a.toml"),
+                read_mock_file("c.toml"),
+            )
+
+    with patch("bumpanything.transaction.fsync_path", side_effect=record_sync):
+        bump_transaction.commit()
+    new_contents = 'version = "1.2.4"\n'
+    assert synced_contents == {
+        "a.toml": (new_contents, new_contents),
+        "c.toml": (new_contents, new_contents),
+    }
+
+
+def test_recover_interrupted_transaction(capsys):
+    """should roll back a transaction which was interrupted after applying"""
+    bump_transaction = stage_versions()
+    bump_transaction.sync_temp_files()
+    bump_transaction.write_journal()
+    bump_transaction.apply()
+    assert read_mock_file("sub/b.json") == '{"version": "10.0.0"}\n'
+    assert transaction.recover(bump.get_journal_path())
+    assert read_mock_file("a.toml") == FILE_CONTENTS_1
+    assert read_mock_file("sub/b.json") == FILE_CONTENTS_2
+    assert not os.path.exists(bump.get_journal_path())
+    assert os.listdir("sub") == ["b.json"]
+    assert "Rolled back" in capsys.readouterr().err
+    assert not transaction.recover(bump.get_journal_path())
+
+
+def test_recover_from_git_subdirectory(capsys):
+    """should keep the journal out of the work tree and recover from anywhere"""
+    create_mock_file("a.toml", FILE_CONTENTS_1)
+    create_mock_file("sub/b.json", FILE_CONTENTS_2)
+    init_git_repo()
+    bump_transaction = stage_versions()
+    bump_transaction.sync_temp_files()
+    bump_transaction.write_journal()
+    bump_transaction.apply()
+    assert run_git_command("status", "--porcelain", "--ignored") == (
+        " M a.toml\n M sub/b.json\n"
+    )
+    os.chdir("sub")
+    assert transaction.recover(bump.get_journal_path())
+    os.chdir("..")
+    assert run_git_command("status", "--porcelain", "--ignored") == ""
+    assert not os.path.exists(os.path.join(".git", transaction.JOURNAL_FILE_NAME))
+    assert not [
+        name for name in os.listdir(".git") if name.endswith((".tmp", ".bump-backup"))
+    ]
+    assert "Rolled back" in capsys.readouterr().err
+
+
+def test_rollback_on_failure():
+    """should roll back all changes if any of them fails to apply"""
+    bump_transaction = stage_versions()
+    with patch("os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            bump_transaction.commit()
+    assert read_mock_file("a.toml") == FILE_CONTENTS_1
+    assert read_mock_file("sub/b.json") == FILE_CONTENTS_2
+    assert not os.path.exists(bump.get_journal_path())
+    assert os.listdir("sub") == ["b.json"]
+
+
+def test_main_recovers_before_bumping(capsys):
+    """should roll back an interrupted run before bumping again"""
+    bump_transaction = stage_versions()
+    bump_transaction.write_journal()
+    bump_transaction.apply()
+    with use_cli_args("patch", "a.toml", "--no-commit"):
+        bump.main()
+    captured = capsys.readouterr()
+    assert "Rolled back" in captured.err
+    assert "a.toml: 1.2.3 -> 1.2.4" in captured.out
+
+
+def test_recover_new_file():
+    """should remove a new file created by an interrupted transaction"""
+    bump_transaction = stage_versions()
+    bump_transaction.write_new_file("sub/CHANGELOG.md", "## 10.0.0\n")
+    bump_transaction.sync_temp_files()
+    bump_transaction.write_journal()
+    bump_transaction.apply()
+    assert read_mock_file("sub/CHANGELOG.md") == "## 10.0.0\n"
+    assert transaction.recover(bump.get_journal_path())
+    assert read_mock_file("sub/b.json") == FILE_CONTENTS_2
+    assert os.listdir("sub") == ["b.json"]
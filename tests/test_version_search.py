@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import random
+import time
+
+import pytest
+
+import benchmarks.workloads as workloads
+import bumpanything.__main__ as bump
+import bumpanything.version_search as version_search
+from bumpanything.version_search import VersionSearcher
+from tests import create_mock_file, read_mock_file, use_cli_args
+
+# Fragments from which contents are generated at random, to compare the
+# searcher against the pattern it stands in for
+CONTENTS_FRAGMENTS = (
+    "version",
+    "VerSion",
+    "verſion",
+    '"',
+    "'",
+    " ",
+    "\n",
+    "=",
+    ":",
+    "1",
+    "2",
+    ".",
+    "a",
+    "-",
+    "+",
+    "٣",
+    "İ",
+)
+
+
+def get_match_summary(version_match):
+    if not version_match:
+        return None
+    return (
+        version_match.span(),
+        version_match.span("version"),
+        version_match.group("version"),
+    )
+
+
+@pytest.mark.parametrize("contents_type", [str, bytes])
+def test_search_same_as_pattern(monkeypatch, contents_type):
+    """should find exactly what the version pattern itself would find"""
+    # Small chunks exercise keys which straddle two of them
+    monkeypatch.setattr(version_search, "KEY_CHUNK_SIZE", 5)
+    version_regex = bump.get_version_regex(contents_type)
+    version_searcher = VersionSearcher(contents_type)
+    random_generator = random.Random(0)
+    for _ in range(20000):
+        contents = "".join(
+            random_generator.choice(CONTENTS_FRAGMENTS)
+            for _ in range(random_generator.randint(0, 14))
+        )
+        if contents_type is bytes:
+            contents = contents.encode()
+        pos = random_generator.randint(0, min(3, len(contents)))
+        endpos = random_generator.randint(pos, len(contents) + 1)
+        assert get_match_summary(
+            version_searcher.search(contents, pos, endpos)
+        ) == get_match_summary(version_regex.search(contents, pos, endpos)), contents
+
+
+@pytest.mark.parametrize(
+    ("contents", "match_summary"),
+    [
+        ('{"version": "1.2.3"}', ((1, 19), (13, 18), "1.2.3")),
+        ("Version: 1.2.3-beta.1\n", ((0, 22), (9, 21), "1.2.3-beta.1")),
+        ("'version'='1.2.3x", None),
+        ("\"version'='1.2.3'", None),
+        ('version = "1.2.' + "3" * 1000, None),
+    ],
+)
+def test_search(contents, match_summary):
+    """should match the syntax around the version key"""
+    assert get_match_summary(VersionSearcher().search(contents)) == match_summary
+
+
+def test_search_byte_budget():
+    """should not search past the byte budget, nor trust a match cut short by it"""
+    contents = b'{"name": "foo", "version": "1.2.3-beta.1"}'
+    version_start = contents.index(b"1.2.3")
+    assert VersionSearcher(bytes, byte_budget=len(contents)).search(contents)
+    assert not VersionSearcher(bytes, byte_budget=version_start + 5).search(contents)
+    assert not VersionSearcher(bytes, byte_budget=version_start).search(contents)
+
+
+@pytest.mark.parametrize("kind", workloads.ADVERSARIAL_INPUTS.keys())
+def test_search_adversarial_inputs(kind):
+    """should search adversarial inputs in linear time"""
+    contents = workloads.get_adversarial_contents(kind, 1024 * 1024)
+    start_time = time.perf_counter()
+    assert VersionSearcher(bytes).search(contents) is None
+    # A backtracking search of the unclosed version alone would take hours
+    assert time.perf_counter() - start_time < 2
+
+
+def test_max_scan_bytes(capsys):
+    """should ignore any version past the maximum number of bytes to scan"""
+    create_mock_file("a.json", '{"version": "1.2.3"}')
+    create_mock_file("b.json", '{"name": "' + "b" * 1000 + '", "version": "1.2.3"}')
+    with use_cli_args(
+        "patch", "a.json", "b.json", "--max-scan-bytes", "100", "--no-commit"
+    ):
+        bump.main()
+    assert capsys.readouterr().out == "a.json: 1.2.3 -> 1.2.4\n"
+    assert read_mock_file("b.json").endswith('"version": "1.2.3"}')
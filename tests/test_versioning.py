@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import pytest
+
+import bumpanything.versioning as versioning
+
+# Versions covering every part of the semantic version syntax
+SAMPLE_VERSIONS = (
+    "0.0.0",
+    "1.2.3",
+    "10.20.30",
+    "1.2.3-beta",
+    "1.2.3-beta.4",
+    "1.2.3-rc.1+build.5",
+    "1.2.3+build.5",
+    "1.2.3-0",
+    "1.2.3-alpha.1.x",
+    "1.2.3-x-y-z.9",
+    "1.2.3-1a.99",
+)
+
+
+@pytest.mark.parametrize(
+    ("version", "increment_type", "new_version"),
+    [
+        ("1.2.3", "major", "2.0.0"),
+        ("1.2.3-beta.4+build.5", "major", "2.0.0"),
+        ("1.2.3", "minor", "1.3.0"),
+        ("1.2.3", "patch", "1.2.4"),
+        ("1.2.3-beta.4", "patch", "1.2.4"),
+        ("1.2.3", "prerelease", "1.2.3-rc.1"),
+        ("1.2.3-beta.4", "prerelease", "1.2.3-beta.5"),
+        ("1.2.3-beta", "prerelease", "1.2.3-beta"),
+        ("1.2.3-alpha.1.x", "prerelease", "1.2.3-alpha.2.x"),
+        ("1.2.3-1a.99", "prerelease", "1.2.3-1a.100"),
+        ("1.2.3-9", "prerelease", "1.2.3-10"),
+        ("1.2.3-rc.1+build.5", "prerelease", "1.2.3-rc.2"),
+    ],
+)
+def test_bump_version(version, increment_type, new_version):
+    """should bump the given part of the version"""
+    assert versioning.bump_version(version, increment_type) == new_version
+
+
+@pytest.mark.parametrize("increment_type", ["major", "minor", "patch", "prerelease"])
+def test_bump_version_matches_semver(increment_type):
+    """should bump versions exactly as the semver package (3.0) does"""
+    semver = pytest.importorskip("semver")
+    semver_version = tuple(map(int, semver.__version__.split(".")[:2]))
+    if increment_type == "prerelease" and semver_version >= (3, 1):
+        pytest.skip("semver 3.1 changed how prereleases are bumped")
+    for version in SAMPLE_VERSIONS:
+        assert versioning.bump_version(version, increment_type) == str(
+            getattr(semver.Version.parse(version), f"bump_{increment_type}")()
+        )
+
+
+@pytest.mark.parametrize(
+    ("version", "is_valid"),
+    [
+        ("1.2.3", True),
+        ("1.2.3-beta.4+build.5", True),
+        ("1.2", False),
+        ("01.2.3", False),
+        ("1.2.3-01", False),
+        ("1.2.3-", False),
+        ("1.2.3\n", False),
+    ],
+)
+def test_is_valid_version(version, is_valid):
+    """should only accept valid semantic versions"""
+    assert versioning.is_valid_version(version) is is_valid
+
+
+def test_bump_invalid_version():
+    """should raise a ValueError when bumping an invalid version"""
+    with pytest.raises(ValueError):
+        versioning.bump_version("1.2", "patch")
+
+
+def test_bump_versions_memoized():
+    """should only parse each distinct version once when bumping in bulk"""
+    versioning.bump_version.cache_clear()
+    new_versions = versioning.bump_versions(["1.2.3", "4.5.6"] * 500, "minor")
+    assert new_versions == ["1.3.0", "4.6.0"] * 500
+    assert versioning.bump_version.cache_info().misses == 2
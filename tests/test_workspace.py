@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import bumpanything.__main__ as bump
+import bumpanything.workspace as workspace
+from tests import (
+    create_mock_file,
+    read_mock_file,
+    use_cli_args,
+)
+
+PACKAGE_JSON_CONTENTS = """{
+    "name": "foo",
+    "version": "1.2.3"
+}"""
+
+
+def test_workspace_bump(capsys):
+    """should bump manifests found anywhere in the workspace"""
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("packages/a/package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("packages/b/Cargo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("minor", "--workspace", "--no-commit"):
+        bump.main()
+    captured = capsys.readouterr()
+    assert "package.json: 1.2.3 -> 1.3.0" in captured.out
+    assert "packages/a/package.json: 1.2.3 -> 1.3.0" in captured.out
+    assert "packages/b/Cargo.toml: 1.2.3 -> 1.3.0" in captured.out
+    assert '"version": "1.3.0"' in read_mock_file("packages/a/package.json")
+
+
+def test_workspace_roots(capsys):
+    """should only search the given directories when paths are passed"""
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("packages/a/package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("packages/b/Cargo.toml", 'version = "1.2.3"\n')
+    with use_cli_args("minor", "packages/a", "--workspace", "--no-commit"):
+        bump.main()
+    captured = capsys.readouterr()
+    assert "packages/a/package.json: 1.2.3 -> 1.3.0" in captured.out
+    assert "Cargo.toml" not in captured.out
+    assert '"version": "1.2.3"' in read_mock_file("package.json")
+
+
+def test_workspace_pruning():
+    """should skip VCS metadata, node_modules, virtualenvs and ignored paths"""
+    create_mock_file("package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file(".git/package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("node_modules/dep/package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("env/pyvenv.cfg", "home = /usr/bin\n")
+    create_mock_file("env/lib/pkg/setup.py", "version='1.2.3'\n")
+    create_mock_file(".gitignore", "build/\n/dist\n*.tmp\n")
+    create_mock_file("build/package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("dist/package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("pkg/dist/package.json", PACKAGE_JSON_CONTENTS)
+    create_mock_file("pkg/.gitignore", "!keep\nsetup.cfg\n")
+    create_mock_file("pkg/setup.cfg", "version = 1.2.3\n")
+    assert workspace.find_manifest_paths(".", ["package.json", "setup.cfg"]) == [
+        "package.json",
+        "pkg/dist/package.json",
+    ]
+
+
+def test_workspace_plugin_files():
+    """should match <dirname>.php within every directory"""
+    create_mock_file("plugins/my-plugin/my-plugin.php", "Version: 1.2.3\n")
+    create_mock_file("plugins/my-plugin/other.php", "Version: 1.2.3\n")
+    create_mock_file("plugins/my-plugin/package.json", PACKAGE_JSON_CONTENTS)
+    assert workspace.find_manifest_paths(".", ["package.json"]) == [
+        "plugins/my-plugin/package.json",
+        "plugins/my-plugin/my-plugin.php",
+    ]
+
+
+def test_gitignore_patterns():
+    """should translate .gitignore patterns the way Git does"""
+    regex, is_negated, is_dir_only, is_anchored = workspace.compile_gitignore_pattern(
+        "docs/**/generated/"
+    )
+    assert regex.match("docs/a/b/generated")
+    assert regex.match("docs/generated")
+    assert not regex.match("other/generated")
+    assert (is_negated, is_dir_only, is_anchored) == (False, True, True)
+    assert workspace.compile_gitignore_pattern("# comment") is None
+    assert workspace.compile_gitignore_pattern("   ") is None